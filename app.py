@@ -8,6 +8,8 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from logging.handlers import RotatingFileHandler
 import os
 from models import db # Import db instance from models.py
+from utils.post_search import ensure_search_index # Also registers the FTS sync hooks on CollectedPost
+from utils.db_engine import engine_options, ensure_postgres_storage # Also registers the SQLite WAL/busy_timeout PRAGMAs
 
 # Create the app
 app = Flask(__name__)
@@ -69,10 +71,8 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)  # needed for url_for
 
 # Configure the database, relative to the app instance folder
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///osint_tool.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# Pool size/overflow for Postgres come from DB_POOL_SIZE / DB_MAX_OVERFLOW (see utils/db_engine.py)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 
 # Initialize the imported db with the app
 db.init_app(app)
@@ -90,3 +90,7 @@ with app.app_context():
     # db.create_all() will now use the db instance that has been initialized with the app
     # and knows about the models defined in models.py
     db.create_all()
+    # Full-text index over collected posts (FTS5 on SQLite, GIN tsvector on Postgres)
+    ensure_search_index()
+    # JSONB + GIN indexes for the JSON columns on Postgres
+    ensure_postgres_storage(db.engine)
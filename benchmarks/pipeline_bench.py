@@ -0,0 +1,240 @@
+"""
+End-to-end benchmark for the utils.batch_runner pipeline stages.
+
+Feeds a synthetic (or recorded) corpus through the same stages that
+run_batch_from_config chains together — scrape, enrich_results_with_nlp,
+enrich_with_hate_speech and export_enriched_results — with the scraper
+stubbed out, and reports per stage:
+  * throughput (items/sec)
+  * p50 / p99 per-item latency (per-item stages only)
+  * peak RSS while the stage ran (psutil, falling back to ru_maxrss)
+
+Usage:
+    python -m benchmarks.pipeline_bench --size 1000
+    python -m benchmarks.pipeline_bench --size 100000 --stub-models
+    python -m benchmarks.pipeline_bench --corpus exports/test.csv --size 50000
+    python -m benchmarks.pipeline_bench --size 1000 --json pipeline_report.json
+
+--stub-models swaps spaCy/TextBlob/Detoxify for constant-time stand-ins so the
+pipeline overhead (dict copying, export) can be measured without the models.
+"""
+import argparse
+import csv
+import json
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; ru_maxrss is used instead
+    psutil = None
+
+WORDS = (
+    "protest road market drought aid convoy border election river clinic school harvest "
+    "ceasefire rally fuel price water town council report militia refugee camp fighting "
+    "government minister police strike peace talks"
+).split()
+
+
+def synthetic_corpus(size, seed=13):
+    """Posts shaped like scrape_facebook results."""
+    rng = random.Random(seed)
+    posts = []
+    for i in range(size):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 60))).capitalize() + "."
+        posts.append({
+            "text": text,
+            "author_name": f"Author {i % 5000}",
+            "author_url": f"https://www.facebook.com/profile.php?id={100000 + i % 5000}",
+            "timestamp": f"{(i % 23) + 1}h",
+            "post_url": f"https://www.facebook.com/groups/hornnews/permalink/{i}/",
+            "media_urls": [],
+        })
+    return posts
+
+
+def load_corpus(path, size):
+    """Load a recorded corpus (JSON list or CSV export) and cycle it up to `size` items."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+    else:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            # DictReader puts overflow columns under a None key; drop them.
+            items = [{k: v for k, v in row.items() if k is not None} for row in csv.DictReader(f)]
+    if not items:
+        raise SystemExit(f"Corpus {path} is empty")
+    return [dict(items[i % len(items)]) for i in range(size)]
+
+
+class PeakRSS:
+    """Tracks the peak resident set size of this process while a stage runs."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        proc = psutil.Process()
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, proc.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self.peak_bytes = psutil.Process().memory_info().rss
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self.peak_bytes = max(self.peak_bytes, psutil.Process().memory_info().rss)
+        else:
+            # ru_maxrss is the process-lifetime peak (KiB on Linux), not per stage.
+            self.peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @property
+    def peak_mb(self):
+        return round(self.peak_bytes / (1024 * 1024), 1)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_per_item_stage(name, func, items):
+    """Run `func([item])` for every item so per-item latency can be recorded."""
+    latencies = []
+    out = []
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        for item in items:
+            t0 = time.perf_counter()
+            out.extend(func([item]))
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return out, {
+        "stage": name,
+        "items": len(items),
+        "seconds": round(elapsed, 3),
+        "items_per_sec": round(len(items) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+
+def run_batch_stage(name, func, items):
+    """Run a stage that only makes sense over the whole batch (scrape, export)."""
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        out = func(items)
+        elapsed = time.perf_counter() - start
+    return out, {
+        "stage": name,
+        "items": len(items),
+        "seconds": round(elapsed, 3),
+        "items_per_sec": round(len(items) / elapsed, 1) if elapsed else None,
+        "p50_ms": None,
+        "p99_ms": None,
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+
+def _stub_nlp(results):
+    for item in results:
+        item["sentiment"] = 0.0
+        item["entities"] = [{"text": "Stub", "label": "ORG"}]
+    return results
+
+
+def _stub_hate_speech(results):
+    for item in results:
+        item.update({
+            "toxicity": 0.01, "severe_toxicity": 0.0, "obscene": 0.0,
+            "threat": 0.0, "insult": 0.0, "identity_attack": 0.0,
+        })
+    return results
+
+
+def build_stages(stub_models):
+    from utils.scraper_engine import export_enriched_results
+
+    if stub_models:
+        nlp, hate = _stub_nlp, _stub_hate_speech
+    else:
+        from utils.nlp_tools import enrich_results_with_nlp as nlp
+        from utils.hate_speech import enrich_with_hate_speech as hate
+    return nlp, hate, export_enriched_results
+
+
+def run_pipeline_benchmark(corpus, stub_models=False, output_dir=None, platform="facebook", query="pipeline bench"):
+    nlp, hate, export = build_stages(stub_models)
+    output_dir = output_dir or tempfile.mkdtemp(prefix="osint_pipeline_bench_")
+    report = []
+
+    # Stub scraper: hands back copies of the corpus, as a scraper would build fresh dicts.
+    results, stats = run_batch_stage("scrape (stub)", lambda items: [dict(i) for i in items], corpus)
+    report.append(stats)
+
+    results, stats = run_per_item_stage("enrich_results_with_nlp", nlp, results)
+    report.append(stats)
+
+    results, stats = run_per_item_stage("enrich_with_hate_speech", hate, results)
+    report.append(stats)
+
+    _, stats = run_batch_stage(
+        "export_enriched_results",
+        lambda items: export(items, query, platform, output_dir=output_dir),
+        results,
+    )
+    report.append(stats)
+    return report
+
+
+def print_report(report):
+    header = f"{'stage':<28}{'items':>10}{'seconds':>10}{'items/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MB':>13}"
+    print(header)
+    print("-" * len(header))
+    for row in report:
+        fmt = lambda v: "-" if v is None else v
+        print(f"{row['stage']:<28}{row['items']:>10}{row['seconds']:>10}{fmt(row['items_per_sec']):>12}"
+              f"{fmt(row['p50_ms']):>10}{fmt(row['p99_ms']):>10}{row['peak_rss_mb']:>13}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the batch_runner enrichment pipeline.")
+    parser.add_argument("--size", type=int, default=1000, help="Number of posts to push through the pipeline.")
+    parser.add_argument("--corpus", help="Recorded corpus (JSON list or CSV export) instead of synthetic posts.")
+    parser.add_argument("--stub-models", action="store_true", help="Replace NLP/Detoxify models with constant stubs.")
+    parser.add_argument("--output-dir", help="Where export_enriched_results writes (default: temp dir).")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path.")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus, args.size) if args.corpus else synthetic_corpus(args.size)
+    print(f"📦 Corpus: {len(corpus)} posts ({'recorded' if args.corpus else 'synthetic'}), "
+          f"models: {'stubbed' if args.stub_models else 'real'}")
+    report = run_pipeline_benchmark(corpus, stub_models=args.stub_models, output_dir=args.output_dir)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
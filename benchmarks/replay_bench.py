@@ -0,0 +1,327 @@
+"""
+Offline replay benchmark for the scrapers and HTML parsers.
+
+Serves recorded pages (the HTML snapshots in benchmarks/fixtures/, or the
+entries of a HAR capture) from a local HTTP server, then:
+  * runs the utils.scraper_engine parse_* functions against the snapshots, and
+  * runs scrapers.facebook_scraper.scrape_facebook against the local server
+    (FACEBOOK_BASE_URL is pointed at it, with a throwaway Chrome profile).
+
+Reports wall time, posts/sec and, when psutil is installed, browser RSS and CPU.
+Results can be compared with the checked-in baselines (benchmarks/baselines.json).
+
+Usage:
+    python -m benchmarks.replay_bench                      # parsers + browser
+    python -m benchmarks.replay_bench --skip-browser       # parsers only
+    python -m benchmarks.replay_bench --har capture.har    # replay a HAR capture
+    python -m benchmarks.replay_bench --check              # fail on regressions
+    python -m benchmarks.replay_bench --update-baselines   # record new baselines
+
+To add a snapshot, save `await page.content()` from a live scrape (the same
+place the debug_*.png screenshots are taken) into benchmarks/fixtures/ and map
+its URL path in FIXTURE_ROUTES.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform as _platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; resource stats are skipped without it
+    psutil = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines.json")
+
+# URL path prefix served by the replay server -> fixture file
+FIXTURE_ROUTES = {
+    "/search/posts/": "facebook_search_posts.html",
+    "/search/top": "facebook_search_posts.html",
+    "/search": "twitter_search.html",
+    "/results": "youtube_results.html",
+}
+
+# parser name -> fixture file it is benchmarked against
+PARSER_FIXTURES = {
+    "parse_facebook_html": "facebook_search_posts.html",
+    "parse_twitter_html": "twitter_search.html",
+    "parse_youtube_html": "youtube_results.html",
+    "parse_instagram_html": "instagram_profile.html",
+}
+
+# Allowed slowdown relative to baseline before --check fails.
+DEFAULT_TOLERANCE = 0.25
+
+
+def _read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_har_routes(har_path):
+    """Map URL paths to response bodies for every text entry in a HAR file."""
+    with open(har_path, "r", encoding="utf-8") as f:
+        har = json.load(f)
+    routes = {}
+    for entry in har.get("log", {}).get("entries", []):
+        content = entry.get("response", {}).get("content", {})
+        text = content.get("text")
+        if text is None or content.get("encoding") == "base64":
+            continue
+        path = urlsplit(entry["request"]["url"]).path or "/"
+        routes.setdefault(path, (text, content.get("mimeType", "text/html")))
+    return routes
+
+
+class ReplayServer:
+    """Minimal threaded HTTP server that answers from fixtures or a HAR capture."""
+
+    def __init__(self, har_path=None, host="127.0.0.1", port=0):
+        self.exact_routes = load_har_routes(har_path) if har_path else {}
+        self.prefix_routes = {prefix: _read_fixture(name) for prefix, name in FIXTURE_ROUTES.items()}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _lookup(self, path):
+        if path in self.exact_routes:
+            return self.exact_routes[path]
+        # Longest prefix wins, so /search/posts/ beats /search
+        for prefix in sorted(self.prefix_routes, key=len, reverse=True):
+            if path.startswith(prefix):
+                return self.prefix_routes[prefix], "text/html"
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                found = server._lookup(urlsplit(self.path).path)
+                if found is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body, mime = found
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", f"{mime}; charset=utf-8" if "charset" not in mime else mime)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ResourceSampler:
+    """Samples RSS and CPU time of this process's children (the browser) in the background."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self.cpu_seconds = 0.0
+        self._cpu_by_pid = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        me = psutil.Process()
+        rss = 0
+        for child in me.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+                times = child.cpu_times()
+                self._cpu_by_pid[child.pid] = times.user + times.system
+            except psutil.Error:
+                continue
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        self.cpu_seconds = sum(self._cpu_by_pid.values())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+
+    def as_dict(self):
+        if psutil is None:
+            return {"browser_peak_rss_mb": None, "browser_cpu_seconds": None}
+        return {
+            "browser_peak_rss_mb": round(self.peak_rss_bytes / (1024 * 1024), 1),
+            "browser_cpu_seconds": round(self.cpu_seconds, 2),
+        }
+
+
+def bench_parsers(iterations=50):
+    from utils import scraper_engine
+
+    report = {}
+    for parser_name, fixture in PARSER_FIXTURES.items():
+        parser = getattr(scraper_engine, parser_name)
+        html = _read_fixture(fixture)
+        timings = []
+        items = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            items = len(parser(html))
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        report[parser_name] = {
+            "iterations": iterations,
+            "items": items,
+            "wall_seconds_median": round(median, 5),
+            "items_per_sec": round(items / median, 1) if median else None,
+        }
+    return report
+
+
+def bench_facebook_browser(base_url, iterations=1, query="replay benchmark"):
+    # scrapers.config reads its settings at import time, so configure first.
+    os.environ["FACEBOOK_BASE_URL"] = base_url
+    os.environ.setdefault("CHROME_USER_DATA_DIR", tempfile.mkdtemp(prefix="osint_bench_profile_"))
+    os.environ.setdefault("HEADLESS_MODE", "True")
+    from scrapers.facebook_scraper import scrape_facebook
+
+    runs = []
+    for _ in range(iterations):
+        with ResourceSampler() as sampler:
+            start = time.perf_counter()
+            data = asyncio.run(scrape_facebook(query, "posts"))
+            elapsed = time.perf_counter() - start
+        posts = len(data.get("results", []))
+        run = {
+            "wall_seconds": round(elapsed, 3),
+            "posts": posts,
+            "posts_per_sec": round(posts / elapsed, 2) if elapsed else None,
+            "status_detail": data.get("status_detail"),
+        }
+        run.update(sampler.as_dict())
+        runs.append(run)
+
+    median_wall = statistics.median(r["wall_seconds"] for r in runs)
+    return {
+        "iterations": iterations,
+        "posts": runs[-1]["posts"],
+        "wall_seconds_median": median_wall,
+        "posts_per_sec": runs[-1]["posts_per_sec"],
+        "browser_peak_rss_mb": max((r["browser_peak_rss_mb"] or 0) for r in runs) or None,
+        "browser_cpu_seconds": runs[-1]["browser_cpu_seconds"],
+        "status_detail": runs[-1]["status_detail"],
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a list of human-readable regressions (slower wall time or fewer items)."""
+    regressions = []
+    for section in ("parsers", "browser"):
+        for name, current in report.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if not base or base.get("wall_seconds_median") is None:
+                continue
+            limit = base["wall_seconds_median"] * (1 + tolerance)
+            if current["wall_seconds_median"] > limit:
+                regressions.append(
+                    f"{section}.{name}: {current['wall_seconds_median']}s > baseline "
+                    f"{base['wall_seconds_median']}s (+{int(tolerance * 100)}% allowed)"
+                )
+            base_items = base.get("items", base.get("posts"))
+            current_items = current.get("items", current.get("posts"))
+            if base_items is not None and current_items is not None and current_items < base_items:
+                regressions.append(f"{section}.{name}: extracted {current_items} items, baseline {base_items}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline replay benchmark for scrapers and parsers.")
+    parser.add_argument("--har", help="Replay responses from a HAR capture in addition to the fixtures.")
+    parser.add_argument("--parser-iterations", type=int, default=50)
+    parser.add_argument("--browser-iterations", type=int, default=1)
+    parser.add_argument("--skip-browser", action="store_true", help="Only benchmark the HTML parsers.")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if results regress against baselines.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baselines", action="store_true", help="Write results to benchmarks/baselines.json.")
+    args = parser.parse_args(argv)
+
+    report = {
+        "machine": {"python": _platform.python_version(), "platform": _platform.platform()},
+        "parsers": bench_parsers(args.parser_iterations),
+        "browser": {},
+    }
+
+    if not args.skip_browser:
+        with ReplayServer(har_path=args.har) as server:
+            print(f"🔁 Replay server listening on {server.base_url}")
+            report["browser"]["scrape_facebook"] = bench_facebook_browser(server.base_url, args.browser_iterations)
+
+    print(json.dumps(report, indent=2))
+
+    if args.update_baselines:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["machine"] = report["machine"]
+        baseline.setdefault("parsers", {}).update(report["parsers"])
+        for name, result in report["browser"].items():
+            if (result.get("status_detail") or "").startswith("Critical error"):
+                print(f"⚠️ Not recording browser baseline for {name}: {result['status_detail']}")
+                continue
+            baseline.setdefault("browser", {})[name] = result
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"✅ Baselines written to {BASELINE_PATH}")
+
+    if args.check:
+        if not os.path.exists(BASELINE_PATH):
+            print("⚠️ No baselines recorded yet; run with --update-baselines first.")
+            return 1
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ No regressions against baselines.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy # Import directly
 from sqlalchemy.orm import DeclarativeBase # Import directly
+from sqlalchemy.types import TypeDecorator, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import json
 
@@ -8,15 +10,36 @@ class Base(DeclarativeBase):
     pass
 db = SQLAlchemy(model_class=Base)
 
+class JSONText(TypeDecorator):
+    """A JSON document held as a string in Python; JSONB on Postgres (GIN-indexable), TEXT elsewhere"""
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(JSONB() if dialect.name == "postgresql" else Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "postgresql":
+            return json.loads(value)  # JSONB serializes the document itself
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and not isinstance(value, str):
+            return json.dumps(value)
+        return value
+
 class SearchResult(db.Model):
     """Model to store search results for caching and export functionality"""
     id = db.Column(db.Integer, primary_key=True)
     search_type = db.Column(db.String(20), nullable=False)  # 'username' or 'keyword'
     search_query = db.Column(db.String(255), nullable=False)
     platform = db.Column(db.String(50), nullable=False, default='Facebook')
-    result_data = db.Column(db.Text)  # JSON string of scraped data
+    result_data = db.Column(JSONText)  # JSON string of scraped data
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='success')  # success, error, not_found
+
+    post_links = db.relationship('SearchResultPost', back_populates='search_result',
+                                 order_by='SearchResultPost.position', cascade='all, delete-orphan')
     
     def set_result_data(self, data):
         """Store result data as JSON string"""
@@ -26,6 +49,9 @@ class SearchResult(db.Model):
         """Retrieve result data as Python object"""
         if self.result_data:
             return json.loads(self.result_data)
+        if self.post_links:
+            # Successful results reference deduplicated posts instead of embedding them.
+            return [link.post.to_dict() for link in self.post_links]
         return {}
     
     def __repr__(self):
@@ -41,3 +67,141 @@ class ScrapingSession(db.Model):
     
     def __repr__(self):
         return f'<ScrapingSession {self.platform}:{self.request_count}>'
+
+class CollectedPost(db.Model):
+    """A unique post, stored once and linked to every search that found it (see utils/dedup.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    platform = db.Column(db.String(50), nullable=False, default='facebook')
+    post_key = db.Column(db.String(64), nullable=False, unique=True, index=True)  # sha256 of platform + canonical URL (or text)
+    canonical_url = db.Column(db.Text)
+    simhash = db.Column(db.BigInteger, nullable=False)  # 64-bit content SimHash, stored signed
+    # 16-bit SimHash bands; posts within a few bits of each other share at least one band
+    simhash_band0 = db.Column(db.Integer, index=True)
+    simhash_band1 = db.Column(db.Integer, index=True)
+    simhash_band2 = db.Column(db.Integer, index=True)
+    simhash_band3 = db.Column(db.Integer, index=True)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('collected_post.id'), nullable=True)  # near-duplicate/repost of
+    text = db.Column(db.Text)
+    author_name = db.Column(db.String(255))
+    author_url = db.Column(db.Text)
+    posted_at_text = db.Column(db.String(100))  # timestamp as shown by the platform ("3h", "June 2")
+    media_urls = db.Column(db.Text)  # JSON list
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    enriched_at = db.Column(db.DateTime, nullable=True)
+    enrichment = db.Column(JSONText)  # JSON of NLP/hate-speech fields added by the enrichers
+    # Filterable copies of the enrichment, kept in sync by utils.dedup.record_enrichment
+    topic = db.Column(db.String(50), index=True)
+    sentiment = db.Column(db.Float)
+    toxicity = db.Column(db.Float, index=True)
+    entities_text = db.Column(db.Text)  # entity names joined by spaces, for full-text search
+    graphed_at = db.Column(db.DateTime, nullable=True, index=True)  # when the post was added to the entity graph
+
+    duplicate_of = db.relationship('CollectedPost', remote_side=[id])
+
+    def to_dict(self):
+        """Return the post in the same shape the scrapers produce"""
+        data = {
+            "text": self.text or "N/A",
+            "author_name": self.author_name or "N/A",
+            "author_url": self.author_url or "N/A",
+            "timestamp": self.posted_at_text or "N/A",
+            "post_url": self.canonical_url or "N/A",
+            "media_urls": json.loads(self.media_urls) if self.media_urls else [],
+        }
+        if self.enrichment:
+            data.update(json.loads(self.enrichment))
+        return data
+
+    def __repr__(self):
+        return f'<CollectedPost {self.platform}:{self.canonical_url or self.post_key[:12]}>'
+
+class SearchResultPost(db.Model):
+    """Links a SearchResult to the deduplicated posts it returned, in result order"""
+    search_result_id = db.Column(db.Integer, db.ForeignKey('search_result.id'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('collected_post.id'), primary_key=True, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    search_result = db.relationship('SearchResult', back_populates='post_links')
+    post = db.relationship('CollectedPost', backref=db.backref('search_links', lazy='dynamic'))
+
+class GraphNode(db.Model):
+    """A user, entity or topic in the persistent OSINT graph, with precomputed metrics and layout"""
+    __table_args__ = (db.UniqueConstraint('kind', 'key', name='uq_graph_node_kind_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, index=True)  # 'user', 'entity' or 'topic'
+    key = db.Column(db.String(255), nullable=False)  # normalized identity within its kind
+    label = db.Column(db.String(255), nullable=False)
+    platform = db.Column(db.String(50))  # users only
+    post_count = db.Column(db.Integer, default=0)
+    degree = db.Column(db.Integer, default=0, index=True)
+    centrality = db.Column(db.Float, default=0.0, index=True)  # PageRank, refreshed in the background
+    x = db.Column(db.Float)  # cached layout position, refreshed in the background
+    y = db.Column(db.Float)
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id, "kind": self.kind, "label": self.label, "platform": self.platform,
+            "post_count": self.post_count, "degree": self.degree, "centrality": self.centrality,
+            "x": self.x, "y": self.y,
+        }
+
+    def __repr__(self):
+        return f'<GraphNode {self.kind}:{self.key}>'
+
+class GraphEdge(db.Model):
+    """Undirected weighted edge between two graph nodes, stored with source_id < target_id"""
+    source_id = db.Column(db.Integer, db.ForeignKey('graph_node.id'), primary_key=True)
+    target_id = db.Column(db.Integer, db.ForeignKey('graph_node.id'), primary_key=True, index=True)
+    weight = db.Column(db.Integer, nullable=False, default=1)  # number of posts connecting the two nodes
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+
+class JobRun(db.Model):
+    """One execution of a scheduled batch job, for run history and change-rate tracking"""
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(255), nullable=False, index=True)
+    platform = db.Column(db.String(50))
+    search_query = db.Column(db.String(255))
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    finished_at = db.Column(db.DateTime)
+    status = db.Column(db.String(20), nullable=False)  # success, no_results, error, missed, skipped, circuit_open
+    result_count = db.Column(db.Integer, default=0)
+    new_post_count = db.Column(db.Integer, default=0)  # posts not seen in any earlier run
+    error = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<JobRun {self.job_id} {self.status} @ {self.started_at}>'
+
+class Task(db.Model):
+    """A unit of scrape/enrichment work in the shared queue, consumed by worker.py processes"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, index=True)  # 'search', 'batch' or 'enrich'
+    payload = db.Column(db.Text, nullable=False)  # JSON arguments for the task handler
+    idempotency_key = db.Column(db.String(255), unique=True)  # re-enqueueing the same key returns the existing task
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    priority = db.Column(db.Integer, nullable=False, default=0)  # higher runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # not claimable before this (retry backoff)
+    lease_owner = db.Column(db.String(255))  # worker id holding the task while running
+    lease_expires_at = db.Column(db.DateTime, index=True)  # a running task whose lease lapsed is claimable again
+    result = db.Column(db.Text)  # JSON summary returned by the handler
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id, "kind": self.kind, "payload": json.loads(self.payload),
+            "idempotency_key": self.idempotency_key, "status": self.status, "attempts": self.attempts,
+            "max_attempts": self.max_attempts, "lease_owner": self.lease_owner,
+            "result": json.loads(self.result) if self.result else None, "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Task {self.id} {self.kind} {self.status}>'
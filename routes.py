@@ -1,11 +1,17 @@
 
-from flask import request, jsonify, render_template, redirect, url_for, flash, current_app # Import current_app
+from flask import request, jsonify, render_template, redirect, url_for, flash, current_app, Response # Import current_app
 from app import app, db # Import db
 from models import SearchResult # Import SearchResult model
-from sqlalchemy import desc # For ordering
 import asyncio
 from scraper import run_scraper
+from scrapers.config import MAX_POSTS_PER_REQUEST, MAX_TIME_BUDGET_SECONDS
 import json # Should not be needed if get_result_data handles it.
+from utils import metrics
+from utils.post_search import search_posts, parse_date, DEFAULT_PER_PAGE
+from utils.user_correlation import get_author_index
+from utils.graph_store import NODE_KINDS, find_nodes, graph_view
+from utils.task_queue import enqueue, get_task, queue_stats
+from utils.circuit_breaker import breaker_states
 
 @app.route('/')
 def index():
@@ -27,6 +33,32 @@ def search():
     return render_template('results.html', search_query=search_query,
                            search_type=search_type, platforms=["Facebook"]) # Hardcoded Facebook
 
+def _parse_scrape_options(data):
+    """
+    Per-request collection limits (max_posts, max_scroll_attempts) and time_budget in seconds.
+    Returns (options, None), or (None, name) for the first invalid value.
+    """
+    options = {}
+    for limit_name in ("max_posts", "max_scroll_attempts"):
+        if data.get(limit_name) is None:
+            continue
+        try:
+            limit_value = int(data[limit_name])
+        except (TypeError, ValueError):
+            limit_value = 0
+        if limit_value < 1 or (limit_name == "max_posts" and limit_value > MAX_POSTS_PER_REQUEST):
+            return None, limit_name
+        options[limit_name] = limit_value
+    if data.get("time_budget") is not None:
+        try:
+            time_budget = float(data["time_budget"])
+        except (TypeError, ValueError):
+            time_budget = 0
+        if not 0 < time_budget <= MAX_TIME_BUDGET_SECONDS:
+            return None, "time_budget"
+        options["time_budget"] = time_budget
+    return options, None
+
 @app.route('/api/execute_search', methods=['POST'])
 def execute_search():
     data = request.get_json()
@@ -39,67 +71,49 @@ def execute_search():
         current_app.logger.warning(f"API execute_search validation failed. Query: '{search_query}', Platforms: {selected_platforms}")
         return jsonify({"error": "Invalid input"}), 400
 
-    current_app.logger.debug(f"Calling run_scraper for Query: '{search_query}', Platforms: {selected_platforms}")
-    scraped_results_from_function = asyncio.run(run_scraper(search_query, search_type, selected_platforms))
+    scrape_options, invalid = _parse_scrape_options(data)
+    if invalid:
+        current_app.logger.warning(f"API execute_search rejected {invalid}={data[invalid]!r}")
+        return jsonify({"error": f"Invalid {invalid}"}), 400
 
-    database_results_for_api = []
-    try:
-        with app.app_context(): # Ensure operations are within app context for DB
-            for platform_name in selected_platforms:
-                current_app.logger.debug(f"Querying DB for platform: {platform_name}, query: '{search_query}', type: '{search_type}'")
-                # Query the latest result from the DB for this specific search
-                db_record = db.session.query(SearchResult).filter_by(
-                    search_query=search_query,
-                    search_type=search_type,
-                    platform=platform_name
-                ).order_by(desc(SearchResult.timestamp)).first()
-
-                if db_record:
-                    api_platform_result = {
-                        "platform": db_record.platform,
-                        "query": db_record.search_query,
-                        "search_type": db_record.search_type,
-                        "status": db_record.status,
-                        "timestamp": db_record.timestamp.isoformat() if db_record.timestamp else None,
-                        "data": db_record.get_result_data() # This contains the list of scraped items or error info
-                    }
-                    # Add html and screenshot from the direct scraper output if needed by API consumer,
-                    # these are not in db_record.get_result_data()
-                    # We find the corresponding item in scraped_results_from_function
-                    original_scraper_output_for_platform = next(
-                        (r for r in scraped_results_from_function if r.get("platform") == platform_name), None
-                    )
-                    if original_scraper_output_for_platform:
-                        api_platform_result["html_preview_available"] = "html" in original_scraper_output_for_platform and \
-                                                                      original_scraper_output_for_platform["html"] is not None and \
-                                                                      not original_scraper_output_for_platform["html"].startswith("Error:")
-                        api_platform_result["screenshot_path"] = original_scraper_output_for_platform.get("screenshot")
-                        # If an error occurred, the 'error' field from run_scraper's formatted_results is useful
-                        if 'error' in original_scraper_output_for_platform:
-                             api_platform_result['error_details'] = original_scraper_output_for_platform['error']
-
-
-                    database_results_for_api.append(api_platform_result)
-                else:
-                    # This case should ideally not be hit if run_scraper just ran for this platform,
-                    # unless DB commit failed silently or there's a race condition.
-                    current_app.logger.warning(f"No DB record found after scraping for platform: {platform_name}, query: '{search_query}', type: '{search_type}'")
-                    database_results_for_api.append({
-                        "platform": platform_name,
-                        "query": search_query,
-                        "search_type": search_type,
-                        "status": "error",
-                        "error": "Data not found in database after scraping.",
-                        "data": []
-                    })
-    except Exception as e_db_query:
-        current_app.logger.error(f"Error during database query/formatting in execute_search for query '{search_query}': {e_db_query}", exc_info=True)
-        # Return the direct scraper results if DB query fails, or a generic error
-        # For now, returning a specific error message for the API about this problem
-        return jsonify({"error": f"Failed to retrieve results from database: {str(e_db_query)}"}), 500
+    current_app.logger.debug(f"Calling run_scraper for Query: '{search_query}', Platforms: {selected_platforms}, Options: {scrape_options}")
+    scraped_results_from_function = asyncio.run(run_scraper(search_query, search_type, selected_platforms, **scrape_options))
+
+    # run_scraper returns results from memory and persists them in the background; no DB round trip here.
+    api_results = []
+    for platform_name in selected_platforms:
+        scraper_output = next((r for r in scraped_results_from_function if r.get("platform") == platform_name), None)
+        if scraper_output is None:
+            current_app.logger.warning(f"No scraper result for platform: {platform_name}, query: '{search_query}', type: '{search_type}'")
+            api_results.append({
+                "platform": platform_name,
+                "query": search_query,
+                "search_type": search_type,
+                "status": "error",
+                "error": "No scraper result for this platform.",
+                "data": []
+            })
+            continue
+        # Only what the results page needs: not the raw page HTML, and the posts once (in "data")
+        html = scraper_output.get("html")
+        api_platform_result = {
+            "platform": scraper_output.get("platform", platform_name),
+            "query": search_query,
+            "search_type": search_type,
+            "status": scraper_output.get("status"),
+            "timestamp": scraper_output.get("timestamp"),
+            "data": scraper_output.get("data", []),
+            "status_detail": scraper_output.get("status_detail"),
+            "truncated": bool(scraper_output.get("truncated")),
+            "html_preview_available": html is not None and not html.startswith("Error:"),
+            "screenshot_path": scraper_output.get("screenshot"),
+        }
+        if 'error' in scraper_output:
+            api_platform_result['error_details'] = scraper_output['error']
+        api_results.append(api_platform_result)
 
     current_app.logger.info(f"API execute_search completed for Query: '{search_query}'. Returning result for Facebook.")
-    return jsonify(database_results_for_api[0] if database_results_for_api else {})
+    return jsonify(api_results[0] if api_results else {})
 
 @app.route('/history')
 def search_history():
@@ -109,3 +123,136 @@ def search_history():
     # In the future, this would query SearchResult and display past searches.
     # Create a dummy template templates/search_history.html if you want to render one.
     return "Search History Page - Placeholder" # Or render_template('search_history.html')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint exposing per-stage timings and scrape counters."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/circuits')
+def api_circuits():
+    """Circuit breaker state per platform in this process."""
+    return jsonify(breaker_states())
+
+@app.route('/api/posts/search')
+def api_search_posts():
+    """Ranked full-text search over already collected posts, so analysts don't need to re-scrape."""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"error": "Missing search term 'q'"}), 400
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', DEFAULT_PER_PAGE))
+        min_toxicity = request.args.get('min_toxicity', type=float)
+        max_toxicity = request.args.get('max_toxicity', type=float)
+        date_from = parse_date(request.args.get('date_from'))
+        date_to = parse_date(request.args.get('date_to'))
+    except ValueError as e_params:
+        return jsonify({"error": f"Invalid search parameter: {e_params}"}), 400
+
+    found = search_posts(
+        query, page=page, per_page=per_page,
+        platform=request.args.get('platform'),
+        topic=request.args.get('topic'),
+        min_toxicity=min_toxicity,
+        max_toxicity=max_toxicity,
+        date_from=date_from,
+        date_to=date_to,
+        include_duplicates=request.args.get('include_duplicates', '').lower() in ('1', 'true', 'yes'),
+    )
+    current_app.logger.info(f"Post search for '{query}' matched {found['total']} posts.")
+
+    results = []
+    for post, rank in found["results"]:
+        item = post.to_dict()
+        item.update({
+            "id": post.id,
+            "platform": post.platform,
+            "rank": rank,
+            "topic": post.topic,
+            "toxicity": post.toxicity,
+            "first_seen": post.first_seen.isoformat() if post.first_seen else None,
+        })
+        results.append(item)
+    return jsonify({
+        "query": query,
+        "total": found["total"],
+        "page": found["page"],
+        "per_page": found["per_page"],
+        "results": results,
+    })
+
+@app.route('/api/authors/clusters')
+def api_author_clusters():
+    """Candidate cross-platform identity clusters over stored post authors, strongest first."""
+    try:
+        min_score = request.args.get('min_score', 0.0, type=float)
+        limit = int(request.args.get('limit', 100))
+    except ValueError as e_params:
+        return jsonify({"error": f"Invalid parameter: {e_params}"}), 400
+
+    clusters = [c for c in get_author_index().clusters() if c["score"] >= min_score]
+    return jsonify({"total": len(clusters), "clusters": clusters[:max(0, limit)]})
+
+@app.route('/api/graph')
+def api_graph():
+    """
+    Level-of-detail user/entity/topic graph for interactive rendering: a k-hop
+    neighbourhood of `node` or of nodes matching `q`, optionally scoped to a
+    `topic`/`entity`, otherwise the most central nodes. Overflow is collapsed into clusters.
+    """
+    try:
+        hops = min(int(request.args.get('hops', 1)), 3)
+        max_nodes = max(1, min(int(request.args.get('max_nodes', 500)), 50000))
+        label_budget = max(0, int(request.args.get('labels', 150)))
+        node_id = request.args.get('node', type=int)
+    except ValueError as e_params:
+        return jsonify({"error": f"Invalid parameter: {e_params}"}), 400
+    kinds = [k for k in request.args.getlist('kind') if k in NODE_KINDS] or None
+    term = (request.args.get('q') or '').strip()
+
+    node_ids = None
+    if node_id is not None:
+        node_ids = [node_id]
+    elif term:
+        node_ids = [n.id for n in find_nodes(term, limit=5)]
+    view = graph_view(node_ids, hops=hops, max_nodes=max_nodes, kinds=kinds, label_budget=label_budget,
+                      topic=request.args.get('topic'), entity=request.args.get('entity'))
+    return jsonify(view)
+
+@app.route('/api/tasks', methods=['POST'])
+def api_enqueue_search():
+    """
+    Queue a search for the worker pool (worker.py) instead of scraping in this process.
+    An `idempotency_key` (body or Idempotency-Key header) makes retried submissions return the same task.
+    """
+    data = request.get_json() or {}
+    search_query = data.get('search_query')
+    selected_platforms = data.get('platforms')
+    if not search_query or not selected_platforms:
+        return jsonify({"error": "Invalid input"}), 400
+    options, invalid = _parse_scrape_options(data)
+    if invalid:
+        return jsonify({"error": f"Invalid {invalid}"}), 400
+
+    payload = {"query": search_query, "search_type": data.get('search_type', 'keyword'),
+               "platforms": selected_platforms, "options": options}
+    try:
+        priority = int(data.get('priority', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid priority"}), 400
+    key = data.get('idempotency_key') or request.headers.get('Idempotency-Key')
+    task = enqueue("search", payload, idempotency_key=key, priority=priority)
+    current_app.logger.info(f"Queued search task {task.id} for '{search_query}' on {selected_platforms}")
+    return jsonify(task.to_dict()), 202
+
+@app.route('/api/tasks/<int:task_id>')
+def api_task_status(task_id):
+    task = get_task(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify(task.to_dict())
+
+@app.route('/api/tasks')
+def api_queue_stats():
+    return jsonify(queue_stats())
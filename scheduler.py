@@ -1,15 +1,194 @@
 
+import json
+import os
+import re
 from apscheduler.schedulers.blocking import BlockingScheduler
-from utils.batch_runner import run_batch_from_config
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_EXECUTED
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import timezone
 
-def scheduled_batch_job():
-    print("🕐 Scheduled batch job starting...")
-    run_batch_from_config()
+BATCH_CONFIG = os.environ.get("BATCH_JOBS_FILE", "batch_jobs.json")
+# Concurrent batch jobs; each one drives its own browser.
+SCHEDULER_MAX_WORKERS = int(os.environ.get("SCHEDULER_MAX_WORKERS", "3"))
+# A run that starts more than this late (e.g. after downtime) is skipped instead of fired.
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.environ.get("SCHEDULER_MISFIRE_GRACE_SECONDS", "900"))
+DEFAULT_INTERVAL = {"hours": 6}
+BATCH_JOB_PREFIX = "batch:"
+# "local" runs batch jobs in this process; "queue" hands them to worker.py processes via the task queue.
+SCHEDULER_DISPATCH = os.environ.get("SCHEDULER_DISPATCH", "local")
+BATCH_JOB_FUNCS = {
+    "local": "utils.batch_runner:run_scheduled_job",
+    "queue": "scheduler:enqueue_batch_job",
+}
+
+def job_id_for(job):
+    if job.get("id"):
+        return BATCH_JOB_PREFIX + job["id"]
+    slug = re.sub(r"[^a-z0-9]+", "-", f"{job.get('platform')}-{job.get('query')}".lower()).strip("-")
+    return BATCH_JOB_PREFIX + slug
+
+def load_job_specs(config_file=BATCH_CONFIG):
+    """
+    Read batch_jobs.json. Each job may set "interval" (e.g. {"minutes": 15}) or
+    "cron" (e.g. {"hour": "6"}); jobs with neither run every 6 hours. Interval
+    jobs start at that interval and then adapt to their new-post rate.
+    """
+    with open(config_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    specs = []
+    for job in jobs:
+        job = dict(job, id=job_id_for(job))
+        if "cron" in job:
+            trigger, trigger_args = "cron", job["cron"]
+        else:
+            trigger, trigger_args = "interval", job.get("interval", DEFAULT_INTERVAL)
+        specs.append((job, trigger, trigger_args))
+    return specs
+
+def refresh_dashboard_store():
+    # Snapshot the DB into the dashboard's Parquet store so Streamlit never scans the DB or CSVs.
+    from app import app
+    from utils.columnar_store import build_store_from_db
+
+    with app.app_context():
+        count = build_store_from_db()
+    print(f"🗂 Dashboard store rebuilt ({count} posts)")
+
+def scheduled_graph_refresh():
+    # Degree, centrality and layouts are precomputed here so graph views only read them.
+    from app import app
+    from utils.graph_store import refresh_graph
+
+    with app.app_context():
+        ingested = refresh_graph()
+    print(f"🕸 Graph refreshed ({ingested} backfilled posts)")
+
+def scheduled_archive_maintenance():
+    from utils.archive_catalog import compact_archives, apply_retention
+
+    compacted = compact_archives()
+    deleted = apply_retention()
+    print(f"🗄 Archive maintenance: {compacted} compacted, {deleted} removed by retention")
+
+def scheduled_task_cleanup():
+    from app import app
+    from utils.task_queue import purge_finished
+
+    with app.app_context():
+        deleted = purge_finished()
+    print(f"🧹 Removed {deleted} finished queue tasks")
+
+def enqueue_batch_job(job):
+    """
+    Queue-mode entry point: queue the batch job for a worker instead of running it here.
+    The idempotency key is per minute, so a second scheduler firing the same slot adds nothing.
+    """
+    from datetime import datetime
+    from app import app
+    from utils.task_queue import enqueue
+
+    with app.app_context():
+        task = enqueue("batch", job, idempotency_key=f"{job['id']}@{datetime.utcnow():%Y%m%dT%H%M}")
+        print(f"📨 Queued {job['id']} as task {task.id}")
+
+MAINTENANCE_JOBS = [
+    ("maintenance:dashboard-store", "scheduler:refresh_dashboard_store", {"hours": 1}),
+    ("maintenance:graph", "scheduler:scheduled_graph_refresh", {"minutes": 30}),
+    ("maintenance:archives", "scheduler:scheduled_archive_maintenance", {"days": 1}),
+    ("maintenance:tasks", "scheduler:scheduled_task_cleanup", {"days": 1}),
+]
+
+def record_skipped_run(event):
+    """Missed (too late) and overlapping (max_instances) runs are kept in the run history too."""
+    if not event.job_id.startswith(BATCH_JOB_PREFIX):
+        return
+    from app import app, db
+    from models import JobRun
+
+    if event.code == EVENT_JOB_MISSED:
+        status, run_times = "missed", [event.scheduled_run_time]
+    else:
+        status, run_times = "skipped", event.scheduled_run_times
+    with app.app_context():
+        for run_time in run_times:
+            print(f"⏭ {event.job_id} {status} (scheduled {run_time})")
+            db.session.add(JobRun(job_id=event.job_id, status=status, result_count=0, new_post_count=0,
+                                  started_at=run_time.astimezone(timezone.utc).replace(tzinfo=None)))
+        db.session.commit()
+
+def adapt_job_interval(scheduler, event):
+    """
+    After a batch run, move an interval job's cadence towards its observed new-post
+    rate (see utils.recrawl). Cron jobs and jobs with "adaptive": false keep their schedule.
+    """
+    if not event.job_id.startswith(BATCH_JOB_PREFIX):
+        return
+    job = scheduler.get_job(event.job_id)
+    if job is None or not isinstance(job.trigger, IntervalTrigger) or not job.kwargs["job"].get("adaptive", True):
+        return
+    from app import app
+    from utils.recrawl import next_interval
+
+    current = int(job.trigger.interval.total_seconds())
+    with app.app_context():
+        recommended = next_interval(job.kwargs["job"], current)
+    if abs(recommended - current) >= current * 0.1:
+        scheduler.reschedule_job(job.id, trigger="interval", seconds=recommended)
+        print(f"⏱ {job.id}: interval {current // 60} → {recommended // 60} min")
+
+def build_scheduler(scheduler_class=BlockingScheduler, config_file=BATCH_CONFIG):
+    """
+    Scheduler with jobs persisted in the app database, so schedules and next run
+    times survive restarts. Batch jobs are synced from the config on every start:
+    new jobs are added, changed ones rescheduled and removed ones deleted.
+    """
+    from app import app, db
+
+    with app.app_context():
+        engine = db.engine
+    jobstore = SQLAlchemyJobStore(engine=engine, tablename="apscheduler_jobs")
+    scheduler = scheduler_class(
+        jobstores={"default": jobstore},
+        executors={"default": ThreadPoolExecutor(SCHEDULER_MAX_WORKERS)},
+        job_defaults={
+            "coalesce": True,  # after downtime, run a late job once rather than once per missed slot
+            "max_instances": 1,  # a run that overruns never overlaps with the next run of the same job
+            "misfire_grace_time": SCHEDULER_MISFIRE_GRACE_SECONDS,
+        },
+    )
+    scheduler.add_listener(record_skipped_run, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+    scheduler.add_listener(lambda event: adapt_job_interval(scheduler, event), EVENT_JOB_EXECUTED)
+
+    # Read the persisted jobs before starting, so unchanged jobs keep their next run time across restarts.
+    jobstore.start(scheduler, "default")
+    batch_func = BATCH_JOB_FUNCS[SCHEDULER_DISPATCH]
+    wanted = set()
+    for job, trigger, trigger_args in load_job_specs(config_file):
+        wanted.add(job["id"])
+        stored = jobstore.lookup_job(job["id"])
+        if stored is not None and stored.kwargs.get("job") == job and stored.func_ref == batch_func:
+            continue
+        # Jobs are referenced by import path so the persistent store can reload them.
+        scheduler.add_job(batch_func, trigger, kwargs={"job": job}, id=job["id"],
+                          name=f"{job.get('platform')} → {job.get('query')}", replace_existing=True, **trigger_args)
+    for job_id, func, interval in MAINTENANCE_JOBS:
+        if jobstore.lookup_job(job_id) is None:
+            scheduler.add_job(func, "interval", id=job_id, **interval)
+
+    # Batch jobs deleted from the config would otherwise keep running from the persistent store.
+    for stored in jobstore.get_all_jobs():
+        if stored.id.startswith(BATCH_JOB_PREFIX) and stored.id not in wanted:
+            jobstore.remove_job(stored.id)
+            print(f"🗑 Removed job no longer in the config: {stored.id}")
+    return scheduler
 
 if __name__ == "__main__":
-    scheduler = BlockingScheduler()
-    scheduler.add_job(scheduled_batch_job, "interval", hours=6)  # Every 6 hours
-    print("📅 Scheduler started — running every 6 hours.")
+    scheduler = build_scheduler()
+    for job in scheduler.get_jobs():
+        print(f"📅 {job.id}: {job.trigger}")
+    print(f"📅 Scheduler started with {SCHEDULER_MAX_WORKERS} workers ({SCHEDULER_DISPATCH} dispatch).")
     try:
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
@@ -9,20 +9,32 @@ PLATFORM_SCRAPERS = {
 
 # USER_DATA_DIR is now defined in scrapers.config
 # from scrapers.config import USER_DATA_DIR # Not directly used in this file anymore if scrapers handle it
+from datetime import datetime
 from app import db
 from models import SearchResult
+from utils import metrics, write_behind
+from utils.dedup import index_posts, new_post_items
+from utils.post import to_dicts
+from utils.user_correlation import update_author_index
 # import json # Not strictly needed if SearchResult.set_result_data handles it
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def run_scraper(search_query: str, search_type: str, platforms: list):
-    logger.info(f"run_scraper called. Query: '{search_query}', Type: '{search_type}', Platforms: {platforms}")
+async def run_scraper(search_query: str, search_type: str, platforms: list, **scrape_options):
+    """
+    Runs the scraper for each platform concurrently and returns the results from memory.
+    A SearchResult per platform (with its posts indexed) is persisted by the write-behind
+    writer, so the event loop never waits on the database.
+    scrape_options (e.g. max_posts, max_scroll_attempts, time_budget) are passed through to every
+    scraper; a scraper whose time budget ran out returns partial results with "truncated" set.
+    """
+    logger.info(f"run_scraper called. Query: '{search_query}', Type: '{search_type}', Platforms: {platforms}, Options: {scrape_options}")
     tasks = []
     for platform in platforms:
         scraper_func = PLATFORM_SCRAPERS.get(platform)
         if scraper_func:
-            tasks.append(scraper_func(search_query, search_type))
+            tasks.append(scraper_func(search_query, search_type, **scrape_options))
         else:
             logger.warning(f"No scraper implemented for {platform}")
             # Optionally add a placeholder result for unhandled platforms if needed by frontend
@@ -34,16 +46,20 @@ async def run_scraper(search_query: str, search_type: str, platforms: list):
 
     formatted_results_for_api = []
     db_results_to_add = []
+    timestamp = datetime.utcnow()
 
     for platform_name, scraper_output_or_exception in zip(platforms, results_from_gather):
         search_result_instance = SearchResult(
             search_type=search_type,
             search_query=search_query,
-            platform=platform_name
+            platform=platform_name,
+            timestamp=timestamp
         )
+        items_to_index = []
 
         if isinstance(scraper_output_or_exception, Exception):
             logger.error(f"Scraper for {platform_name} failed with exception: {scraper_output_or_exception}", exc_info=True)
+            metrics.inc("osint_scrape_failures_total", platform=platform_name.lower())
             search_result_instance.status = "error"
             error_detail_for_db = {
                 "error_message": str(scraper_output_or_exception),
@@ -57,9 +73,12 @@ async def run_scraper(search_query: str, search_type: str, platforms: list):
                 "query": search_query,
                 "search_type": search_type,
                 "status": "error",
+                "timestamp": timestamp.isoformat(),
+                "data": error_detail_for_db,
                 "error": str(scraper_output_or_exception), # For direct API error field
                 "results": [],
                 "status_detail": error_detail_for_db.get("details"), # from the above
+                "truncated": False,
                 "html": None, # No HTML if scraper crashed early
                 "screenshot": None # No screenshot if scraper crashed early
             })
@@ -78,7 +97,9 @@ async def run_scraper(search_query: str, search_type: str, platforms: list):
             if not actual_scraped_items:
                 # If status_detail indicates a specific reason like "Login required", use that for status.
                 # This requires scrapers to return informative status_detail.
-                if "login required" in status_detail.lower() or "login wall" in status_detail.lower():
+                if scraped_data_dict.get("circuit_open"):
+                    search_result_instance.status = "circuit_open"
+                elif "login required" in status_detail.lower() or "login wall" in status_detail.lower():
                     search_result_instance.status = "login_required"
                 else:
                     search_result_instance.status = "no_results_found"
@@ -89,17 +110,22 @@ async def run_scraper(search_query: str, search_type: str, platforms: list):
                 })
             else:
                 search_result_instance.status = "success"
-                search_result_instance.set_result_data(actual_scraped_items) # Store only the list of items
+                # Posts are stored once in CollectedPost and linked (by the writer), rather than embedded in result_data
+                items_to_index = actual_scraped_items
 
-            # Add to formatted_results_for_api (this is what API route gets)
+            # Add to formatted_results_for_api (this is what API route gets); Posts go out as plain dicts for jsonify
+            api_items = to_dicts(actual_scraped_items)
             # Ensure it includes all necessary fields for the API from scraped_data_dict
             api_result_for_platform = {
                 "platform": search_result_instance.platform,
                 "query": search_query,
                 "search_type": search_type,
                 "status": search_result_instance.status, # Use the status determined for DB
+                "timestamp": timestamp.isoformat(),
+                "data": api_items or search_result_instance.get_result_data(), # what the stored row will return
                 "status_detail": status_detail,
-                "results": actual_scraped_items,
+                "results": api_items,
+                "truncated": bool(scraped_data_dict.get("truncated")),
                 "html": scraped_data_dict.get("html"),
                 "screenshot": scraped_data_dict.get("screenshot"),
                 "notes": scraped_data_dict.get("notes") # Keep notes if provided
@@ -109,18 +135,31 @@ async def run_scraper(search_query: str, search_type: str, platforms: list):
 
             formatted_results_for_api.append(api_result_for_platform)
 
-        db_results_to_add.append(search_result_instance)
+        db_results_to_add.append((search_result_instance.platform, search_result_instance.status,
+                                  search_result_instance.result_data, items_to_index))
 
     if db_results_to_add:
-        try:
-            logger.debug(f"Attempting to add {len(db_results_to_add)} SearchResult objects to DB session.")
-            db.session.add_all(db_results_to_add)
-            db.session.commit()
-            logger.info("Successfully committed search results to database.")
-        except Exception as e_db:
-            logger.error(f"Database commit failed: {e_db}", exc_info=True)
-            db.session.rollback()
-            # Note: formatted_results_for_api still contains the scraped data even if DB commit fails.
-            # The API will return data, but it won't be persisted. This might be desired.
+        logger.debug(f"Queueing {len(db_results_to_add)} SearchResult records for the write-behind writer.")
+        write_behind.submit(lambda: _store_search_results(search_query, search_type, timestamp, db_results_to_add),
+                            name=f"search results for '{search_query}'")
 
     return formatted_results_for_api
+
+def _store_search_results(search_query, search_type, timestamp, records):
+    """
+    Write-behind job: add a SearchResult per platform and index its posts (the writer commits).
+    Returns the author index update, which the writer runs only after the commit succeeds.
+    """
+    new_authors = []
+    for platform, status, result_data, items in records:
+        search_result = SearchResult(search_type=search_type, search_query=search_query, platform=platform,
+                                     status=status, result_data=result_data, timestamp=timestamp)
+        db.session.add(search_result)
+        if items:
+            indexed = index_posts(search_result, items, platform, update_authors=False)
+            new_authors.append((platform.lower(), new_post_items(indexed)))
+
+    def update_authors():
+        for platform, new_items in new_authors:
+            update_author_index(platform, new_items)
+    return update_authors
@@ -17,6 +17,43 @@ if USER_DATA_DIR == DEFAULT_USER_DATA_DIR and not os.getenv(USER_DATA_DIR_ENV_VA
 else:
     logger.info(f"Using Chrome user data directory from {USER_DATA_DIR_ENV_VAR}: {USER_DATA_DIR}")
 
+# Pool of logged-in sessions leased per scrape (see scrapers/profile_pool.py). Chromium locks a
+# persistent profile to one browser, so concurrent scrapes each need their own.
+# Both lists are os.pathsep-separated (":" on Linux/macOS, ";" on Windows).
+# Playwright storage_state JSON snapshots exported from logged-in profiles; each is loaded into a
+# cheap non-persistent context.
+BROWSER_STORAGE_STATES = [p for p in os.environ.get("BROWSER_STORAGE_STATES", "").split(os.pathsep) if p]
+# Persistent profile directories; defaults to USER_DATA_DIR unless only storage states are configured.
+CHROME_USER_DATA_DIRS = [p for p in os.environ.get("CHROME_USER_DATA_DIRS", "").split(os.pathsep) if p]
+if not CHROME_USER_DATA_DIRS and (os.getenv(USER_DATA_DIR_ENV_VAR) or not BROWSER_STORAGE_STATES):
+    CHROME_USER_DATA_DIRS = [USER_DATA_DIR]
+# How long a scrape waits for a free profile, and how long a profile that hit a login wall is rested.
+PROFILE_LEASE_TIMEOUT_SECONDS = int(os.environ.get("PROFILE_LEASE_TIMEOUT_SECONDS", "300"))
+PROFILE_UNHEALTHY_COOLDOWN_MINUTES = int(os.environ.get("PROFILE_UNHEALTHY_COOLDOWN_MINUTES", "60"))
+
+
+# Base URL for Facebook navigation. Overridable so the offline replay benchmark
+# (benchmarks/replay_bench.py) can point scrapers at a local fixture server.
+FACEBOOK_BASE_URL = os.environ.get("FACEBOOK_BASE_URL", "https://www.facebook.com").rstrip("/")
+
+# Default collection limits for the Facebook scraper; callers can override them per request.
+FACEBOOK_MAX_POSTS = int(os.environ.get("FACEBOOK_MAX_POSTS", "15"))
+FACEBOOK_MAX_SCROLL_ATTEMPTS = int(os.environ.get("FACEBOOK_MAX_SCROLL_ATTEMPTS", "12"))
+# How long the pre-flight check waits for the search page to show posts, a login form or a
+# "no results" message. Pages it cannot classify in time get the slower feed wait below.
+FACEBOOK_PREFLIGHT_TIMEOUT_MS = int(os.environ.get("FACEBOOK_PREFLIGHT_TIMEOUT_MS", "1500"))
+# Unclassified pages: wait up to FACEBOOK_FEED_TIMEOUT_MS for posts or network idle, then up to
+# FACEBOOK_FEED_SETTLE_MS more for posts after idle, before the page may be reported as empty.
+FACEBOOK_FEED_TIMEOUT_MS = int(os.environ.get("FACEBOOK_FEED_TIMEOUT_MS", "30000"))
+FACEBOOK_FEED_SETTLE_MS = int(os.environ.get("FACEBOOK_FEED_SETTLE_MS", "5000"))
+# Upper bound accepted from API requests, so a single search cannot ask for an unbounded crawl.
+MAX_POSTS_PER_REQUEST = int(os.environ.get("MAX_POSTS_PER_REQUEST", "5000"))
+# Page load limit for the search page when the request has no (or a longer) time budget.
+FACEBOOK_NAVIGATION_TIMEOUT_MS = int(os.environ.get("FACEBOOK_NAVIGATION_TIMEOUT_MS", "35000"))
+# Largest time_budget (seconds) a request may ask for; requests without one run until their post/scroll limits.
+MAX_TIME_BUDGET_SECONDS = float(os.environ.get("MAX_TIME_BUDGET_SECONDS", "1800"))
+# Part of a time budget kept for wrapping up (page HTML, screenshot, closing the browser).
+DEADLINE_RESERVE_MS = int(os.environ.get("DEADLINE_RESERVE_MS", "2000"))
 
 # Define a common user agent to be used by all scrapers
 COMMON_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36"
@@ -0,0 +1,47 @@
+import math
+import time
+
+from scrapers.config import DEADLINE_RESERVE_MS
+
+
+class DeadlineExceeded(TimeoutError):
+    """A scrape step could not start or finish within the request's time budget."""
+
+
+class Deadline:
+    """
+    The time budget of one scrape request. Without a budget it never expires and
+    every wait keeps its default length; with one, waits and timeouts are shortened
+    so the scrape stops collecting about `reserve_ms` before the budget runs out,
+    leaving that time to return what it has.
+    """
+
+    def __init__(self, budget_seconds=None, reserve_ms=DEADLINE_RESERVE_MS, clock=time.monotonic):
+        self.budget = budget_seconds
+        self.clock = clock
+        if budget_seconds is None:
+            self._stop_at = math.inf
+        else:
+            # Short budgets keep at most half of themselves in reserve.
+            self._stop_at = clock() + budget_seconds - min(reserve_ms / 1000, budget_seconds / 2)
+
+    def remaining(self):
+        """Seconds left for collecting (inf without a budget)."""
+        return max(0.0, self._stop_at - self.clock())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def seconds(self, default):
+        """`default` seconds, cut to what is left of the budget."""
+        return min(default, self.remaining())
+
+    def timeout_ms(self, default_ms):
+        """A Playwright timeout: `default_ms`, cut to the budget. Raises DeadlineExceeded if none is left."""
+        if self.expired():
+            raise DeadlineExceeded(f"Time budget of {self.budget}s exhausted")
+        return max(1, int(min(default_ms, self.remaining() * 1000)))
+
+    def wait_ms(self, default_ms):
+        """A pause of `default_ms`, cut to the budget (0 once it has run out)."""
+        return int(min(default_ms, self.remaining() * 1000))
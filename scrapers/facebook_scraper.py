@@ -1,121 +1,340 @@
 import asyncio
-from playwright.async_api import async_playwright
+import inspect
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import re
-from scrapers.config import USER_DATA_DIR, COMMON_USER_AGENT, HEADLESS_MODE
+from scrapers.config import (
+    COMMON_USER_AGENT, FACEBOOK_BASE_URL,
+    FACEBOOK_MAX_POSTS, FACEBOOK_MAX_SCROLL_ATTEMPTS, FACEBOOK_PREFLIGHT_TIMEOUT_MS,
+    FACEBOOK_NAVIGATION_TIMEOUT_MS, PROFILE_LEASE_TIMEOUT_SECONDS, FACEBOOK_FEED_TIMEOUT_MS, FACEBOOK_FEED_SETTLE_MS,
+)
+from scrapers.deadline import Deadline, DeadlineExceeded
+from scrapers.profile_pool import get_profile_pool, open_context, close_context, ProfilePoolExhausted
+from utils import metrics
+from utils.circuit_breaker import get_breaker
+from utils.screenshots import capture_page
+from utils.post import Post
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def scrape_facebook(query: str, search_type: str): # search_type is retained for interface consistency
+POST_SELECTOR = 'div[role="article"]' # Simplified a bit, will rely on inner content checks
+UNSEEN_POST_SELECTOR = f'{POST_SELECTOR}:not([data-osint-seen])'
+
+_MARK_SEEN_JS = "el => el.setAttribute('data-osint-seen', '1')"
+
+CLOSE_BUTTON_SELECTORS = [
+    'div[aria-label="Close dialog"]', 'div[aria-label="Close"]',
+    'button[aria-label="Close"]', 'i[aria-label="Close"]',
+    'button[aria-label="Not now"]', 'a[aria-label="Close"]',
+    'div[aria-label*="cookie i"] button[value="1"]',
+    'button[data-testid="cookie-policy-manage-dialog-accept-button"]'
+]
+LOGIN_SELECTORS = 'input[name="email"], input#email, form[action*="login"], div[id="loginform"]'
+
+# Pre-flight classifier, polled right after domcontentloaded until the page is recognisable:
+# feed articles, a visible login form on a login/checkpoint URL, or a "no results" message.
+# Resolves to {"state", "overlay"}; overlay says whether any dialog or close button is present at all.
+# Hidden login markup on other pages (Facebook keeps some in results pages) is not a login wall.
+_PREFLIGHT_JS = """([loginSelectors, closeSelectors]) => {
+    const path = location.pathname.toLowerCase();
+    const overlay = !!document.querySelector('div[role="dialog"]') || closeSelectors.some(s => document.querySelector(s));
+    if (document.querySelector('div[role="article"]')) return {state: 'results', overlay};
+    const visible = el => el.offsetParent !== null || el.getClientRects().length > 0;
+    const loginForm = Array.from(document.querySelectorAll(loginSelectors)).some(visible);
+    if (loginForm && path.startsWith('/checkpoint')) return {state: 'checkpoint', overlay};
+    if (loginForm && path.startsWith('/login')) return {state: 'login', overlay};
+    const main = document.querySelector('[role="main"]') || document.body;
+    if (main && /No posts found|No results available|End of results/i.test(main.textContent || '')) return {state: 'no_results', overlay};
+    return null;
+}"""
+
+_HAS_OVERLAY_JS = """(closeSelectors) =>
+    !!document.querySelector('div[role="dialog"]') || closeSelectors.some(s => document.querySelector(s))"""
+
+# Empties collected articles but pins their height, so the scroll position and
+# Facebook's infinite-load trigger behave as if the content were still there.
+_PRUNE_SEEN_POSTS_JS = """() => {
+    const nodes = document.querySelectorAll('div[role="article"][data-osint-seen="1"]');
+    nodes.forEach(el => {
+        el.style.height = el.offsetHeight + 'px';
+        el.replaceChildren();
+        el.setAttribute('data-osint-seen', 'pruned');
+    });
+    return nodes.length;
+}"""
+
+
+async def _dispose_quietly(handle):
+    try:
+        await handle.dispose()
+    except Exception:
+        pass
+
+
+async def preflight(page, timeout_ms=FACEBOOK_PREFLIGHT_TIMEOUT_MS):
     """
-    Attempts to scrape Facebook posts based on a query using a persistent browser context.
-    Assumes the user is logged in via the persistent context.
+    Classify a freshly loaded page as "results", "login", "checkpoint", "no_results" or
+    "unknown" (nothing recognisable within timeout_ms). Returns (state, overlay_present).
+    """
+    try:
+        handle = await page.wait_for_function(_PREFLIGHT_JS, arg=[LOGIN_SELECTORS, CLOSE_BUTTON_SELECTORS],
+                                              timeout=timeout_ms, polling=200)
+        verdict = await handle.json_value()
+        await _dispose_quietly(handle)
+        return verdict["state"], verdict["overlay"]
+    except Exception as e:
+        logger.debug(f"Pre-flight could not classify the page: {e}")
+        try:
+            return "unknown", await page.evaluate(_HAS_OVERLAY_JS, CLOSE_BUTTON_SELECTORS)
+        except Exception:
+            return "unknown", False
+
+
+async def wait_for_feed(page, timeout_ms=FACEBOOK_FEED_TIMEOUT_MS, settle_ms=FACEBOOK_FEED_SETTLE_MS):
+    """
+    For a page pre-flight could not classify: wait until posts render or the network goes
+    idle (at most timeout_ms), then up to settle_ms more for posts after idle, so a slowly
+    rendering search page is not reported as empty. Returns True if posts are present.
+    """
+    article = asyncio.ensure_future(page.wait_for_selector(POST_SELECTOR, state="attached", timeout=timeout_ms))
+    idle = asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=timeout_ms))
+    try:
+        await asyncio.wait({article, idle}, return_when=asyncio.FIRST_COMPLETED)
+        if not article.done() and settle_ms > 0:
+            await asyncio.wait({article}, timeout=settle_ms / 1000)
+        found = article.done() and not article.cancelled() and article.exception() is None
+    finally:
+        for waiter in (article, idle):
+            if not waiter.done():
+                waiter.cancel()
+        # Retrieve timeouts/cancellations so they are not reported as unhandled
+        await asyncio.gather(article, idle, return_exceptions=True)
+    logger.debug(f"Feed wait on unclassified page: posts {'found' if found else 'not found'}")
+    return found
+
+
+async def _close_popups(page, rounds=3, click_timeout=1000, settle_ms=1500):
+    """Click away overlays and cookie dialogs; returns quickly when none is present."""
+    for _ in range(rounds):
+        if not await page.evaluate(_HAS_OVERLAY_JS, CLOSE_BUTTON_SELECTORS):
+            return
+        popup_closed_this_iteration = False
+        for selector in CLOSE_BUTTON_SELECTORS:
+            try:
+                buttons = await page.locator(selector).all()
+                for close_btn in reversed(buttons):
+                    if await close_btn.is_visible() and await close_btn.is_enabled():
+                        logger.info(f"Found potential overlay/cookie close button: {selector}. Clicking.")
+                        await close_btn.click(timeout=click_timeout, force=True)
+                        await page.wait_for_timeout(settle_ms)
+                        popup_closed_this_iteration = True
+                        break
+                if popup_closed_this_iteration: break
+            except Exception as e_popup:
+                logger.debug(f"Popup handler: Selector '{selector}' not found or error: {e_popup}")
+        if not popup_closed_this_iteration: break
+
+
+async def _extract_post(post_el, seen_post_urls):
+    """
+    Extracts one article element into a Post.
+    Returns None if the post URL was already collected. Every element handle
+    queried here is disposed before returning so the page does not pin them.
+    """
+    post_data = Post(platform="facebook", text="N/A", author_name="N/A", author_url="N/A", timestamp="N/A", post_url="N/A", media_urls=[])
+    handles = []
+    try:
+        # Post URL & Timestamp
+        time_link_el = await post_el.query_selector('a span[role="tooltip"] > span, a span[data-tooltip-content][aria-live="polite"], a[href*="/permalink/"], a[href*="/story.php"], a[href*="/watch/"], a[href*="/photo"], a[href*="/photos/"], a[href*="/videos/"]')
+        if time_link_el:
+            handles.append(time_link_el)
+            current_post_url = await time_link_el.get_attribute('href')
+            if current_post_url and not current_post_url.startswith("http"):
+                current_post_url = FACEBOOK_BASE_URL + current_post_url
+            post_data["post_url"] = current_post_url
+
+            # Timestamp often from the link's text content or a sibling/child time/abbr
+            ts_text = await time_link_el.inner_text()
+            if re.search(r'\d', ts_text): # If text itself contains numbers (likely a date)
+                 post_data["timestamp"] = ts_text.strip()
+            else: # Try to find a dedicated time element
+                ts_el_alt = await post_el.query_selector('time[datetime], abbr[title]')
+                if ts_el_alt:
+                    handles.append(ts_el_alt)
+                    post_data["timestamp"] = await ts_el_alt.get_attribute('datetime') or await ts_el_alt.get_attribute('title')
+
+            if current_post_url and current_post_url in seen_post_urls:
+                return None
+
+        # Author Name & URL (often a link with strong text, or specific aria-label)
+        author_el = await post_el.query_selector('h2 a[href], h3 a[href], strong > a[href], a[aria-label*="Creator"], a[role="link"]:has(img[alt])') # Last one targets profile pics with links
+        if author_el:
+            handles.append(author_el)
+            post_data["author_name"] = (await author_el.inner_text()).strip()
+            if not post_data["author_name"]: # If inner_text is empty (e.g. only an image was in 'a')
+                aria_label = await author_el.get_attribute("aria-label")
+                if aria_label: post_data["author_name"] = aria_label.split(",")[0].strip() # Take first part of aria-label
+
+            post_data["author_url"] = await author_el.get_attribute('href')
+            if post_data["author_url"] and not post_data["author_url"].startswith("http"):
+                 post_data["author_url"] = FACEBOOK_BASE_URL + post_data["author_url"]
+
+        # Post Text
+        text_elements = await post_el.query_selector_all('div[data-ad-preview="message"], div[data-ft] div[dir="auto"], div[data-testid="post_message"] div[dir="auto"]')
+        handles.extend(text_elements)
+        text_content_list = [await el.inner_text() for el in text_elements]
+        post_data["text"] = "\n".join(text_content_list).strip() if text_content_list else "N/A"
+
+        # Media
+        image_elements = await post_el.query_selector_all('img[src^="https://scontent."]:not([style*="height: 12px"]):not([style*="height: 16px"]):not([style*="height: 20px"])') # Exclude tiny icons
+        handles.extend(image_elements)
+        for img_el in image_elements:
+            src = await img_el.get_attribute('src')
+            if src: post_data["media_urls"].append(src)
+
+        video_elements = await post_el.query_selector_all('video')
+        handles.extend(video_elements)
+        if video_elements: post_data["media_urls"].append("Video content present")
+
+        return post_data
+    finally:
+        for handle in handles:
+            await _dispose_quietly(handle)
+
+async def scrape_facebook(query: str, search_type: str, max_posts: int = None, max_scroll_attempts: int = None,
+                          sink=None, prune_dom: bool = None, time_budget: float = None): # search_type is retained for interface consistency
+    """
+    Attempts to scrape Facebook posts based on a query using a browser profile leased from
+    the profile pool (scrapers/profile_pool.py), so several scrapes can run at once.
+    Assumes the pooled profiles are logged in; one that hits a login wall is rotated out.
     Focuses on the 'posts' search tab. This scraper is highly sensitive to UI changes.
+
+    max_posts / max_scroll_attempts default to FACEBOOK_MAX_POSTS / FACEBOOK_MAX_SCROLL_ATTEMPTS.
+    Streaming mode: pass `sink` (a sync or async callable) and each post is handed to it as soon
+    as it is extracted instead of being kept in "results". Collected article nodes are then
+    emptied from the feed DOM (prune_dom, on by default when streaming) so Chromium memory stays
+    flat on deep collections.
+
+    time_budget (seconds) bounds the whole scrape: navigation, waits and the scroll loop are
+    cut to fit, and when it runs out the posts collected so far are returned with "truncated".
     """
+    max_posts = max_posts or FACEBOOK_MAX_POSTS
+    max_scroll_attempts = max_scroll_attempts or FACEBOOK_MAX_SCROLL_ATTEMPTS
+    if prune_dom is None:
+        prune_dom = sink is not None
+
     results = []
+    collected_posts_count = 0
     html_content = "Error: Playwright page content not captured."
     status_detail = "Scraping process started."
-    screenshot_path = f"facebook_search_posts_{query.replace(' ','_')}.png"
+    screenshot_path = None # Set when the screenshot policy (utils/screenshots.py) takes one
+    deadline = Deadline(time_budget)
+    truncated = False # Set when the time budget ended collection early
 
     logger.info(f"Starting Facebook scraper for query: '{query}', search_type: '{search_type}' (targeting posts)")
 
-    if not os.path.exists(USER_DATA_DIR):
-        logger.info(f"Creating USER_DATA_DIR for Facebook at {USER_DATA_DIR}")
-        os.makedirs(USER_DATA_DIR, exist_ok=True)
-    # else:
-    #     logger.debug(f"USER_DATA_DIR {USER_DATA_DIR} already exists.")
-
+    breaker = get_breaker("facebook")
+    if not breaker.allow():
+        status_detail = breaker.status_detail()
+        logger.warning(f"Facebook scrape for '{query}' short-circuited. {status_detail}")
+        return {
+            "platform": "facebook", "query": query, "search_type": "posts", "results": [],
+            "collected_count": 0, "streamed": sink is not None, "html": None, "screenshot": None,
+            "profile": None, "circuit_open": True, "truncated": False, "status_detail": status_detail,
+        }
+
+    pool = get_profile_pool()
+    failure = None # Reason this scrape counts against the platform's circuit breaker
+    inconclusive = False # No profile, or out of time before the page answered: neither success nor failure
     async with async_playwright() as p:
+        profile = None
+        browser = None
         context = None # Initialize for robust finally block
         page = None # Initialize for robust finally block
+        login_wall = False
         try:
-            context = await p.chromium.launch_persistent_context(
-                USER_DATA_DIR,
-                headless=HEADLESS_MODE,
-                user_agent=COMMON_USER_AGENT,
-                accept_downloads=True,
-                ignore_https_errors=True,
-                bypass_csp=True,
-                java_script_enabled=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage', '--disable-gpu'],
-                viewport={'width': 1280, 'height': 900}
-            )
-            page = await context.new_page()
-
-            url = f"https://www.facebook.com/search/posts/?q={query}"
+            profile = await pool.acquire(timeout=deadline.seconds(PROFILE_LEASE_TIMEOUT_SECONDS))
+            with metrics.span("browser_launch", platform="facebook"):
+                browser, context = await open_context(
+                    p, profile,
+                    user_agent=COMMON_USER_AGENT,
+                    accept_downloads=True,
+                    ignore_https_errors=True,
+                    bypass_csp=True,
+                    java_script_enabled=True,
+                    viewport={'width': 1280, 'height': 900}
+                )
+                page = await context.new_page()
+
+            url = f"{FACEBOOK_BASE_URL}/search/posts/?q={query}"
             logger.debug(f"Navigating to Facebook URL: {url}")
 
-            await page.goto(url, wait_until="networkidle", timeout=35000)
-            await page.wait_for_timeout(5000)
-
-            logger.debug("Attempting to handle initial pop-ups/overlays.")
-            close_button_selectors = [
-                'div[aria-label="Close dialog"]', 'div[aria-label="Close"]',
-                'button[aria-label="Close"]', 'i[aria-label="Close"]',
-                'button[aria-label="Not now"]', 'a[aria-label="Close"]',
-                'div[aria-label*="cookie i"] button[value="1"]',
-                'button[data-testid="cookie-policy-manage-dialog-accept-button"]'
-            ]
-            for _ in range(3):
-                popup_closed_this_iteration = False
-                for selector in close_button_selectors:
-                    try:
-                        buttons = await page.locator(selector).all()
-                        for close_btn in reversed(buttons):
-                            if await close_btn.is_visible(timeout=500) and await close_btn.is_enabled(timeout=500):
-                                logger.info(f"Found potential overlay/cookie close button: {selector}. Clicking.")
-                                await close_btn.click(timeout=1000, force=True) # Added force=True
-                                await page.wait_for_timeout(1500)
-                                popup_closed_this_iteration = True
-                                break
-                        if popup_closed_this_iteration: break
-                    except Exception as e_popup:
-                        logger.debug(f"Popup handler: Selector '{selector}' not found or error: {e_popup}")
-                if not popup_closed_this_iteration: break
-
-            login_selectors = 'input[name="email"], input#email, form[action*="login"], div[id="loginform"]'
-            is_on_login_page = False
-            try:
-                if await page.locator(login_selectors).first.is_visible(timeout=3000):
-                    is_on_login_page = True
-            except Exception:
-                is_on_login_page = False
-
-            if is_on_login_page and ("facebook.com/login" in page.url.lower() or "facebook.com/checkpoint" in page.url.lower()):
-                logger.warning("Facebook login page or checkpoint detected. Persistent context may not have an active session.")
-                status_detail = "Login required or verification page encountered. Ensure configured profile is logged into Facebook."
+            with metrics.span("navigation", platform="facebook"):
+                try:
+                    await page.goto(url, wait_until="domcontentloaded",
+                                    timeout=deadline.timeout_ms(FACEBOOK_NAVIGATION_TIMEOUT_MS))
+                except PlaywrightTimeoutError:
+                    if deadline.expired(): # Cut short by the budget, not a page that failed to load
+                        raise DeadlineExceeded(f"Time budget of {time_budget}s ran out while loading the search page")
+                    raise
+
+            # Classify the page as soon as it is recognisable, so login walls and empty
+            # searches return in a second or two instead of after the full load and popup probing.
+            with metrics.span("preflight", platform="facebook"):
+                page_state, overlay_present = await preflight(page, deadline.timeout_ms(FACEBOOK_PREFLIGHT_TIMEOUT_MS))
+            metrics.inc("osint_preflight_total", platform="facebook", state=page_state)
+            logger.debug(f"Pre-flight: page state '{page_state}', overlay present: {overlay_present}")
+            if page_state == "unknown":
+                # Still rendering: give the feed until posts appear or the network settles, then classify again
+                with metrics.span("feed_wait", platform="facebook"):
+                    await wait_for_feed(page, deadline.timeout_ms(FACEBOOK_FEED_TIMEOUT_MS),
+                                        deadline.wait_ms(FACEBOOK_FEED_SETTLE_MS))
+                    page_state, overlay_present = await preflight(page, deadline.timeout_ms(250))
+                logger.debug(f"After feed wait: page state '{page_state}', overlay present: {overlay_present}")
+
+            if overlay_present and page_state not in ("login", "checkpoint"):
+                logger.debug("Attempting to handle initial pop-ups/overlays.")
+                with metrics.span("popup_handling", platform="facebook"):
+                    await _close_popups(page)
+
+            if page_state in ("login", "checkpoint"):
+                logger.warning(f"Facebook {page_state} page detected. Profile '{profile.name}' may not have an active session.")
+                metrics.inc("osint_login_walls_total", platform="facebook")
+                login_wall = True
+                pool.mark_unhealthy(profile, f"{page_state} wall at {page.url}")
+                failure = "login wall"
+                status_detail = f"Login required or verification page encountered. Profile '{profile.name}' rotated out; ensure it is logged into Facebook."
                 html_content = await page.content()
-                screenshot_path = f"debug_facebook_{query.replace(' ','_')}_login_required.png"
-                await page.screenshot(path=screenshot_path)
+                screenshot_path = await capture_page(page, f"debug_facebook_{query.replace(' ','_')}_login_required.png",
+                                                     error=True, platform="facebook")
                 # No early return here, let finally handle context close. Results will be empty.
+            elif page_state == "no_results":
+                logger.info("Facebook search returned 'No posts found' or similar on initial load.")
+                status_detail = "Search successful, but no public posts found matching the query."
             else:
                 logger.info("Attempting to scrape posts from logged-in Facebook interface.")
                 collected_posts_count = 0
-                max_posts_to_collect = 15
                 scroll_attempts = 0
-                max_scroll_attempts = 12
-
-                post_selector = 'div[role="article"]' # Simplified a bit, will rely on inner content checks
                 seen_post_urls = set()
 
-                while collected_posts_count < max_posts_to_collect and scroll_attempts < max_scroll_attempts:
-                    logger.debug(f"Scroll attempt {scroll_attempts + 1}/{max_scroll_attempts}. Collected {collected_posts_count}/{max_posts_to_collect} posts.")
-                    await page.wait_for_timeout(1000)
+                while collected_posts_count < max_posts and scroll_attempts < max_scroll_attempts:
+                    if deadline.expired():
+                        truncated = True
+                        status_detail = f"Time budget of {time_budget}s reached; returning the {collected_posts_count} posts collected so far."
+                        logger.info(status_detail)
+                        break
+
+                    logger.debug(f"Scroll attempt {scroll_attempts + 1}/{max_scroll_attempts}. Collected {collected_posts_count}/{max_posts} posts.")
+                    await page.wait_for_timeout(deadline.wait_ms(1000))
 
-                    for selector in close_button_selectors: # Try closing popups again after scroll
-                        try:
-                            buttons = await page.locator(selector).all()
-                            for close_btn in reversed(buttons):
-                                if await close_btn.is_visible(timeout=300):
-                                    logger.info(f"Closing pop-up with selector: {selector} (during scroll).")
-                                    await close_btn.click(timeout=500, force=True)
-                                    await page.wait_for_timeout(1000)
-                                    break
-                        except Exception: pass
-
-                    post_elements = await page.query_selector_all(post_selector)
-                    logger.debug(f"Found {len(post_elements)} potential post elements in current view.")
+                    try: # Close popups that appeared while scrolling; a single probe when there are none
+                        await _close_popups(page, rounds=1, click_timeout=500, settle_ms=1000)
+                    except Exception: pass
+
+                    # Articles already collected are tagged with data-osint-seen, so only new ones come back here.
+                    post_elements = await page.query_selector_all(UNSEEN_POST_SELECTOR)
+                    logger.debug(f"Found {len(post_elements)} new potential post elements in current view.")
 
                     if not post_elements and scroll_attempts == 0:
                         no_results_text_found = False
@@ -138,70 +357,43 @@ async def scrape_facebook(query: str, search_type: str): # search_type is retain
                         break # Break from while loop
 
                     new_posts_found_this_scroll = 0
-                    for post_el in post_elements:
-                        if collected_posts_count >= max_posts_to_collect:
-                            break
-
-                        post_data = {"text": "N/A", "author_name": "N/A", "author_url": "N/A", "timestamp": "N/A", "post_url": "N/A", "media_urls": []}
-                        current_post_url = None
-                        try:
-                            # Post URL & Timestamp
-                            time_link_el = await post_el.query_selector('a span[role="tooltip"] > span, a span[data-tooltip-content][aria-live="polite"], a[href*="/permalink/"], a[href*="/story.php"], a[href*="/watch/"], a[href*="/photo"], a[href*="/photos/"], a[href*="/videos/"]')
-                            if time_link_el:
-                                current_post_url = await time_link_el.get_attribute('href')
-                                if current_post_url and not current_post_url.startswith("https://www.facebook.com"):
-                                    current_post_url = "https://www.facebook.com" + current_post_url
-                                post_data["post_url"] = current_post_url
-
-                                # Timestamp often from the link's text content or a sibling/child time/abbr
-                                ts_text = await time_link_el.inner_text()
-                                if re.search(r'\d', ts_text): # If text itself contains numbers (likely a date)
-                                     post_data["timestamp"] = ts_text.strip()
-                                else: # Try to find a dedicated time element
-                                    ts_el_alt = await post_el.query_selector('time[datetime], abbr[title]')
-                                    if ts_el_alt: post_data["timestamp"] = await ts_el_alt.get_attribute('datetime') or await ts_el_alt.get_attribute('title')
-
-                            if current_post_url and current_post_url in seen_post_urls:
-                                continue
-
-                            # Author Name & URL (often a link with strong text, or specific aria-label)
-                            author_el = await post_el.query_selector('h2 a[href], h3 a[href], strong > a[href], a[aria-label*="Creator"], a[role="link"]:has(img[alt])') # Last one targets profile pics with links
-                            if author_el:
-                                post_data["author_name"] = (await author_el.inner_text()).strip()
-                                if not post_data["author_name"]: # If inner_text is empty (e.g. only an image was in 'a')
-                                    aria_label = await author_el.get_attribute("aria-label")
-                                    if aria_label: post_data["author_name"] = aria_label.split(",")[0].strip() # Take first part of aria-label
-
-                                post_data["author_url"] = await author_el.get_attribute('href')
-                                if post_data["author_url"] and not post_data["author_url"].startswith("https://www.facebook.com"):
-                                     post_data["author_url"] = "https://www.facebook.com" + post_data["author_url"]
-
-                            # Post Text
-                            text_elements = await post_el.query_selector_all('div[data-ad-preview="message"], div[data-ft] div[dir="auto"], div[data-testid="post_message"] div[dir="auto"]')
-                            text_content_list = [await el.inner_text() for el in text_elements]
-                            post_data["text"] = "\n".join(text_content_list).strip() if text_content_list else "N/A"
-
-                            # Media
-                            image_elements = await post_el.query_selector_all('img[src^="https://scontent."]:not([style*="height: 12px"]):not([style*="height: 16px"]):not([style*="height: 20px"])') # Exclude tiny icons
-                            for img_el in image_elements:
-                                src = await img_el.get_attribute('src')
-                                if src: post_data["media_urls"].append(src)
-
-                            video_elements = await post_el.query_selector_all('video')
-                            if video_elements: post_data["media_urls"].append("Video content present")
-
-                            if post_data.get("post_url") and (post_data.get("text") != "N/A" or post_data.get("media_urls")):
-                                results.append(post_data)
-                                if current_post_url: seen_post_urls.add(current_post_url)
-                                collected_posts_count += 1
-                                new_posts_found_this_scroll += 1
-                                logger.debug(f"Collected Facebook post #{collected_posts_count}: {post_data.get('post_url')}")
-                        except Exception as e_extract:
-                            logger.error(f"Error extracting data from a Facebook post element: {e_extract}", exc_info=True)
-                            continue
-
-                    if collected_posts_count >= max_posts_to_collect:
-                        status_detail = f"Reached max posts to collect ({max_posts_to_collect})."
+                    with metrics.span("extraction", platform="facebook"):
+                        for post_el in post_elements:
+                            try:
+                                if collected_posts_count >= max_posts:
+                                    continue # Keep looping so the remaining handles are disposed
+
+                                post_data = await _extract_post(post_el, seen_post_urls)
+                                if post_data is None: # Duplicate of a post collected earlier
+                                    await post_el.evaluate(_MARK_SEEN_JS)
+                                    continue
+
+                                if post_data.get("post_url") and (post_data.get("text") != "N/A" or post_data.get("media_urls")):
+                                    if sink is not None:
+                                        sink_result = sink(post_data)
+                                        if inspect.isawaitable(sink_result):
+                                            await sink_result
+                                    else:
+                                        results.append(post_data)
+                                    metrics.inc("osint_posts_collected_total", platform="facebook")
+                                    seen_post_urls.add(post_data["post_url"])
+                                    await post_el.evaluate(_MARK_SEEN_JS)
+                                    collected_posts_count += 1
+                                    new_posts_found_this_scroll += 1
+                                    logger.debug(f"Collected Facebook post #{collected_posts_count}: {post_data.get('post_url')}")
+                            except Exception as e_extract:
+                                logger.error(f"Error extracting data from a Facebook post element: {e_extract}", exc_info=True)
+                            finally:
+                                await _dispose_quietly(post_el)
+                    del post_elements
+                    metrics.observe("osint_posts_per_scroll", new_posts_found_this_scroll, buckets=metrics.COUNT_BUCKETS, platform="facebook")
+
+                    if prune_dom:
+                        pruned = await page.evaluate(_PRUNE_SEEN_POSTS_JS)
+                        logger.debug(f"Pruned {pruned} collected article nodes from the feed DOM.")
+
+                    if collected_posts_count >= max_posts:
+                        status_detail = f"Reached max posts to collect ({max_posts})."
                         logger.info(status_detail)
                         break
 
@@ -210,46 +402,74 @@ async def scrape_facebook(query: str, search_type: str): # search_type is retain
                         status_detail = f"Collected {collected_posts_count} posts. No new posts found after extensive scrolling."
                         break
 
-                    logger.debug(f"Scrolling down Facebook page (collected {collected_posts_count}/{max_posts_to_collect})...")
-                    await page.mouse.wheel(0, 2000)
-                    await page.wait_for_timeout(4000 + (scroll_attempts * 500))
+                    logger.debug(f"Scrolling down Facebook page (collected {collected_posts_count}/{max_posts})...")
+                    with metrics.span("scroll", platform="facebook"):
+                        await page.mouse.wheel(0, 2000)
+                        await page.wait_for_timeout(deadline.wait_ms(4000 + (scroll_attempts * 500)))
                     scroll_attempts += 1
 
-                if not results:
+                if not collected_posts_count:
                     logger.info("No posts were successfully scraped from Facebook for this query.")
                     if status_detail == "Scraping process started.":
                         status_detail = "Search completed, but no posts found or extracted."
                 elif status_detail == "Scraping process started.": # If results found but no other status set
-                    status_detail = f"Successfully collected {len(results)} posts."
+                    status_detail = f"Successfully collected {collected_posts_count} posts."
 
             logger.info(f"Finished Facebook scraping for '{query}'. {status_detail}")
             html_content = await page.content()
-            await page.screenshot(path=screenshot_path) # Use the general path, might be updated if error occurred before this.
-            logger.debug(f"Final screenshot for Facebook scrape saved to {screenshot_path}")
-
+            if not login_wall:
+                # An empty page that is not an explicit "no results" answer counts as an error for the policy.
+                screenshot_path = await capture_page(
+                    page, f"facebook_search_posts_{query.replace(' ','_')}.png",
+                    error=not collected_posts_count and page_state != "no_results", platform="facebook")
+                if screenshot_path:
+                    logger.debug(f"Final screenshot for Facebook scrape saved to {screenshot_path}")
+
+        except ProfilePoolExhausted as e_pool:
+            logger.warning(f"Facebook scrape for '{query}' skipped: {e_pool}")
+            status_detail = f"No browser profile available: {e_pool}"
+            inconclusive = True # Not the platform's fault
+            truncated = deadline.expired()
+        except DeadlineExceeded as e_deadline:
+            logger.warning(f"Facebook scrape for '{query}' stopped: {e_deadline}")
+            status_detail = f"{e_deadline}; no posts collected."
+            inconclusive = True
+            truncated = True
         except Exception as e_general:
             logger.error(f"A critical error occurred during Facebook scraping for query '{query}': {e_general}", exc_info=True)
+            metrics.inc("osint_scrape_failures_total", platform="facebook")
             status_detail = f"Critical error during scraping: {type(e_general).__name__}"
-            screenshot_path = f"debug_facebook_{query.replace(' ','_')}_critical_error.png" # Specific error screenshot
+            failure = f"{type(e_general).__name__}: {e_general}"[:200]
             try:
                 if page and not page.is_closed(): # Ensure page object exists and is usable
                     current_html = await page.content()
                     if current_html: html_content = current_html
-                    await page.screenshot(path=screenshot_path)
+                    screenshot_path = await capture_page(
+                        page, f"debug_facebook_{query.replace(' ','_')}_critical_error.png", error=True, platform="facebook")
             except Exception as e_debug_critical:
                 logger.error(f"Could not capture page content/screenshot during critical error: {e_debug_critical}", exc_info=True)
         finally:
-            if context:
-                try: await context.close()
-                except Exception as ec: logger.error(f"Error closing context: {ec}", exc_info=True)
+            if profile:
+                await close_context(profile, browser, context, save_state=not login_wall)
+                pool.release(profile)
+            if inconclusive:
+                breaker.cancel_probe()
+            elif failure:
+                breaker.record_failure(failure)
+            else:
+                breaker.record_success()
 
     return {
         "platform": "facebook",
         "query": query,
         "search_type": "posts",
         "results": results,
+        "collected_count": collected_posts_count,
+        "streamed": sink is not None,
         "html": html_content,
         "screenshot": screenshot_path,
+        "profile": profile.name if profile else None,
+        "truncated": truncated,
         "status_detail": status_detail
     }
 
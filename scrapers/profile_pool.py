@@ -0,0 +1,216 @@
+import asyncio
+import os
+import threading
+import time
+import logging
+from contextlib import asynccontextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: leases only exclude scrapes within one process
+    fcntl = None
+
+from scrapers.config import (
+    CHROME_USER_DATA_DIRS, BROWSER_STORAGE_STATES, HEADLESS_MODE,
+    PROFILE_LEASE_TIMEOUT_SECONDS, PROFILE_UNHEALTHY_COOLDOWN_MINUTES,
+)
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+BROWSER_ARGS = ['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage', '--disable-gpu']
+_POLL_SECONDS = 0.5
+LEASE_LOCK_FILE = ".osint-lease.lock"
+
+
+class ProfilePoolExhausted(RuntimeError):
+    """No healthy browser profile became free before the lease timeout."""
+
+
+class BrowserProfile:
+    """One logged-in session: a persistent Chrome profile directory or a storage_state snapshot."""
+
+    def __init__(self, path, kind="persistent"):
+        self.path = path
+        self.kind = kind
+        self.name = os.path.basename(os.path.normpath(path)) or path
+        self.in_use = False
+        self.unhealthy_until = 0.0
+        self.last_error = None
+        self.last_used = 0.0
+        self.login_walls = 0
+        self._lease_file = None
+
+    @property
+    def lock_path(self):
+        """Lock file held for the lease: inside a persistent profile directory, next to a storage_state file."""
+        if self.kind == "persistent":
+            return os.path.join(self.path, LEASE_LOCK_FILE)
+        return self.path + ".lock"
+
+    def lock(self):
+        """
+        Take the profile's lease lock without blocking. The OS lock (flock) excludes other
+        worker processes on this host, or on any host sharing the profile directory; it is
+        dropped automatically if the holding process dies. Returns False if it is held.
+        """
+        if fcntl is None:
+            return True
+        if self.kind == "persistent":
+            os.makedirs(self.path, exist_ok=True)
+        lease_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lease_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lease_file.close()
+            return False
+        self._lease_file = lease_file
+        return True
+
+    def unlock(self):
+        if self._lease_file is not None:
+            fcntl.flock(self._lease_file, fcntl.LOCK_UN)
+            self._lease_file.close()
+            self._lease_file = None
+
+    def healthy(self, now=None):
+        return (now or time.monotonic()) >= self.unhealthy_until
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "in_use": self.in_use,
+            "healthy": self.healthy(),
+            "login_walls": self.login_walls,
+            "last_error": self.last_error,
+        }
+
+
+class ProfilePool:
+    """
+    Leases browser profiles to scrapes, one scrape per profile at a time. The least
+    recently used healthy profile is handed out first; a profile that hits a login
+    wall is rested for `cooldown_seconds` so the next scrapes rotate to the others.
+    Within a process leases are guarded by a thread lock (not an asyncio one), since
+    each Flask request and scheduler job runs its scrape in its own event loop; across
+    worker processes sharing CHROME_USER_DATA_DIRS, each lease also holds the profile's
+    lock file (BrowserProfile.lock), so two processes never launch the same profile.
+    """
+
+    def __init__(self, profiles, cooldown_seconds=PROFILE_UNHEALTHY_COOLDOWN_MINUTES * 60):
+        self.profiles = list(profiles)
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        profiles = [BrowserProfile(path, "persistent") for path in CHROME_USER_DATA_DIRS]
+        for path in BROWSER_STORAGE_STATES:
+            if os.path.isfile(path):
+                profiles.append(BrowserProfile(path, "storage_state"))
+            else:
+                logger.warning(f"Browser storage_state file not found, skipping: {path}")
+        logger.info(f"Browser profile pool: {len(profiles)} profile(s)")
+        return cls(profiles)
+
+    def try_acquire(self):
+        """Claim a free healthy profile, or return None if none is available right now."""
+        now = time.monotonic()
+        with self._lock:
+            free = [p for p in self.profiles if not p.in_use and p.healthy(now)]
+            for profile in sorted(free, key=lambda p: p.last_used):
+                if not profile.lock():
+                    continue  # leased by another worker process
+                profile.in_use = True
+                profile.last_used = now
+                return profile
+            return None
+
+    def release(self, profile):
+        with self._lock:
+            profile.unlock()
+            profile.in_use = False
+
+    def mark_unhealthy(self, profile, reason):
+        with self._lock:
+            profile.unhealthy_until = time.monotonic() + self.cooldown_seconds
+            profile.last_error = reason
+            profile.login_walls += 1
+        metrics.inc("osint_profile_rotations_total", platform="facebook")
+        logger.warning(f"Browser profile '{profile.name}' marked unhealthy for {self.cooldown_seconds}s: {reason}")
+
+    def available(self):
+        now = time.monotonic()
+        return sum(1 for p in self.profiles if not p.in_use and p.healthy(now))
+
+    def status(self):
+        return [p.to_dict() for p in self.profiles]
+
+    async def acquire(self, timeout=PROFILE_LEASE_TIMEOUT_SECONDS):
+        """Wait up to `timeout` seconds for a free healthy profile; pair with release()."""
+        deadline = time.monotonic() + timeout
+        profile = self.try_acquire()
+        while profile is None:
+            if not any(p.healthy() for p in self.profiles):
+                raise ProfilePoolExhausted("All browser profiles are cooling down after login walls.")
+            if time.monotonic() >= deadline:
+                raise ProfilePoolExhausted(f"No browser profile became free within {timeout}s.")
+            await asyncio.sleep(_POLL_SECONDS)
+            profile = self.try_acquire()
+        logger.debug(f"Leased browser profile '{profile.name}' ({profile.kind})")
+        return profile
+
+    @asynccontextmanager
+    async def lease(self, timeout=PROFILE_LEASE_TIMEOUT_SECONDS):
+        """Hold a profile for the duration of a block."""
+        profile = await self.acquire(timeout)
+        try:
+            yield profile
+        finally:
+            self.release(profile)
+
+
+async def open_context(playwright, profile, **context_options):
+    """
+    Launch a browser context for a leased profile. Returns (browser, context); browser is
+    None for persistent profiles, where closing the context closes the browser too.
+    """
+    if profile.kind == "persistent":
+        os.makedirs(profile.path, exist_ok=True)
+        context = await playwright.chromium.launch_persistent_context(
+            profile.path, headless=HEADLESS_MODE, args=BROWSER_ARGS, **context_options)
+        return None, context
+    browser = await playwright.chromium.launch(headless=HEADLESS_MODE, args=BROWSER_ARGS)
+    context = await browser.new_context(storage_state=profile.path, **context_options)
+    return browser, context
+
+
+async def close_context(profile, browser, context, save_state=False):
+    """Close what open_context launched; storage_state profiles save their refreshed cookies first."""
+    if context is not None:
+        if save_state and profile.kind == "storage_state":
+            try:
+                await context.storage_state(path=profile.path)
+            except Exception as e:
+                logger.warning(f"Could not save storage_state for '{profile.name}': {e}")
+        try:
+            await context.close()
+        except Exception as e:
+            logger.error(f"Error closing context: {e}", exc_info=True)
+    if browser is not None:
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.error(f"Error closing browser: {e}", exc_info=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_profile_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProfilePool.from_config()
+        return _pool
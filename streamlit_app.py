@@ -9,18 +9,81 @@ st.set_page_config(page_title="OSINT Dashboard", layout="wide")
 
 st.title("🛰️ Social Media OSINT Dashboard")
 
-# Select CSV file from exports
+# Data source: the columnar store covers every collected post; single CSV exports are still viewable
+from utils import columnar_store
+
+TABLE_PREVIEW_ROWS = 1000
+
+@st.cache_data(show_spinner=False)
+def store_summary(mtime, **filters):
+    return {
+        "total": columnar_store.count_posts(),
+        "matching": columnar_store.count_posts(**filters),
+        "topics": columnar_store.topic_counts(**filters),
+        "platforms": columnar_store.platforms(),
+    }
+
+@st.cache_data(show_spinner=False)
+def store_entities(mtime, **filters):
+    return columnar_store.entity_counts(top_n=20, **filters)
+
+@st.cache_data(show_spinner=False)
+def store_preview(mtime, **filters):
+    return columnar_store.load_posts(limit=TABLE_PREVIEW_ROWS, **filters)
+
+def rebuild_store():
+    from app import app
+    with app.app_context():
+        return columnar_store.build_store_from_db()
+
+ALL_POSTS = "All collected posts"
+
 export_dir = "exports"
 if not os.path.exists(export_dir):
     os.makedirs(export_dir)
 
-files = [f for f in os.listdir(export_dir) if f.endswith(".csv")]
+files = sorted(f for f in os.listdir(export_dir) if f.endswith((".csv", ".parquet")))
+selected_source = st.selectbox("Select a dataset to view", [ALL_POSTS] + files)
+
+if selected_source == ALL_POSTS:
+    if st.button("🔄 Rebuild from database") or not columnar_store.store_exists():
+        with st.spinner("Building columnar store from the database..."):
+            rebuilt = rebuild_store()
+        st.success(f"Columnar store rebuilt with {rebuilt} posts.")
+    mtime = columnar_store.store_mtime()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sentiment_range = st.slider("Sentiment Range", -1.0, 1.0, (-1.0, 1.0))
+    with col2:
+        min_toxicity = st.slider("Minimum Toxicity", 0.0, 1.0, 0.0)
+    filters = {"sentiment_range": sentiment_range, "min_toxicity": min_toxicity}
+    with col3:
+        platform_options = store_summary(mtime)["platforms"]
+        selected_platform = st.selectbox("Platform", ["All"] + platform_options)
+    if selected_platform != "All":
+        filters["platform"] = selected_platform
+
+    summary = store_summary(mtime, **filters)
+    if len(summary["topics"]):
+        st.subheader("📊 Topic Distribution")
+        st.bar_chart(summary["topics"])
+        selected_topic = st.selectbox("Filter by topic", ["All"] + list(summary["topics"].index))
+        if selected_topic != "All":
+            filters["topic"] = selected_topic
+            summary = store_summary(mtime, **filters)
 
-if not files:
-    st.warning("No exported files found in the 'exports' directory.")
+    st.markdown(f"### Showing {summary['matching']} of {summary['total']} posts")
+    if summary["matching"] > TABLE_PREVIEW_ROWS:
+        st.caption(f"Table preview limited to the first {TABLE_PREVIEW_ROWS} matching posts.")
+    st.dataframe(store_preview(mtime, **filters), use_container_width=True)
+
+    st.subheader("📌 Named Entities")
+    st.bar_chart(store_entities(mtime, **filters))
 else:
-    selected_file = st.selectbox("Select a dataset to view", files)
-    df = pd.read_csv(os.path.join(export_dir, selected_file))
+    # Parquet exports keep typed columns (float32 scores, entity lists); CSVs need parsing
+    source_path = os.path.join(export_dir, selected_source)
+    df = pd.read_parquet(source_path) if selected_source.endswith(".parquet") else pd.read_csv(source_path)
 
     # Ensure numeric columns are correct type
     if "sentiment" in df.columns:
@@ -56,6 +119,62 @@ else:
     # Show top named entities
     if "entities" in df.columns:
         st.subheader("📌 Named Entities")
-        all_entities = filtered_df["entities"].dropna().str.cat(sep=", ").split(", ")
-        entity_counts = pd.Series(all_entities).value_counts().head(20)
+        if selected_source.endswith(".parquet"):
+            all_entities = filtered_df["entities"].explode().dropna()
+        else:
+            all_entities = pd.Series(filtered_df["entities"].dropna().str.cat(sep=", ").split(", "))
+        entity_counts = all_entities.value_counts().head(20)
         st.bar_chart(entity_counts)
+
+
+# Trends across batch runs (append-only dataset written by every batch run)
+st.subheader("📈 Trends Across Batch Runs")
+
+@st.cache_data(show_spinner=False)
+def cached_trends(mtime, freq, platform, date_from):
+    return columnar_store.trends(freq=freq, platform=platform, date_from=date_from)
+
+tcol1, tcol2, tcol3 = st.columns(3)
+with tcol1:
+    trend_freq = st.selectbox("Bucket", ["6H", "D", "W"], index=1, format_func={"6H": "6 hours", "D": "Day", "W": "Week"}.get)
+with tcol2:
+    trend_platform = st.text_input("Platform (blank for all)")
+with tcol3:
+    trend_from = st.date_input("From", value=None)
+
+trend_metrics, trend_topics = cached_trends(columnar_store.dataset_mtime(), trend_freq, trend_platform.strip() or None, trend_from)
+if trend_metrics is None:
+    st.info("No batch runs recorded yet — every scheduled batch run appends to exports/dataset/.")
+else:
+    st.markdown("**Posts per topic**")
+    st.line_chart(trend_topics)
+    st.markdown("**Average sentiment and toxicity, share of toxic posts**")
+    st.line_chart(trend_metrics[["avg_sentiment", "avg_toxicity", "toxic_share"]])
+    st.caption(f"{int(trend_metrics['posts'].sum())} posts from {int(trend_metrics['runs'].sum())} runs.")
+
+# Entity graph over the whole collected dataset (persistent graph store, precomputed layout)
+st.subheader("🕸 Entity Graph")
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_graph_view(node_label, hops, max_nodes, topic, entity):
+    from utils.graph_visualizer import load_graph_view
+    return load_graph_view(node_label or None, hops=hops, max_nodes=max_nodes, topic=topic or None, entity=entity or None)
+
+gcol1, gcol2, gcol3, gcol4, gcol5 = st.columns(5)
+with gcol1:
+    graph_focus = st.text_input("Focus on user/entity/topic")
+with gcol2:
+    graph_topic = st.text_input("Only topic")
+with gcol3:
+    graph_entity = st.text_input("Only entity")
+with gcol4:
+    graph_hops = st.slider("Hops", 1, 3, 2)
+with gcol5:
+    graph_max_nodes = st.select_slider("Max nodes", [500, 2000, 5000, 20000, 50000], value=2000)
+
+graph_view = cached_graph_view(graph_focus.strip(), graph_hops, graph_max_nodes, graph_topic.strip(), graph_entity.strip())
+if graph_view["nodes"]:
+    from utils.graph_visualizer import render_interactive_graph
+    render_interactive_graph(graph_view)
+else:
+    st.info("No graph data yet — it is built as batch results are enriched.")
@@ -0,0 +1,29 @@
+import os
+from datetime import datetime, timedelta
+from utils import archive_catalog
+
+def test_catalogue_register_search_compact_and_retention(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_catalog, "DB_PATH", str(tmp_path / "catalog.db"))
+    export_dir = tmp_path / "exports"
+    export_dir.mkdir()
+    old = datetime.utcnow() - timedelta(days=60)
+    for name, created in (("facebook_election_enriched.csv", old), ("hornwatch_1.html", datetime.utcnow()),
+                          ("hornwatch_1.pdf", datetime.utcnow())):
+        (export_dir / name).write_text("data")
+        archive_catalog.register_archive(str(export_dir / name), query="election" if name.endswith(".csv") else None,
+                                         platform="facebook" if name.endswith(".csv") else None, created_at=created)
+
+    rows, total = archive_catalog.search_archives(per_page=2)
+    assert total == 3 and len(rows) == 2
+    rows, total = archive_catalog.search_archives(search="election")
+    assert total == 1 and rows[0]["type"] == "csv"
+
+    assert archive_catalog.compact_archives(older_than_days=30) == 1
+    assert os.path.exists(str(export_dir / "facebook_election_enriched.csv.gz"))
+
+    (export_dir / "legacy.json").write_text("[]")
+    os.remove(export_dir / "hornwatch_1.pdf")
+    assert archive_catalog.sync_catalog(str(export_dir)) == (1, 1)
+
+    assert archive_catalog.apply_retention(max_age_days=30) == 1
+    assert archive_catalog.search_archives()[1] == 2
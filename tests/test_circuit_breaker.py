@@ -0,0 +1,54 @@
+from utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _breaker(clock):
+    return CircuitBreaker("facebook", failure_threshold=3, base_cooldown=60, max_cooldown=200, clock=clock)
+
+def test_trips_after_consecutive_failures_only():
+    breaker = _breaker(FakeClock())
+    breaker.record_failure("login wall")
+    breaker.record_failure("login wall")
+    breaker.record_success()
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN and not breaker.allow()
+    assert "timeout" in breaker.status_detail()
+
+def test_probe_backoff_doubles_and_success_closes():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record_failure("login wall")
+    clock.now = 59
+    assert not breaker.allow()
+    clock.now = 60
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure("login wall")
+    assert breaker.retry_at == 60 + 120
+    clock.now = 180
+    assert breaker.allow()
+    breaker.record_failure("login wall")
+    assert breaker.retry_at == 180 + 200  # capped at max_cooldown
+    clock.now = 380
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+def test_cancelled_probe_lets_next_request_probe():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record_failure("timeout")
+    clock.now = 60
+    assert breaker.allow()
+    breaker.cancel_probe()
+    assert breaker.allow() and breaker.state == HALF_OPEN
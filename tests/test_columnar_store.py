@@ -0,0 +1,43 @@
+import json
+import uuid
+import pytest
+from models import CollectedPost
+from utils import columnar_store
+
+pytest.importorskip("pyarrow")
+
+def test_build_store_from_db_and_filtered_aggregates(db, tmp_path):
+    platform = f"p{uuid.uuid4().hex[:8]}" # The test database is not dropped between tests
+    for i, (topic, toxicity) in enumerate([("politics", 0.9), ("politics", 0.2), ("sports", None)]):
+        db.session.add(CollectedPost(
+            platform=platform, post_key=uuid.uuid4().hex, simhash=0, text=f"post {i}",
+            topic=topic, toxicity=toxicity, sentiment=0.1,
+            enrichment=json.dumps({"entities": [{"text": "Addis Ababa", "label": "GPE"}]}),
+        ))
+    db.session.commit()
+
+    columnar_store.build_store_from_db(store_dir=str(tmp_path), batch_size=2)
+    store = {"store_dir": str(tmp_path), "platform": platform}
+
+    assert columnar_store.count_posts(**store) == 3
+    assert columnar_store.count_posts(min_toxicity=0.5, **store) == 1
+    assert columnar_store.topic_counts(**store).to_dict() == {"politics": 2, "sports": 1}
+    assert columnar_store.entity_counts(topic="politics", **store).to_dict() == {"Addis Ababa": 2}
+    assert str(columnar_store.load_posts(**store)["toxicity"].dtype) == "float32"
+    assert platform in columnar_store.platforms(store_dir=str(tmp_path))
+
+def test_append_batch_partitions_runs_and_trends_aggregate_them(tmp_path):
+    from datetime import datetime, timedelta
+    start = datetime(2026, 3, 1)
+    for hours in (0, 6, 24):
+        columnar_store.append_batch(
+            [{"topic": "politics", "sentiment": 0.5, "toxicity": 0.8}, {"topic": "sports", "sentiment": -0.5, "toxicity": 0.1}],
+            "election", "Facebook", run_at=start + timedelta(hours=hours), dataset_dir=str(tmp_path))
+
+    assert sorted(p.name for p in (tmp_path / "platform=facebook").iterdir()) == ["date=2026-03-01", "date=2026-03-02"]
+    metrics, topics = columnar_store.trends(freq="D", dataset_dir=str(tmp_path))
+    assert metrics["posts"].tolist() == [4, 2]
+    assert metrics["runs"].tolist() == [2, 1]
+    assert metrics["toxic_share"].tolist() == [0.5, 0.5]
+    assert topics["politics"].tolist() == [2, 1]
+    assert columnar_store.trends(platform="twitter", dataset_dir=str(tmp_path)) == (None, None)
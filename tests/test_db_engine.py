@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+from models import JSONText, SearchResult, CollectedPost
+from utils import db_engine
+
+def test_engine_options_size_the_pool_for_server_databases():
+    assert "pool_size" not in db_engine.engine_options("sqlite:///osint_tool.db")
+    options = db_engine.engine_options("postgresql://osint@db/osint")
+    assert options["pool_size"] == db_engine.DB_POOL_SIZE
+    assert options["max_overflow"] == db_engine.DB_MAX_OVERFLOW
+
+def test_sqlite_connections_use_wal_and_busy_timeout(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == db_engine.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    engine.dispose()
+
+def test_json_columns_are_jsonb_on_postgres_and_text_elsewhere():
+    assert "result_data JSONB" in str(CreateTable(SearchResult.__table__).compile(dialect=postgresql.dialect()))
+    assert "result_data TEXT" in str(CreateTable(SearchResult.__table__).compile(dialect=sqlite.dialect()))
+    pg = postgresql.dialect()
+    assert JSONText().process_bind_param('{"a": [1]}', pg) == {"a": [1]}
+    assert JSONText().process_result_value({"a": [1]}, pg) == '{"a": [1]}'
+    assert JSONText().process_bind_param('{"a": [1]}', sqlite.dialect()) == '{"a": [1]}'
+
+class FakeCursor:
+    def __init__(self):
+        self.statements, self.copied, self.rowcount = [], None, 2
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+        self.copied = buffer.read()
+
+    def close(self):
+        pass
+
+def test_copy_insert_stages_rows_and_skips_conflicts():
+    cursor = FakeCursor()
+    connection = SimpleNamespace(connection=SimpleNamespace(driver_connection=SimpleNamespace(cursor=lambda: cursor)))
+    rows = [{"platform": "facebook", "post_key": "a", "simhash": 1, "text": 'say "hi", then',  "enrichment": None},
+            {"platform": "facebook", "post_key": "b", "simhash": -2, "text": None, "enrichment": '{"topic": "x"}'}]
+
+    assert db_engine.copy_insert(connection, CollectedPost.__table__, rows, conflict_column="post_key") == 2
+    assert cursor.copied.splitlines() == [
+        'facebook,a,1,"say ""hi"", then",\\N',
+        'facebook,b,-2,\\N,"{""topic"": ""x""}"',
+    ]
+    assert cursor.statements[-1] == (
+        "INSERT INTO collected_post (platform, post_key, simhash, text, enrichment) "
+        "SELECT platform, post_key, simhash, text, enrichment FROM _copy_collected_post ON CONFLICT (post_key) DO NOTHING"
+    )
+
+def test_index_posts_bulk_path_links_the_copied_posts(db, monkeypatch):
+    import uuid
+    from utils import dedup
+
+    def fake_copy(connection, table, rows, conflict_column=None):
+        return connection.execute(table.insert(), rows).rowcount  # COPY needs Postgres; insert the same rows
+
+    monkeypatch.setattr(dedup, "BULK_INGEST_MIN_ROWS", 2)
+    monkeypatch.setattr(dedup, "supports_copy", lambda connection: True)
+    monkeypatch.setattr(dedup, "copy_insert", fake_copy)
+    marker = uuid.uuid4().hex  # The test database is not dropped between tests
+    items = [{"text": f"post {i} {marker}", "post_url": f"https://www.facebook.com/p/{marker}{i}"} for i in range(3)]
+    search_result = SearchResult(search_type="keyword", search_query=marker, platform="Facebook", status="success")
+    db.session.add(search_result)
+
+    indexed = dedup.index_posts(search_result, items + items[:1], "Facebook")
+    assert all(post.id is not None for post, _ in indexed)
+    assert indexed[0][0] is indexed[3][0]
+    assert dedup.count_new_posts(indexed) == 3
+    db.session.commit()
+    assert [p["text"] for p in search_result.get_result_data()] == [i["text"] for i in items]
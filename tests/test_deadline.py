@@ -0,0 +1,34 @@
+import math
+import pytest
+from scrapers.deadline import Deadline, DeadlineExceeded
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def test_without_a_budget_waits_keep_their_defaults():
+    deadline = Deadline(None)
+    assert deadline.remaining() == math.inf
+    assert deadline.timeout_ms(35000) == 35000
+    assert deadline.wait_ms(4000) == 4000
+    assert not deadline.expired()
+
+def test_budget_cuts_timeouts_and_keeps_a_reserve():
+    clock = FakeClock()
+    deadline = Deadline(10, reserve_ms=2000, clock=clock)
+    assert deadline.remaining() == 8  # 2s kept for returning the partial result
+    assert deadline.timeout_ms(35000) == 8000
+    clock.now += 7.5
+    assert deadline.wait_ms(4000) == 500
+    assert deadline.seconds(5) == 0.5
+    clock.now += 1
+    assert deadline.expired()
+    assert deadline.wait_ms(4000) == 0
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout_ms(1000)
+
+def test_short_budgets_reserve_at_most_half():
+    assert Deadline(1, reserve_ms=2000, clock=FakeClock()).remaining() == 0.5
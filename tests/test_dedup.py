@@ -0,0 +1,40 @@
+import uuid
+from models import SearchResult, CollectedPost
+from utils.dedup import canonicalize_url, simhash, hamming_distance, index_posts
+
+def test_canonicalize_url_strips_tracking_and_mobile_hosts():
+    """Share/tracking variants of a post URL collapse to one canonical URL."""
+    canonical = "https://www.facebook.com/groups/hornnews/permalink/123"
+    assert canonicalize_url("https://www.facebook.com/groups/hornnews/permalink/123/") == canonical
+    assert canonicalize_url("https://m.facebook.com/groups/hornnews/permalink/123/?__cft__[0]=AZX&__tn__=R") == canonical
+    assert canonicalize_url("https://web.facebook.com/groups/hornnews/permalink/123?fbclid=abc#comments") == canonical
+    assert canonicalize_url("https://www.facebook.com/story.php?story_fbid=9&id=4&mibextid=x") == \
+        "https://www.facebook.com/story.php?id=4&story_fbid=9"
+    assert canonicalize_url("N/A") is None
+
+def test_simhash_is_close_for_reposts():
+    original = "Thousands gathered in the capital today to protest rising fuel prices and demand talks"
+    repost = original + " #share"
+    unrelated = "The river crossing reopened after the drought aid convoy finally reached the border town"
+    assert hamming_distance(simhash(original), simhash(repost)) < hamming_distance(simhash(original), simhash(unrelated))
+
+def test_index_posts_stores_each_post_once(db):
+    post_id = uuid.uuid4().int % 10**12 # Unique per run, the test database is not dropped between tests
+    item = {"text": "Convoy reached the border town", "post_url": f"https://www.facebook.com/groups/x/permalink/{post_id}/?ref=share",
+            "author_name": "Page", "author_url": "https://www.facebook.com/page", "timestamp": "2h", "media_urls": []}
+
+    first = SearchResult(search_type="keyword", search_query="convoy", platform="Facebook", status="success")
+    db.session.add(first)
+    index_posts(first, [item], "Facebook")
+    db.session.commit()
+
+    second = SearchResult(search_type="keyword", search_query="border", platform="Facebook", status="success")
+    db.session.add(second)
+    repeat = dict(item, post_url=f"https://m.facebook.com/groups/x/permalink/{post_id}")
+    index_posts(second, [repeat, repeat], "Facebook")
+    db.session.commit()
+
+    posts = CollectedPost.query.filter_by(canonical_url=f"https://www.facebook.com/groups/x/permalink/{post_id}").all()
+    assert len(posts) == 1
+    assert posts[0].search_links.count() == 2
+    assert second.get_result_data()[0]["text"] == "Convoy reached the border town"
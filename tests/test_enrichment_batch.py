@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from utils.enrichment_batch import EnrichmentBatch
+from utils import columnar_store
+
+def _batch():
+    batch = EnrichmentBatch(3)
+    batch.set_scores("sentiment", [0.5, -0.25], rows=[0, 2])
+    batch.set_scores("toxicity", [0.1, 0.2, 0.9])
+    batch.set_entities(0, [("Addis Ababa", "GPE"), ("UN", "ORG")])
+    batch.set_entities(2, [{"text": "UN", "label": "ORG"}])
+    batch.set_row(1, {"topic": "politics", "entities": []})
+    return batch
+
+def test_columns_are_float32_and_entities_share_one_table():
+    batch = _batch()
+
+    assert batch.column("sentiment").dtype == np.float32
+    assert np.isnan(batch.column("sentiment")[1])
+    assert batch.entity_offsets.tolist() == [0, 2, 2, 3]
+    assert batch.entity_names.values == ["Addis Ababa", "UN"]  # "UN" stored once
+    assert batch.entities(2) == [("UN", "ORG")]
+    assert batch.row(1) == {"toxicity": pytest.approx(0.2), "entities": [], "topic": "politics"}
+    assert batch.row(0)["entities"] == [{"text": "Addis Ababa", "label": "GPE"}, {"text": "UN", "label": "ORG"}]
+
+def test_apply_to_fills_dicts_for_legacy_callers():
+    items = _batch().apply_to([{}, {}, {}])
+
+    assert items[2]["sentiment"] == -0.25
+    assert "sentiment" not in items[1]
+
+def test_to_arrow_and_append_batch_use_the_columns(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    table = _batch().to_arrow()
+    assert table.schema.field("toxicity").type == pa.float32()
+    assert table["sentiment"].to_pylist() == [0.5, None, -0.25]
+    assert table["entities"].to_pylist() == [["Addis Ababa", "UN"], [], ["UN"]]
+
+    path = columnar_store.append_batch([{"post_url": f"u{i}"} for i in range(3)], "q", "Facebook",
+                                       dataset_dir=str(tmp_path), enrichment=_batch())
+    written = pq.read_table(path)
+    assert written.schema.names == columnar_store._batch_schema(pa).names
+    assert written.schema.field("sentiment").type == pa.float32()
+    assert written["topic"].to_pylist() == [None, "politics", None]
+    assert written["entities"].to_pylist()[0] == ["Addis Ababa", "UN"]
@@ -0,0 +1,55 @@
+import asyncio
+from scrapers.facebook_scraper import preflight, wait_for_feed
+
+class FakeHandle:
+    def __init__(self, value):
+        self.value = value
+
+    async def json_value(self):
+        return self.value
+
+    async def dispose(self):
+        pass
+
+class FakePage:
+    def __init__(self, verdict=None, overlay=False):
+        self.verdict = verdict
+        self.overlay = overlay
+
+    async def wait_for_function(self, expression, arg=None, timeout=None, polling=None):
+        if self.verdict is None:
+            raise TimeoutError("Timeout exceeded")
+        return FakeHandle(self.verdict)
+
+    async def evaluate(self, expression, arg=None):
+        return self.overlay
+
+def test_preflight_returns_classified_state():
+    page = FakePage({"state": "checkpoint", "overlay": False})
+    assert asyncio.run(preflight(page, timeout_ms=10)) == ("checkpoint", False)
+
+def test_preflight_falls_back_to_unknown_with_overlay_probe():
+    assert asyncio.run(preflight(FakePage(None, overlay=True), timeout_ms=10)) == ("unknown", True)
+
+class SlowFeedPage:
+    """Posts render after `posts_after` seconds (never if None); the network idles after `idle_after`."""
+
+    def __init__(self, posts_after=None, idle_after=0.01):
+        self.posts_after = posts_after
+        self.idle_after = idle_after
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        if self.posts_after is None or self.posts_after * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError("Timeout exceeded")
+        await asyncio.sleep(self.posts_after)
+        return object()
+
+    async def wait_for_load_state(self, state, timeout=None):
+        await asyncio.sleep(self.idle_after)
+
+def test_feed_wait_gives_slow_pages_time_to_render_posts():
+    assert asyncio.run(wait_for_feed(SlowFeedPage(posts_after=0.05), timeout_ms=1000, settle_ms=500))
+
+def test_feed_wait_gives_up_shortly_after_network_idle():
+    assert not asyncio.run(wait_for_feed(SlowFeedPage(posts_after=None), timeout_ms=5000, settle_ms=50))
@@ -0,0 +1,114 @@
+import json
+import uuid
+from datetime import datetime
+from models import CollectedPost, GraphNode
+from utils.graph_store import ingest_posts, refresh_metrics, refresh_layout, neighbourhood, graph_view
+
+def _post(author, entities, topic, author_url=None):
+    unique = uuid.uuid4().hex # The test database is not dropped between tests
+    return CollectedPost(
+        platform="facebook", post_key=unique, simhash=0, text=f"post {unique}",
+        author_name=author, author_url=author_url or f"https://www.facebook.com/{author}",
+        enrichment=json.dumps({"topic": topic, "entities": [{"text": e, "label": "ORG"} for e in entities]}),
+        enriched_at=datetime.utcnow(),
+    )
+
+def test_graph_ingest_is_incremental_and_queryable(db):
+    tag = uuid.uuid4().hex[:8]
+    author, entity = f"user{tag}", f"Org {tag}"
+    posts = [_post(author, [entity], f"topic-{tag}"), _post(author, [entity, f"Other {tag}"], f"topic-{tag}")]
+    db.session.add_all(posts)
+    db.session.flush()
+    assert ingest_posts(posts) == 2
+    assert ingest_posts(posts) == 0  # already graphed
+    db.session.commit()
+
+    refresh_metrics()
+    refresh_layout()
+
+    user = GraphNode.query.filter_by(kind="user", key=f"facebook:{author}").one()
+    assert user.degree == 3 and user.centrality > 0
+    assert user.x is not None and user.y is not None
+
+    data = neighbourhood([user.id], hops=1)
+    labels = {n.label for n in data["nodes"]}
+    assert {author, entity, f"Other {tag}", f"topic-{tag}"} <= labels
+    weights = {(s, t): w for s, t, w in data["edges"]}
+    entity_node = GraphNode.query.filter_by(kind="entity", key=f"org {tag}").one()
+    assert weights[tuple(sorted((user.id, entity_node.id)))] == 2
+
+def test_graph_view_collapses_overflow_into_clusters(db):
+    tag = uuid.uuid4().hex[:8]
+    author = f"hub{tag}"
+    posts = [_post(author, [f"Entity {tag} {i}"], f"topic-{tag}") for i in range(8)]
+    db.session.add_all(posts)
+    db.session.flush()
+    ingest_posts(posts)
+    db.session.commit()
+    refresh_metrics()
+
+    user = GraphNode.query.filter_by(kind="user", key=f"facebook:{author}").one()
+    view = graph_view([user.id], hops=1, max_nodes=4, label_budget=1)
+    regular = [n for n in view["nodes"] if n["kind"] != "cluster"]
+    clusters = [n for n in view["nodes"] if n["kind"] == "cluster"]
+    assert len(regular) == 4 and view["collapsed"] == 6  # 8 entities + 1 topic around the hub, 3 kept
+    assert clusters == [dict(clusters[0], id=f"c{user.id}", label="+6")]
+    assert {"source": str(user.id), "target": f"c{user.id}", "weight": 6} in view["edges"]
+    assert [n["id"] for n in regular if n["show_label"]] == [str(user.id)]
+
+    assert graph_view(topic=f"no-such-topic-{tag}")["nodes"] == []
+
+def test_group_posters_get_their_own_user_nodes(db):
+    tag = uuid.uuid4().hex[:8]
+    group_url = f"https://www.facebook.com/groups/{tag}/user/"
+    posts = [_post("Abebe", [f"Org {tag}"], f"topic-{tag}", author_url=f"{group_url}1{tag}/"),
+             _post("Sara", [f"Org {tag}"], f"topic-{tag}", author_url=f"{group_url}2{tag}/")]
+    db.session.add_all(posts)
+    db.session.flush()
+    assert ingest_posts(posts) == 2
+    db.session.commit()
+
+    users = GraphNode.query.filter(GraphNode.kind == "user", GraphNode.key.in_([f"facebook:1{tag}", f"facebook:2{tag}"]))
+    assert sorted(u.label for u in users) == ["Abebe", "Sara"]
+    assert GraphNode.query.filter_by(kind="user", key="facebook:groups").count() == 0
+
+def test_graph_view_without_a_start_node_filters_by_kind(db):
+    tag = uuid.uuid4().hex[:8]
+    posts = [_post(f"kinds{tag}", [f"Org {tag}"], f"topic-{tag}")]
+    db.session.add_all(posts)
+    db.session.flush()
+    ingest_posts(posts)
+    db.session.commit()
+    refresh_metrics()
+
+    view = graph_view(kinds=["user"], max_nodes=10000)
+    assert view["nodes"] and {n["kind"] for n in view["nodes"]} == {"user"}
+    assert f"kinds{tag}" in {n["label"] for n in view["nodes"]}
+
+def test_edge_lookup_is_chunked_under_the_bind_parameter_limit(db, monkeypatch):
+    import sqlite3
+    from utils import graph_store
+
+    tag = uuid.uuid4().hex[:8]
+    author, entities = f"wide{tag}", [f"Entity {tag} {i}" for i in range(6)]
+    first = [_post(author, entities, f"topic-{tag}")]
+    db.session.add_all(first)
+    db.session.flush()
+    ingest_posts(first)
+    db.session.commit()
+
+    second = [_post(author, entities + [f"New {tag}"], f"topic-{tag}")]  # new SQL text, not a cached statement
+    db.session.add_all(second)
+    db.session.flush()
+    monkeypatch.setattr(graph_store, "ID_CHUNK_SIZE", 8)
+    raw = db.session.connection().connection.driver_connection
+    limit = raw.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    raw.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 12)  # 8 edge pairs need 16 parameters unchunked
+    try:
+        assert ingest_posts(second) == 1
+        db.session.commit()
+    finally:
+        raw.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+    user = GraphNode.query.filter_by(kind="user", key=f"facebook:{author}").one()
+    assert sorted(w for _, _, w in neighbourhood([user.id], hops=1)["edges"]) == [1] + [2] * 7
@@ -0,0 +1,17 @@
+import json
+import pytest
+
+pytest.importorskip("networkx")
+pytest.importorskip("streamlit")
+pytest.importorskip("matplotlib")
+from utils.graph_visualizer import SIGMA_TEMPLATE, interactive_graph_html
+
+def test_scraped_labels_cannot_break_out_of_the_script_block():
+    label = '</script><script>alert("x")</script> & <b>'
+    view = {"nodes": [{"id": 1, "label": label, "kind": "user"}], "edges": [], "collapsed": 0}
+
+    html = interactive_graph_html(view)
+    assert html.count("</script>") == SIGMA_TEMPLATE.count("</script>")  # only the template's own tags
+    assert "<b>" not in html
+    payload = html.split("const data = ", 1)[1].split(";\n", 1)[0]
+    assert json.loads(payload)["nodes"][0]["label"] == label
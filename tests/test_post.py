@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+import uuid
+from models import SearchResult, CollectedPost
+from utils.dedup import index_posts
+from utils.post import Post, analyzable_text, to_posts, json_default
+
+def test_post_behaves_like_a_scraper_dict():
+    post = Post(platform="facebook", text="Convoy reached the town", post_url="https://fb.com/p/1", media_urls=[])
+    post["sentiment"] = 0.4
+    post.update({"toxicity": 0.01})
+    assert post.get("author_name") is None and "author_name" not in post
+    assert post["sentiment"] == 0.4
+    assert dict(post) == {"platform": "facebook", "text": "Convoy reached the town", "post_url": "https://fb.com/p/1",
+                          "media_urls": [], "sentiment": 0.4, "toxicity": 0.01}
+    assert isinstance(post.copy(), dict)
+    assert not hasattr(post, "__dict__")
+    assert json.loads(json.dumps([post], default=json_default))[0]["sentiment"] == 0.4
+
+def test_from_item_picks_the_text_field_and_keeps_the_rest():
+    tweet = Post.from_item({"tweet": "Road closed near the bridge", "likes": 4}, "twitter")
+    assert (tweet.text, tweet["likes"], tweet.platform) == ("Road closed near the bridge", 4, "twitter")
+    video = Post.from_item({"text": "N/A", "title": "Flood footage", "channel": "News"})
+    assert analyzable_text(video) == "Flood footage"
+    assert to_posts([{"error": "blocked"}])[0] == {"error": "blocked"}
+
+def test_analyzable_text_excludes_urls_and_authors():
+    item = {"text": "Aid arrived", "author_name": "Page", "post_url": "https://www.facebook.com/x", "author_url": "https://fb.com/p"}
+    assert analyzable_text(item) == analyzable_text(Post.from_item(item)) == "Aid arrived"
+
+def test_posts_flow_through_dedup_and_csv(db):
+    post_id = uuid.uuid4().int % 10**12
+    post = Post(platform="facebook", text="Market reopened after curfew", author_name="Page", timestamp="1h",
+                post_url=f"https://www.facebook.com/groups/y/permalink/{post_id}", media_urls=[])
+    result = SearchResult(search_type="keyword", search_query="market", platform="Facebook", status="success")
+    db.session.add(result)
+    [(stored, item)] = index_posts(result, [post], "Facebook")
+    db.session.commit()
+    assert item is post and stored.text == "Market reopened after curfew"
+    assert CollectedPost.query.filter_by(canonical_url=post.post_url).count() == 1
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=sorted(post.keys()))
+    writer.writeheader()
+    writer.writerows([post])
+    assert "Market reopened after curfew" in out.getvalue()
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from scrapers.profile_pool import ProfilePool, BrowserProfile, ProfilePoolExhausted
+
+@pytest.fixture()
+def _pool(tmp_path):
+    def make(*names, cooldown_seconds=60):
+        return ProfilePool([BrowserProfile(str(tmp_path / n)) for n in names], cooldown_seconds=cooldown_seconds)
+    return make
+
+def test_leases_are_exclusive_and_rotate(_pool):
+    pool = _pool("a", "b")
+    first, second = pool.try_acquire(), pool.try_acquire()
+    assert {first.name, second.name} == {"a", "b"}
+    assert pool.try_acquire() is None
+    pool.release(first)
+    assert pool.try_acquire() is first
+
+def test_unhealthy_profile_is_rotated_out(_pool):
+    pool = _pool("a", "b")
+    profile = pool.try_acquire()
+    pool.mark_unhealthy(profile, "login wall")
+    pool.release(profile)
+    assert pool.available() == 1
+    other = pool.try_acquire()
+    assert other is not profile
+    pool.release(other)
+    profile.unhealthy_until = 0  # cooldown over
+    assert pool.available() == 2
+
+def test_acquire_waits_for_release_and_times_out(_pool):
+    pool = _pool("a")
+
+    async def scenario():
+        async with pool.lease() as held:
+            with pytest.raises(ProfilePoolExhausted):
+                await pool.acquire(timeout=0)
+            asyncio.get_running_loop().call_later(0.1, pool.release, held)
+            return await pool.acquire(timeout=5)
+
+    assert asyncio.run(scenario()).name == "a"
+
+def test_all_profiles_unhealthy_fails_fast(_pool):
+    pool = _pool("a", cooldown_seconds=3600)
+    pool.mark_unhealthy(pool.profiles[0], "checkpoint")
+    with pytest.raises(ProfilePoolExhausted):
+        asyncio.run(pool.acquire(timeout=60))
+
+def test_leases_exclude_other_pools_sharing_the_profiles(tmp_path):
+    pytest.importorskip("fcntl")
+    # Each worker process builds its own pool over the same CHROME_USER_DATA_DIRS
+    worker_a = ProfilePool([BrowserProfile(str(tmp_path / "shared"))])
+    worker_b = ProfilePool([BrowserProfile(str(tmp_path / "shared"))])
+    held = worker_a.try_acquire()
+    assert held is not None
+    assert worker_b.try_acquire() is None
+    worker_a.release(held)
+    assert worker_b.try_acquire() is not None
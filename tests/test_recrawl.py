@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from utils.recrawl import estimate_new_post_rate, recommend_interval, interval_seconds
+
+def _runs(new_counts, every_hours):
+    start = datetime(2026, 1, 1)
+    return [SimpleNamespace(started_at=start + timedelta(hours=i * every_hours), new_post_count=n)
+            for i, n in enumerate(new_counts)]
+
+def test_estimate_new_post_rate():
+    assert estimate_new_post_rate(_runs([5], 6)) is None
+    assert estimate_new_post_rate(_runs([0, 12, 12], 6)) == 2.0
+
+def test_recommend_interval_tracks_rate_within_bounds():
+    six_hours, bounds = interval_seconds({"hours": 6}), (900, 86400)
+    # 20 new posts/hour, target 10 per run: halve the interval (one step at most)
+    assert recommend_interval(20.0, six_hours, *bounds, target_new_posts=10) == six_hours // 2
+    # quiet query: back off, but never past the maximum
+    assert recommend_interval(0.0, 16 * 3600, *bounds, target_new_posts=10) == 86400
+    # busy query: speed up, but never below the minimum
+    assert recommend_interval(1000.0, 1200, *bounds, target_new_posts=10) == 900
+    # every result was new: posts were probably missed between runs
+    assert recommend_interval(0.1, six_hours, *bounds, target_new_posts=10, saturated=True) == six_hours // 2
+    assert recommend_interval(None, six_hours, *bounds, target_new_posts=10) == six_hours
@@ -0,0 +1,19 @@
+import pytest
+
+pytest.importorskip("pdfkit")
+from utils.report import generate_html_report, submit_report
+
+def test_generate_html_report_truncates_and_paginates(tmp_path):
+    rows = [{"username": f"user{i}", "platform": "facebook", "content": "<b>text</b>", "topic": "news", "sentiment": 0.1}
+            for i in range(25)]
+    out = generate_html_report(rows, str(tmp_path / "report.html"), max_rows=10, page_size=4)
+    html = open(out, encoding="utf-8").read()
+    assert "Showing the first 10 of 25 results." in html
+    assert html.count("<tr>") == 10 + 3  # rows plus one header row per page of 4
+    assert "user9" in html and "user10" not in html
+    assert "&lt;b&gt;text" in html
+
+def test_submit_report_returns_job_handle(tmp_path):
+    job = submit_report([{"username": "a", "content": "x"}], str(tmp_path / "r.html"))
+    assert job.result(timeout=10) == (str(tmp_path / "r.html"), None)
+    assert job.status == "done"
@@ -62,6 +62,7 @@ def test_api_execute_search_valid(mock_run_scraper, client, db): # Added db fixt
         "search_type": "keyword",
         "status": "success",
         "results": [{"text": "Facebook result 1"}],
+        "data": [{"text": "Facebook result 1"}],
         "html": "<html></html>",
         "screenshot": "fb_test.png",
         "status_detail": "Mock success"
@@ -98,3 +99,112 @@ def test_api_execute_search_valid(mock_run_scraper, client, db): # Added db fixt
     assert data['data'][0]['text'] == "Facebook result 1"
     # The screenshot path is taken from the direct output of run_scraper in the route
     assert data['screenshot_path'] == "fb_test.png"
+
+def test_metrics_endpoint(client):
+    """Test that /metrics exposes recorded counters and stage timings in Prometheus format."""
+    from utils import metrics
+    metrics.reset()
+    metrics.inc("osint_login_walls_total", platform="facebook")
+    with metrics.span("navigation", platform="facebook"):
+        pass
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.data.decode()
+    assert '# TYPE osint_login_walls_total counter' in body
+    assert 'osint_login_walls_total{platform="facebook"} 1' in body
+    assert 'osint_stage_duration_seconds_count{platform="facebook",stage="navigation"} 1' in body
+    assert 'osint_stage_duration_seconds_bucket{platform="facebook",stage="navigation",le="+Inf"} 1' in body
+
+@patch('routes.run_scraper')
+def test_api_execute_search_passes_collection_limits(mock_run_scraper, client, db):
+    """Per-request limits are validated and forwarded to run_scraper."""
+    mock_run_scraper.return_value = []
+
+    response = client.post('/api/execute_search', json={
+        'search_query': 'limits', 'search_type': 'keyword', 'platforms': ['Facebook'],
+        'max_posts': 500, 'max_scroll_attempts': 80
+    })
+    assert response.status_code == 200
+    mock_run_scraper.assert_called_once_with('limits', 'keyword', ['Facebook'], max_posts=500, max_scroll_attempts=80)
+
+    response = client.post('/api/execute_search', json={
+        'search_query': 'limits', 'search_type': 'keyword', 'platforms': ['Facebook'], 'max_posts': 0
+    })
+    assert response.status_code == 400
+
+@patch('routes.run_scraper')
+def test_api_execute_search_passes_time_budget_and_returns_truncated(mock_run_scraper, client, db):
+    """A time budget is forwarded to run_scraper and partial results come back flagged."""
+    mock_run_scraper.return_value = [{"platform": "Facebook", "status": "success", "results": [{"text": "early post"}],
+                                      "truncated": True, "status_detail": "Time budget of 10.0s reached"}]
+
+    response = client.post('/api/execute_search', json={
+        'search_query': 'budget', 'search_type': 'keyword', 'platforms': ['Facebook'], 'time_budget': 10
+    })
+    assert response.status_code == 200
+    mock_run_scraper.assert_called_once_with('budget', 'keyword', ['Facebook'], time_budget=10.0)
+    assert json.loads(response.data)['truncated'] is True
+
+    for bad_budget in (0, -5, "soon", 10**6):
+        response = client.post('/api/execute_search', json={
+            'search_query': 'budget', 'search_type': 'keyword', 'platforms': ['Facebook'], 'time_budget': bad_budget
+        })
+        assert response.status_code == 400
+
+def test_api_execute_search_serialises_scraped_posts(client, db):
+    """Posts from a real run_scraper call reach jsonify as plain objects."""
+    from utils.post import Post
+
+    async def fake_scrape_facebook(query, search_type, **options):
+        return {"platform": "Facebook", "status_detail": "ok", "html": None, "screenshot": None,
+                "results": [Post(platform="facebook", text="Bridge reopened", post_url="https://www.facebook.com/p/1",
+                                 media_urls=[], likes=3)]}
+
+    with patch.dict('scraper.PLATFORM_SCRAPERS', {"Facebook": fake_scrape_facebook}), \
+            patch('scraper.write_behind.submit'):
+        response = client.post('/api/execute_search', json={
+            'search_query': 'bridge', 'search_type': 'keyword', 'platforms': ['Facebook']
+        })
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['data'] == [{"platform": "facebook", "text": "Bridge reopened",
+                             "post_url": "https://www.facebook.com/p/1", "media_urls": [], "likes": 3}]
+    assert 'results' not in data and 'html' not in data  # posts once, and never the raw page HTML
+
+def test_api_posts_search(client, db):
+    """Collected posts are full-text searchable with filters and pagination."""
+    import uuid
+    from utils.dedup import index_posts, record_enrichment
+
+    marker = uuid.uuid4().hex[:10] # Unique term per run, the test database is not dropped between tests
+    search_result = SearchResult(search_type='keyword', search_query='fts', platform='Facebook', status='success')
+    db.session.add(search_result)
+    items = [
+        {"text": f"Fuel protest {marker} in the capital", "post_url": f"https://www.facebook.com/p/{marker}1", "author_name": "Daily News"},
+        {"text": f"Peaceful market day {marker}", "post_url": f"https://www.facebook.com/p/{marker}2", "author_name": "Town Page"},
+    ]
+    indexed = index_posts(search_result, items, 'Facebook')
+    record_enrichment(indexed[0][0], {"topic": "Civil Unrest", "toxicity": 0.6, "sentiment": -0.4, "entities": []})
+    record_enrichment(indexed[1][0], {"topic": "Uncategorized", "toxicity": 0.01, "sentiment": 0.5, "entities": []})
+    db.session.commit()
+
+    response = client.get(f'/api/posts/search?q={marker}')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['total'] == 2
+
+    response = client.get(f'/api/posts/search?q={marker}+protest&platform=facebook')
+    data = json.loads(response.data)
+    assert data['total'] == 1
+    assert data['results'][0]['author_name'] == "Daily News"
+
+    response = client.get(f'/api/posts/search?q={marker}&min_toxicity=0.5&topic=Civil+Unrest')
+    assert [r['topic'] for r in json.loads(response.data)['results']] == ["Civil Unrest"]
+
+    response = client.get(f'/api/posts/search?q={marker}&per_page=1&page=2')
+    data = json.loads(response.data)
+    assert data['total'] == 2 and len(data['results']) == 1 and data['page'] == 2
+
+    assert client.get('/api/posts/search').status_code == 400
@@ -0,0 +1,19 @@
+import json
+import pytest
+
+pytest.importorskip("apscheduler")
+from scheduler import load_job_specs, DEFAULT_INTERVAL
+
+def test_load_job_specs_reads_per_job_schedules(tmp_path):
+    config = tmp_path / "jobs.json"
+    config.write_text(json.dumps([
+        {"platform": "twitter", "query": "Tigray conflict", "interval": {"minutes": 5}},
+        {"platform": "facebook", "query": "Sudan protests", "cron": {"hour": "6"}},
+        {"id": "daily-ig", "platform": "instagram", "query": "Ethiopia unrest"},
+    ]))
+    specs = load_job_specs(str(config))
+    assert [(job["id"], trigger, args) for job, trigger, args in specs] == [
+        ("batch:twitter-tigray-conflict", "interval", {"minutes": 5}),
+        ("batch:facebook-sudan-protests", "cron", {"hour": "6"}),
+        ("batch:daily-ig", "interval", DEFAULT_INTERVAL),
+    ]
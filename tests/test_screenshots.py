@@ -0,0 +1,33 @@
+import asyncio
+from utils import screenshots
+from utils.screenshots import should_capture, screenshot_path, capture_page, flush
+
+def test_policy():
+    assert not should_capture(error=True, policy="never")
+    assert should_capture(error=False, policy="always")
+    assert should_capture(error=True, policy="on_error") and not should_capture(error=False, policy="on_error")
+    assert should_capture(error=False, policy="sampled", sample_rate=1.0)
+    assert not should_capture(error=False, policy="sampled", sample_rate=0.0)
+
+def test_screenshot_path_uses_output_extension():
+    assert screenshot_path("debug_facebook_x.png", "jpeg") == "debug_facebook_x.jpg"
+    assert screenshot_path("shot.png", "png") == "shot.png"
+
+class FakePage:
+    def __init__(self):
+        self.calls = []
+
+    async def screenshot(self, **options):
+        self.calls.append(options)
+        return b"\xff\xd8fake-jpeg"
+
+def test_capture_page_writes_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(screenshots, "SCREENSHOT_FORMAT", "jpeg")
+    page = FakePage()
+    path = asyncio.run(capture_page(page, str(tmp_path / "shot.png"), error=True, policy="on_error"))
+    flush(timeout=5)
+    assert path == str(tmp_path / "shot.jpg")
+    assert open(path, "rb").read() == b"\xff\xd8fake-jpeg"
+    assert page.calls == [{"type": "jpeg", "full_page": False, "quality": screenshots.SCREENSHOT_QUALITY}]
+    assert asyncio.run(capture_page(page, str(tmp_path / "ok.png"), error=False, policy="on_error")) is None
+    assert len(page.calls) == 1
@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from models import Task
+from utils import task_queue
+from utils.task_queue import enqueue, claim, complete, fail, heartbeat
+
+@pytest.fixture()
+def queue(db):
+    Task.query.delete()
+    db.session.commit()
+    yield db
+    Task.query.delete()
+    db.session.commit()
+
+def test_enqueue_is_idempotent(queue):
+    key = uuid.uuid4().hex
+    first = enqueue("search", {"query": "a"}, idempotency_key=key)
+    again = enqueue("search", {"query": "a"}, idempotency_key=key)
+    assert again.id == first.id
+    assert Task.query.count() == 1
+
+def test_claim_leases_each_task_once_by_priority(queue):
+    low = enqueue("enrich", {}, priority=-1)
+    high = enqueue("search", {"query": "b"})
+    assert claim("w1").id == high.id
+    assert claim("w2").id == low.id
+    assert claim("w3") is None
+    assert heartbeat(high.id, "w1") and not heartbeat(high.id, "w2")
+    assert complete(high, "w1", {"ok": True})
+    assert queue.session.get(Task, high.id).to_dict()["result"] == {"ok": True}
+
+def test_failures_retry_with_backoff_then_fail(queue, monkeypatch):
+    monkeypatch.setattr(task_queue, "TASK_RETRY_BACKOFF_SECONDS", 0)
+    task = enqueue("search", {"query": "c"}, max_attempts=2)
+    fail(claim("w1"), "w1", "timeout")
+    assert queue.session.get(Task, task.id).status == "queued"
+    fail(claim("w1"), "w1", "timeout again")
+    task = queue.session.get(Task, task.id)
+    assert (task.status, task.attempts, task.error) == ("failed", 2, "timeout again")
+
+def test_expired_lease_is_reclaimed(queue):
+    task = enqueue("batch", {"query": "d"})
+    claim("dead-worker")
+    queue.session.get(Task, task.id).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    queue.session.commit()
+    reclaimed = claim("w2")
+    assert (reclaimed.id, reclaimed.lease_owner, reclaimed.attempts) == (task.id, "w2", 2)
+    assert not complete(task, "dead-worker")
+
+def test_worker_drains_queue(queue, monkeypatch):
+    import worker
+
+    seen = []
+    monkeypatch.setitem(worker.TASK_HANDLERS, "search", lambda task, payload: seen.append(payload["query"]) or {"n": 1})
+    for query in ("e", "f"):
+        enqueue("search", {"query": query})
+    assert worker.work("w1", kinds=["search"], drain=True) == 2
+    assert sorted(seen) == ["e", "f"]
+    assert {t.status for t in Task.query.all()} == {"done"}
+
+def test_api_enqueue_search(client, queue):
+    body = {"search_query": "queued search", "platforms": ["Facebook"], "idempotency_key": uuid.uuid4().hex}
+    first = client.post("/api/tasks", json=body)
+    assert first.status_code == 202
+    assert client.post("/api/tasks", json=body).get_json()["id"] == first.get_json()["id"]
+    assert client.get(f"/api/tasks/{first.get_json()['id']}").get_json()["status"] == "queued"
+    assert client.post("/api/tasks", json={"platforms": ["Facebook"]}).status_code == 400
@@ -0,0 +1,54 @@
+from utils import user_correlation
+from utils.user_correlation import AuthorIndex, correlate_authors, correlate_usernames, handle_from_url, transliterate
+
+def test_correlate_usernames_exact_match():
+    matches = correlate_usernames({"twitter": [{"username": "Horn_News"}], "instagram": [{"username": "horn.news"}]})
+    assert set(matches["hornnews"]) == {"twitter", "instagram"}
+
+def test_transliterate_non_latin_scripts(monkeypatch):
+    monkeypatch.setattr(user_correlation, "unidecode", None)  # the built-in tables, whether or not unidecode is installed
+    assert transliterate("Абебе") == "abebe"
+    assert transliterate("ሰላም") == "selam"
+
+def test_author_index_clusters_fuzzy_and_transliterated_handles():
+    index = AuthorIndex()
+    index.add("twitter", "abebe_kebede")
+    index.add("facebook", "abebe.kebede1", display_name="Abebe Kebede")
+    index.add("telegram", "абебе_кебеде")
+    index.add("instagram", "river_crossing_daily")
+
+    clusters = index.clusters()
+    assert len(clusters) == 1
+    assert clusters[0]["platforms"] == ["facebook", "telegram", "twitter"]
+    assert 0.5 <= clusters[0]["score"] <= 1.0
+    assert index.candidates("twitter:abebe_kebede")[0]["score"] == 1.0
+
+def test_correlate_authors_uses_author_urls():
+    clusters = correlate_authors({
+        "facebook": [{"author_name": "Horn Daily", "author_url": "https://www.facebook.com/horndaily"}],
+        "twitter": [{"username": "horn_daily"}],
+    })
+    assert [m["id"] for m in clusters[0]["members"]] == ["facebook:horndaily", "twitter:horn_daily"]
+
+def test_handle_from_url_reads_the_user_id_from_facebook_url_shapes():
+    assert handle_from_url("https://www.facebook.com/horndaily") == "horndaily"
+    assert handle_from_url("https://www.facebook.com/profile.php?id=100012345") == "100012345"
+    assert handle_from_url("https://www.facebook.com/people/Abebe-Kebede/100067890/") == "100067890"
+    assert handle_from_url("https://www.facebook.com/groups/998877/user/100011111/") == "100011111"
+    assert handle_from_url("https://www.facebook.com/groups/998877/") is None
+    assert handle_from_url("N/A") is None
+
+def test_group_posters_stay_separate_authors():
+    index = AuthorIndex()
+    index.add_results("facebook", [
+        {"author_name": "Abebe Kebede", "author_url": "https://www.facebook.com/groups/998877/user/100011111/"},
+        {"author_name": "Sara Tesfaye", "author_url": "https://www.facebook.com/groups/998877/user/100022222/"},
+    ])
+    assert set(index.authors) == {"facebook:100011111", "facebook:100022222"}
+
+def test_common_handle_links_each_author_once():
+    index = AuthorIndex()
+    for i in range(50):
+        index.add(f"site{i}", "horn_news")
+    assert len(index._edges) == 49
+    assert len(index.clusters()[0]["members"]) == 50
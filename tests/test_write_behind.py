@@ -0,0 +1,44 @@
+import uuid
+from models import SearchResult
+from utils import metrics
+from utils.write_behind import WriteBehindWriter
+
+def _add(db, query):
+    return lambda: db.session.add(SearchResult(search_type="keyword", search_query=query, platform="Facebook"))
+
+def _fail():
+    raise RuntimeError("constraint violated")
+
+def test_jobs_are_committed_in_batches_and_a_bad_job_only_loses_itself(db):
+    metrics.reset()
+    writer = WriteBehindWriter(batch_size=10, flush_seconds=0.05)
+    query = uuid.uuid4().hex  # The test database is not dropped between tests
+    writer.submit(_add(db, query))
+    writer.submit(_fail, name="bad")
+    writer.submit(_add(db, query))
+
+    assert writer.flush(timeout=5)
+    db.session.remove()
+    assert SearchResult.query.filter_by(search_query=query).count() == 2
+    counters = metrics.snapshot()["counters"]
+    assert counters[("osint_db_commits_total", (("outcome", "failure"),))] == 1
+    assert counters[("osint_db_commits_total", (("outcome", "success"),))] == 2
+
+def test_flush_with_nothing_queued_returns_immediately():
+    assert WriteBehindWriter(flush_seconds=5).flush(timeout=1)
+
+def test_after_commit_steps_run_once_and_only_for_committed_jobs(db):
+    writer = WriteBehindWriter(batch_size=10, flush_seconds=0.05)
+    query = uuid.uuid4().hex
+    applied = []
+
+    def job(label, search_query):
+        def run():
+            db.session.add(SearchResult(search_type="keyword", search_query=search_query, platform="Facebook"))
+            return lambda: applied.append(label)
+        return run
+
+    writer.submit(job("good", query))
+    writer.submit(job("bad", None))  # NOT NULL violation: fails the batch, then fails again on its own
+    assert writer.flush(timeout=5)
+    assert applied == ["good"]  # the good job ran twice but applied its side effect once
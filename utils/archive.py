@@ -1,27 +1,61 @@
 
 import os
+import math
 import streamlit as st
 import datetime
-from utils.report import generate_html_report, generate_pdf_report
+from utils.report import submit_report
+from utils.archive_catalog import register_archive, search_archives, sync_catalog, ARCHIVE_TYPES
 
 EXPORT_DIR = "exports/"
+ARCHIVES_PER_PAGE = 50
 
-def save_current_export(results):
+def save_current_export(results, query=None):
+    """
+    Start rendering the HTML and PDF report in the background and return its ReportJob
+    right away; check `job.status` (or call `job.result()`) for the finished paths.
+    Both files are added to the archive catalogue once written.
+    """
     ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     html_path = f"{EXPORT_DIR}hornwatch_{ts}.html"
     pdf_path = f"{EXPORT_DIR}hornwatch_{ts}.pdf"
-    generate_html_report(results, html_path)
-    generate_pdf_report(html_path, pdf_path)
-    return html_path, pdf_path
+    result_count = len(results) if hasattr(results, "__len__") else None
+
+    def catalogue(job):
+        for path in (job.html_path, job.pdf_path):
+            register_archive(path, query=query, result_count=result_count)
+
+    return submit_report(results, html_path, pdf_path, on_done=catalogue)
 
 def list_archives():
     st.subheader("📦 Archive Manager")
-    files = sorted(os.listdir(EXPORT_DIR), reverse=True)
-    htmls = [f for f in files if f.endswith(".html")]
-    pdfs = [f for f in files if f.endswith(".pdf")]
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        search = st.text_input("Search archives (query, file name, platform)")
+    with col2:
+        kind = st.selectbox("Type", ["All"] + list(ARCHIVE_TYPES))
+    with col3:
+        if st.button("🔄 Rescan folder"):
+            added, removed = sync_catalog(EXPORT_DIR.rstrip("/"))
+            st.success(f"Catalogue updated: {added} added, {removed} removed.")
+
+    page = st.session_state.get("archive_page", 1)
+    rows, total = search_archives(search or None, None if kind == "All" else kind, page=page, per_page=ARCHIVES_PER_PAGE)
+    pages = max(1, math.ceil(total / ARCHIVES_PER_PAGE))
+    if page > pages:
+        page = pages
+        rows, total = search_archives(search or None, None if kind == "All" else kind, page=page, per_page=ARCHIVES_PER_PAGE)
 
-    for f in htmls:
-        st.markdown(f"- 📄 [{f}](./{EXPORT_DIR}{f})")
+    st.caption(f"{total} archives")
+    icons = {"html": "📄", "pdf": "📕", "csv": "📊", "json": "🧾"}
+    for row in rows:
+        name = os.path.basename(row["path"])
+        details = [row["created_at"][:16].replace("T", " ")]
+        if row["query"]:
+            details.append(row["query"])
+        if row["result_count"] is not None:
+            details.append(f"{row['result_count']} results")
+        details.append(f"{(row['size_bytes'] or 0) / 1024:.0f} KB")
+        st.markdown(f"- {icons.get(row['type'], '📁')} [{name}](./{row['path']}) — {' · '.join(details)}")
 
-    for f in pdfs:
-        st.markdown(f"- 📕 [{f}](./{EXPORT_DIR}{f})")
+    if pages > 1:
+        st.session_state["archive_page"] = st.number_input("Page", min_value=1, max_value=pages, value=page)
@@ -0,0 +1,150 @@
+
+import gzip
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+
+from utils.db_utils import DB_PATH
+
+ARCHIVE_TYPES = ("html", "pdf", "csv", "json", "parquet")
+# Compaction gzips text archives older than this; retention deletes archives older than this. 0 disables.
+ARCHIVE_COMPACT_AFTER_DAYS = int(os.environ.get("ARCHIVE_COMPACT_AFTER_DAYS", "30"))
+ARCHIVE_RETENTION_DAYS = int(os.environ.get("ARCHIVE_RETENTION_DAYS", "0"))
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_catalog():
+    with _connect() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archives (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                type TEXT NOT NULL,
+                size_bytes INTEGER,
+                query TEXT,
+                platform TEXT,
+                result_count INTEGER,
+                created_at TEXT NOT NULL,
+                compacted INTEGER DEFAULT 0
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_archives_created_at ON archives (created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_archives_type_created_at ON archives (type, created_at)")
+        conn.commit()
+
+def archive_type(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(name)[1].lstrip(".").lower()
+    return ext if ext in ARCHIVE_TYPES else None
+
+def register_archive(path, query=None, platform=None, result_count=None, created_at=None):
+    """Add or refresh a catalogue entry for a report/export that was just written."""
+    kind = archive_type(path)
+    if kind is None or not os.path.exists(path):
+        return
+    init_catalog()
+    created_at = created_at or datetime.utcnow()
+    with _connect() as conn:
+        conn.execute('''
+            INSERT INTO archives (path, type, size_bytes, query, platform, result_count, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                size_bytes = excluded.size_bytes,
+                query = COALESCE(excluded.query, archives.query),
+                platform = COALESCE(excluded.platform, archives.platform),
+                result_count = COALESCE(excluded.result_count, archives.result_count),
+                created_at = excluded.created_at,
+                compacted = 0
+        ''', (path, kind, os.path.getsize(path), query, platform, result_count, created_at.isoformat()))
+        conn.commit()
+
+def search_archives(search=None, kind=None, page=1, per_page=50):
+    """One page of catalogue entries, newest first. Returns (rows, total)."""
+    init_catalog()
+    clauses, params = [], []
+    if search:
+        clauses.append("(query LIKE ? OR path LIKE ? OR platform LIKE ?)")
+        params += [f"%{search}%"] * 3
+    if kind:
+        clauses.append("type = ?")
+        params.append(kind)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    page = max(1, page)
+    with _connect() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM archives {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM archives {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page],
+        ).fetchall()
+    return [dict(r) for r in rows], total
+
+def sync_catalog(export_dir="exports"):
+    """
+    Reconcile the catalogue with the export directory: register files written
+    before the catalogue existed and drop entries whose files are gone.
+    Returns (added, removed).
+    """
+    init_catalog()
+    with _connect() as conn:
+        known = {row["path"] for row in conn.execute("SELECT path FROM archives")}
+    on_disk = set()
+    added = 0
+    if os.path.isdir(export_dir):
+        for entry in os.scandir(export_dir):
+            if not entry.is_file() or archive_type(entry.name) is None:
+                continue
+            path = os.path.join(export_dir, entry.name)
+            on_disk.add(path)
+            if path not in known:
+                register_archive(path, created_at=datetime.utcfromtimestamp(entry.stat().st_mtime))
+                added += 1
+    missing = [p for p in known if p.startswith(export_dir.rstrip("/")) and p not in on_disk and not os.path.exists(p)]
+    with _connect() as conn:
+        conn.executemany("DELETE FROM archives WHERE path = ?", [(p,) for p in missing])
+        conn.commit()
+    return added, len(missing)
+
+def compact_archives(older_than_days=ARCHIVE_COMPACT_AFTER_DAYS):
+    """Gzip HTML/CSV/JSON archives older than the cutoff (PDFs are already compressed)."""
+    if not older_than_days:
+        return 0
+    init_catalog()
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, path FROM archives WHERE compacted = 0 AND type IN ('html', 'csv', 'json') AND created_at < ?",
+            (cutoff,),
+        ).fetchall()
+    compacted = 0
+    for row in rows:
+        path = row["path"]
+        if path.endswith(".gz") or not os.path.exists(path):
+            continue
+        with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+        with _connect() as conn:
+            conn.execute("UPDATE archives SET path = ?, size_bytes = ?, compacted = 1 WHERE id = ?",
+                         (path + ".gz", os.path.getsize(path + ".gz"), row["id"]))
+            conn.commit()
+        compacted += 1
+    return compacted
+
+def apply_retention(max_age_days=ARCHIVE_RETENTION_DAYS):
+    """Delete archives (files and entries) older than `max_age_days`."""
+    if not max_age_days:
+        return 0
+    init_catalog()
+    cutoff = (datetime.utcnow() - timedelta(days=max_age_days)).isoformat()
+    with _connect() as conn:
+        rows = conn.execute("SELECT id, path FROM archives WHERE created_at < ?", (cutoff,)).fetchall()
+        for row in rows:
+            if os.path.exists(row["path"]):
+                os.remove(row["path"])
+        conn.executemany("DELETE FROM archives WHERE id = ?", [(row["id"],) for row in rows])
+        conn.commit()
+    return len(rows)
@@ -1,30 +1,151 @@
 
 import json
 import time
+from datetime import datetime
 from utils.scraper_engine import run_scraper
-from utils.nlp_tools import enrich_results_with_nlp
-from utils.hate_speech import enrich_with_hate_speech
+from utils.nlp_tools import analyze_batch
+from utils.hate_speech import score_batch
 from utils.scraper_engine import export_enriched_results
+from utils.dedup import index_posts, count_new_posts, needs_enrichment, record_enrichment
+from utils.enrichment_batch import EnrichmentBatch
+from utils.post import analyzable_text
+from utils.graph_store import ingest_posts
+from utils.columnar_store import append_batch
+from utils import metrics
+
+def enrich_once(indexed, platform):
+    """
+    Enrich only posts that have never been enriched (one item per stored post) and
+    fill every other row from the stored post's cached enrichment.
+    `indexed` is the [(CollectedPost, item)] list returned by index_posts.
+    Returns (items, EnrichmentBatch) with one batch row per item.
+    """
+    batch = EnrichmentBatch(len(indexed))
+    pending = {}
+    for row, (post, item) in enumerate(indexed):
+        if needs_enrichment(post) and id(post) not in pending:
+            pending[id(post)] = (row, post, item)
+
+    rows = [row for row, _, _ in pending.values()]
+    if rows:
+        texts = [analyzable_text(item) for _, _, item in pending.values()]
+        with metrics.span("nlp_enrichment", platform=platform):
+            analyze_batch(texts, batch, rows)
+        with metrics.span("hate_speech_enrichment", platform=platform):
+            score_batch(texts, batch, rows)
+        for row, post, _ in pending.values():
+            record_enrichment(post, batch.row(row))
+
+    enriched_rows = set(rows)
+    for row, (post, _) in enumerate(indexed):
+        if row not in enriched_rows and post.enrichment:
+            batch.set_row(row, json.loads(post.enrichment))
+    print(f"🧠 Enriched {len(rows)} new posts, reused {len(indexed) - len(rows)} cached enrichments")
+    return [item for _, item in indexed], batch
+
+def enrich_pending(limit=500):
+    """
+    Enrich stored posts that were indexed without enrichment (interactive searches
+    only index), oldest first, and add them to the graph. Returns the number enriched.
+    """
+    from app import app, db
+    from models import CollectedPost
+
+    with app.app_context():
+        posts = (CollectedPost.query.filter(CollectedPost.enriched_at.is_(None))
+                 .order_by(CollectedPost.id).limit(limit).all())
+        by_platform = {}
+        for post in posts:
+            by_platform.setdefault(post.platform, []).append((post, post.to_dict()))
+        for platform, indexed in by_platform.items():
+            enrich_once(indexed, platform)
+        ingest_posts(posts)
+        db.session.commit()
+    return len(posts)
+
+def run_batch_job(job):
+    """
+    Scrape, index, enrich and export one batch job ({"platform", "query", ...}).
+    Optional "max_posts" and "time_budget" (seconds) let a job crawl deeper or run bounded.
+    Returns {"result_count", "new_post_count", "truncated"}, plus "circuit_open" when the
+    platform's circuit breaker skipped the scrape.
+    """
+    # The Flask app owns the DB session used by the post dedup index.
+    from app import app, db
+    from models import SearchResult
+
+    platform = job.get("platform")
+    query = job.get("query")
+
+    print(f"🔍 Running job for: {platform} → {query}")
+    with metrics.span("scrape", platform=platform):
+        scraped = run_scraper(query, job.get("search_type", "keyword"), platform,
+                              max_posts=job.get("max_posts"), time_budget=job.get("time_budget"))
+    results = scraped.get("results", [])
+
+    if scraped.get("circuit_open"):
+        print(f"⛔ Skipped {platform} → {query}: {scraped['status_detail']}")
+        return {"result_count": 0, "new_post_count": 0, "circuit_open": True}
+    truncated = bool(scraped.get("truncated"))
+    if truncated:
+        print(f"⏱️ {platform} → {query} hit its time budget; keeping the partial results")
+    if not results:
+        print(f"⚠️ No results for {platform} → {query}")
+        return {"result_count": 0, "new_post_count": 0, "truncated": truncated}
+
+    with app.app_context():
+        search_result = SearchResult(search_type="batch", search_query=query, platform=platform, status="success")
+        db.session.add(search_result)
+        indexed = index_posts(search_result, results, platform)
+        new_post_count = count_new_posts(indexed)
+        enriched, enrichment = enrich_once(indexed, platform)
+        ingest_posts([post for post, _ in indexed])
+        with metrics.span("db_commit", platform=platform):
+            db.session.commit()
+
+    with metrics.span("export", platform=platform):
+        export_file = export_enriched_results(enriched, query, platform, enrichment=enrichment)
+    print(f"✅ Exported to: {export_file}")
+    with metrics.span("dataset_append", platform=platform):
+        part_file = append_batch(enriched, query, platform, enrichment=enrichment)
+    print(f"📈 Appended run to trend dataset: {part_file}")
+    return {"result_count": len(results), "new_post_count": new_post_count, "truncated": truncated}
 
 def run_batch_from_config(config_file="batch_jobs.json"):
     with open(config_file, "r", encoding="utf-8") as f:
         jobs = json.load(f)
 
     for job in jobs:
-        platform = job.get("platform")
-        query = job.get("query")
-        delay = job.get("delay", 2)
-
-        print(f"🔍 Running job for: {platform} → {query}")
-        results = run_scraper(query, platform)
+        stats = run_batch_job(job)
+        if stats["result_count"]:
+            time.sleep(job.get("delay", 2))
 
-        if not results:
-            print(f"⚠️ No results for {platform} → {query}")
-            continue
+def run_scheduled_job(job):
+    """
+    Entry point for scheduler jobs: run one batch job and record it in JobRun.
+    Referenced by name from the persistent job store, so keep it importable here.
+    """
+    from app import app, db
+    from models import JobRun
 
-        enriched = enrich_results_with_nlp(results)
-        enriched = enrich_with_hate_speech(enriched)
-        export_file = export_enriched_results(enriched, query, platform)
-        print(f"✅ Exported to: {export_file}")
+    started_at = datetime.utcnow()
+    stats, error = {"result_count": 0, "new_post_count": 0}, None
+    try:
+        stats = run_batch_job(job)
+    except Exception as e:
+        error = e
+        print(f"❌ Job {job.get('id')} failed: {e}")
 
-        time.sleep(delay)
+    with app.app_context():
+        db.session.add(JobRun(
+            job_id=job["id"], platform=job.get("platform"), search_query=job.get("query"),
+            started_at=started_at, finished_at=datetime.utcnow(),
+            status="error" if error else ("circuit_open" if stats.get("circuit_open")
+                                          else "success" if stats["result_count"] else "no_results"),
+            result_count=stats["result_count"], new_post_count=stats["new_post_count"],
+            error=str(error) if error else None,
+        ))
+        db.session.commit()
+    if error:
+        raise error
+    return stats
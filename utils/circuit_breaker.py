@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+import logging
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed scrapes (login walls, checkpoints, timeouts, crashes) that open a platform's circuit.
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+# First cooldown before a recovery probe; doubled after every failed probe, up to the maximum.
+CIRCUIT_BASE_COOLDOWN_SECONDS = int(os.environ.get("CIRCUIT_BASE_COOLDOWN_SECONDS", "300"))
+CIRCUIT_MAX_COOLDOWN_SECONDS = int(os.environ.get("CIRCUIT_MAX_COOLDOWN_SECONDS", "3600"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-platform breaker. Closed: every scrape runs. After `failure_threshold` consecutive
+    failures it opens and scrapes are short-circuited with the last failure as their
+    status. Once the cooldown passes, a single probe scrape is let through (half-open):
+    success closes the circuit, failure reopens it with a doubled cooldown.
+    """
+
+    def __init__(self, platform, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 base_cooldown=CIRCUIT_BASE_COOLDOWN_SECONDS, max_cooldown=CIRCUIT_MAX_COOLDOWN_SECONDS,
+                 clock=time.monotonic):
+        self.platform = platform
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0  # consecutive openings, drives the backoff
+        self.retry_at = 0.0
+        self.last_failure = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a scrape may run now. In half-open state only the one probe is allowed."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() >= self.retry_at:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit for {self.platform} half-open: probing recovery.")
+                return True
+        metrics.inc("osint_circuit_short_circuits_total", platform=self.platform)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.platform} closed: probe succeeded.")
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            self.last_failure = None
+
+    def record_failure(self, reason):
+        with self._lock:
+            self.failures += 1
+            self.last_failure = reason
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._trip()
+
+    def cancel_probe(self):
+        """A probe that could not run (e.g. no browser profile) lets the next request probe instead."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self.retry_at = self.clock()
+
+    def _trip(self):
+        self.trips += 1
+        cooldown = min(self.base_cooldown * 2 ** (self.trips - 1), self.max_cooldown)
+        self.state = OPEN
+        self.retry_at = self.clock() + cooldown
+        metrics.inc("osint_circuit_trips_total", platform=self.platform)
+        logger.warning(f"Circuit for {self.platform} opened for {cooldown}s after "
+                       f"{self.failures} consecutive failures: {self.last_failure}")
+
+    def status_detail(self):
+        remaining = max(0, int(self.retry_at - self.clock()))
+        return (f"Skipped: {self.platform} circuit open after repeated failures "
+                f"(last: {self.last_failure}). Next probe in {remaining}s.")
+
+    def to_dict(self):
+        return {
+            "platform": self.platform,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "last_failure": self.last_failure,
+            "retry_in_seconds": max(0, int(self.retry_at - self.clock())) if self.state != CLOSED else 0,
+        }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(platform):
+    """Process-wide breaker for a platform (case-insensitive)."""
+    key = platform.lower()
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(key)
+        return _breakers[key]
+
+def breaker_states():
+    with _breakers_lock:
+        return [b.to_dict() for b in _breakers.values()]
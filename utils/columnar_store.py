@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.path.join("exports", "columnar")
+POSTS_FILE = "posts.parquet"
+ENTITIES_FILE = "entities.parquet"
+BATCH_SIZE = 50000
+
+# Columns copied onto every entity row so entity counts can be filtered without a join.
+ENTITY_FILTER_COLUMNS = ("platform", "topic", "sentiment", "toxicity", "first_seen")
+
+
+def _pa():
+    # pyarrow is a dashboard dependency (requirments.txt), not needed by the Flask app.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    return pa, pq
+
+
+def _schemas(pa):
+    posts = pa.schema([
+        ("id", pa.int64()),
+        ("platform", pa.dictionary(pa.int16(), pa.string())),
+        ("topic", pa.dictionary(pa.int16(), pa.string())),
+        ("sentiment", pa.float32()),
+        ("toxicity", pa.float32()),
+        ("first_seen", pa.timestamp("s")),
+        ("is_duplicate", pa.bool_()),
+        ("author_name", pa.string()),
+        ("author_url", pa.string()),
+        ("post_url", pa.string()),
+        ("text", pa.string()),
+    ])
+    entities = pa.schema([
+        ("post_id", pa.int64()),
+        ("entity", pa.string()),
+        ("label", pa.dictionary(pa.int16(), pa.string())),
+        ("platform", pa.dictionary(pa.int16(), pa.string())),
+        ("topic", pa.dictionary(pa.int16(), pa.string())),
+        ("sentiment", pa.float32()),
+        ("toxicity", pa.float32()),
+        ("first_seen", pa.timestamp("s")),
+    ])
+    return posts, entities
+
+
+def _flush(pa, writer, schema, rows):
+    if rows:
+        columns = {name: [row[name] for row in rows] for name in schema.names}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        rows.clear()
+
+
+def build_store_from_db(store_dir=STORE_DIR, batch_size=BATCH_SIZE):
+    """
+    Snapshot every collected post into typed Parquet files for the dashboard:
+    posts.parquet (one row per post) and entities.parquet (one row per entity
+    mention, pre-exploded). Streams in batches, so memory stays flat on large
+    databases, and swaps the files in atomically. Needs an app context.
+    Returns the number of posts written.
+    """
+    from models import db, CollectedPost
+
+    pa, pq = _pa()
+    posts_schema, entities_schema = _schemas(pa)
+    os.makedirs(store_dir, exist_ok=True)
+    posts_tmp = os.path.join(store_dir, POSTS_FILE + ".tmp")
+    entities_tmp = os.path.join(store_dir, ENTITIES_FILE + ".tmp")
+
+    count = 0
+    post_rows, entity_rows = [], []
+    query = db.session.query(
+        CollectedPost.id, CollectedPost.platform, CollectedPost.topic, CollectedPost.sentiment,
+        CollectedPost.toxicity, CollectedPost.first_seen, CollectedPost.duplicate_of_id,
+        CollectedPost.author_name, CollectedPost.author_url, CollectedPost.canonical_url,
+        CollectedPost.text, CollectedPost.enrichment,
+    ).order_by(CollectedPost.id).yield_per(batch_size)
+
+    with pq.ParquetWriter(posts_tmp, posts_schema, compression="zstd") as posts_writer, \
+            pq.ParquetWriter(entities_tmp, entities_schema, compression="zstd") as entities_writer:
+        for row in query:
+            post = {
+                "id": row.id, "platform": row.platform, "topic": row.topic, "sentiment": row.sentiment,
+                "toxicity": row.toxicity, "first_seen": row.first_seen, "is_duplicate": row.duplicate_of_id is not None,
+                "author_name": row.author_name, "author_url": row.author_url, "post_url": row.canonical_url,
+                "text": row.text,
+            }
+            post_rows.append(post)
+            entities = (json.loads(row.enrichment).get("entities") or []) if row.enrichment else []
+            for entity in entities:
+                name = entity.get("text") if isinstance(entity, dict) else str(entity)
+                if name:
+                    entity_rows.append(dict(
+                        {c: post[c] for c in ENTITY_FILTER_COLUMNS},
+                        post_id=row.id, entity=name.strip(),
+                        label=entity.get("label") if isinstance(entity, dict) else None,
+                    ))
+            count += 1
+            if len(post_rows) >= batch_size:
+                _flush(pa, posts_writer, posts_schema, post_rows)
+            if len(entity_rows) >= batch_size:
+                _flush(pa, entities_writer, entities_schema, entity_rows)
+        _flush(pa, posts_writer, posts_schema, post_rows)
+        _flush(pa, entities_writer, entities_schema, entity_rows)
+
+    os.replace(posts_tmp, os.path.join(store_dir, POSTS_FILE))
+    os.replace(entities_tmp, os.path.join(store_dir, ENTITIES_FILE))
+    logger.info(f"Columnar store rebuilt with {count} posts in {store_dir}")
+    return count
+
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, POSTS_FILE))
+
+
+def store_mtime(store_dir=STORE_DIR):
+    """Last modification time of the store; use it as the dashboard cache key."""
+    paths = [os.path.join(store_dir, name) for name in (POSTS_FILE, ENTITIES_FILE)]
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0.0)
+
+
+def _filter_expression(platform=None, topic=None, sentiment_range=None, min_toxicity=None):
+    import pyarrow.dataset as ds
+
+    clauses = []
+    if platform:
+        clauses.append(ds.field("platform") == platform.lower())
+    if topic:
+        clauses.append(ds.field("topic") == topic)
+    if sentiment_range is not None:
+        low, high = sentiment_range
+        in_range = (ds.field("sentiment") >= low) & (ds.field("sentiment") <= high)
+        # Posts without a score count as neutral, like the CSV view's fillna(0)
+        clauses.append(in_range | ds.field("sentiment").is_null() if low <= 0 <= high else in_range)
+    if min_toxicity:
+        clauses.append(ds.field("toxicity") >= min_toxicity)
+    expression = None
+    for clause in clauses:
+        expression = clause if expression is None else expression & clause
+    return expression
+
+
+def _dataset(name, store_dir):
+    import pyarrow.dataset as ds
+    return ds.dataset(os.path.join(store_dir, name), format="parquet")
+
+
+def count_posts(store_dir=STORE_DIR, **filters):
+    return _dataset(POSTS_FILE, store_dir).count_rows(filter=_filter_expression(**filters))
+
+
+def load_posts(columns=None, limit=None, store_dir=STORE_DIR, **filters):
+    """Filtered posts as a DataFrame; filtering happens while scanning, before pandas sees the rows."""
+    dataset = _dataset(POSTS_FILE, store_dir)
+    expression = _filter_expression(**filters)
+    if limit is not None:
+        table = dataset.head(limit, columns=columns, filter=expression)
+    else:
+        table = dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def _value_counts(table, column, top_n):
+    import pyarrow as pa
+    if pa.types.is_dictionary(table.schema.field(column).type):
+        # Row groups carry their own dictionaries; decode before grouping across them
+        table = table.set_column(table.schema.get_field_index(column), column, table[column].cast(pa.string()))
+    counts = table.group_by(column).aggregate([([], "count_all")]).sort_by([("count_all", "descending")])
+    if top_n is not None:
+        counts = counts.slice(0, top_n)
+    frame = counts.to_pandas()
+    frame[column] = frame[column].astype(str)
+    return frame.set_index(column)["count_all"].rename("count")
+
+
+def topic_counts(store_dir=STORE_DIR, **filters):
+    filters.pop("topic", None)  # the distribution is over all topics
+    table = _dataset(POSTS_FILE, store_dir).to_table(columns=["topic"], filter=_filter_expression(**filters))
+    return _value_counts(table.filter(table["topic"].is_valid()), "topic", None)
+
+
+def entity_counts(top_n=20, store_dir=STORE_DIR, **filters):
+    table = _dataset(ENTITIES_FILE, store_dir).to_table(columns=["entity"], filter=_filter_expression(**filters))
+    return _value_counts(table, "entity", top_n)
+
+
+def platforms(store_dir=STORE_DIR):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    table = _dataset(POSTS_FILE, store_dir).to_table(columns=["platform"])
+    return sorted(p for p in pc.unique(table["platform"].cast(pa.string())).to_pylist() if p)
+
+
+# --- Append-only batch dataset (one part file per batch run) ---------------
+
+DATASET_DIR = os.path.join("exports", "dataset")
+TOXIC_THRESHOLD = 0.5
+
+
+def _float_or_none(value):
+    try:
+        return None if value is None or value == "" else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _batch_schema(pa):
+    return pa.schema([
+        ("run_at", pa.timestamp("s")),
+        ("query", pa.string()),
+        ("topic", pa.string()),
+        ("sentiment", pa.float32()),
+        ("toxicity", pa.float32()),
+        ("author_name", pa.string()),
+        ("post_url", pa.string()),
+        ("entities", pa.list_(pa.string())),
+    ])
+
+
+def append_batch(results, query, platform, run_at=None, dataset_dir=DATASET_DIR, enrichment=None):
+    """
+    Append one batch run's enriched results to the dataset, partitioned as
+    platform=<platform>/date=<YYYY-MM-DD>/part-<run time>-<id>.parquet.
+    Files are never rewritten, so every run is kept for trend views. With the run's
+    EnrichmentBatch, topic, scores and entities are taken from its columns instead
+    of from keys on each item. Returns the path written, or None when there is
+    nothing to write.
+    """
+    import uuid
+    from datetime import datetime
+
+    if not results:
+        return None
+    pa, pq = _pa()
+    schema = _batch_schema(pa)
+    run_at = (run_at or datetime.utcnow()).replace(microsecond=0)
+    columns = {
+        "run_at": pa.array([run_at] * len(results), type=pa.timestamp("s")),
+        "query": pa.array([query] * len(results), type=pa.string()),
+        "author_name": [item.get("author_name") for item in results],
+        "post_url": [item.get("post_url") or item.get("url") for item in results],
+    }
+    if enrichment is not None:
+        enriched = enrichment.to_arrow(fields=("sentiment", "toxicity"))
+        for name in ("topic", "sentiment", "toxicity", "entities"):
+            columns[name] = enriched[name]
+        columns["topic"] = columns["topic"].cast(pa.string())
+    else:
+        columns["topic"] = [item.get("topic") for item in results]
+        columns["sentiment"] = [_float_or_none(item.get("sentiment")) for item in results]
+        columns["toxicity"] = [_float_or_none(item.get("toxicity")) for item in results]
+        columns["entities"] = [[e.get("text") if isinstance(e, dict) else str(e) for e in item.get("entities") or []]
+                               for item in results]
+    table = pa.Table.from_pydict({name: columns[name] for name in schema.names}, schema=schema)
+
+    partition = os.path.join(dataset_dir, f"platform={platform.lower()}", f"date={run_at:%Y-%m-%d}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"part-{run_at:%H%M%S}-{uuid.uuid4().hex[:8]}.parquet")
+    tmp_path = os.path.join(partition, "." + os.path.basename(path) + ".tmp")  # hidden from readers until complete
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+
+def dataset_mtime(dataset_dir=DATASET_DIR):
+    """Newest part file time; each run adds a file, so this changes exactly when data does."""
+    newest = 0.0
+    for root, _, files in os.walk(dataset_dir):
+        for name in files:
+            if name.endswith(".parquet"):
+                newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return newest
+
+
+def _batch_dataset(dataset_dir):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    partitioning = ds.partitioning(pa.schema([("platform", pa.string()), ("date", pa.string())]), flavor="hive")
+    return ds.dataset(dataset_dir, format="parquet", partitioning=partitioning, ignore_prefixes=[".", "_"])
+
+
+_FREQ_UNITS = {"H": ("hour", 1), "6H": ("hour", 6), "D": ("day", 1), "W": ("week", 1)}
+
+
+def trends(freq="D", platform=None, date_from=None, date_to=None, dataset_dir=DATASET_DIR):
+    """
+    Time series across batch runs, bucketed by `freq` ("H", "6H", "D" or "W").
+    Partition pruning on platform/date means only matching part files are read.
+    Returns (metrics, topics): metrics is indexed by bucket with posts, runs,
+    avg_sentiment, avg_toxicity and toxic_share; topics is bucket x topic post counts.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    if not os.path.isdir(dataset_dir):
+        return None, None
+    clauses = []
+    if platform:
+        clauses.append(ds.field("platform") == platform.lower())
+    if date_from:
+        clauses.append(ds.field("date") >= f"{date_from:%Y-%m-%d}")
+    if date_to:
+        clauses.append(ds.field("date") <= f"{date_to:%Y-%m-%d}")
+    expression = None
+    for clause in clauses:
+        expression = clause if expression is None else expression & clause
+
+    table = _batch_dataset(dataset_dir).to_table(
+        columns=["run_at", "topic", "sentiment", "toxicity"], filter=expression)
+    if not table.num_rows:
+        return None, None
+
+    unit, multiple = _FREQ_UNITS.get(freq, _FREQ_UNITS["D"])
+    bucket = pc.floor_temporal(table["run_at"], multiple=multiple, unit=unit)
+    toxic = pc.cast(pc.greater_equal(table["toxicity"], TOXIC_THRESHOLD), pa.int8())
+    table = table.append_column("bucket", bucket).append_column("toxic", toxic)
+
+    metrics = table.group_by("bucket").aggregate([
+        ([], "count_all"),
+        ("run_at", "count_distinct"),
+        ("sentiment", "mean"),
+        ("toxicity", "mean"),
+        ("toxic", "mean"),
+    ]).to_pandas().rename(columns={
+        "count_all": "posts", "run_at_count_distinct": "runs", "sentiment_mean": "avg_sentiment",
+        "toxicity_mean": "avg_toxicity", "toxic_mean": "toxic_share",
+    }).set_index("bucket").sort_index()
+
+    with_topic = table.filter(pc.is_valid(table["topic"]))
+    topics = with_topic.group_by(["bucket", "topic"]).aggregate([([], "count_all")]).to_pandas()
+    topics = topics.pivot(index="bucket", columns="topic", values="count_all").fillna(0).sort_index()
+    return metrics, topics
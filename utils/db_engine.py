@@ -0,0 +1,108 @@
+import csv
+import io
+import os
+import sqlite3
+import logging
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+# Connection pool per process (Postgres/MySQL). Each web worker, scheduler and queue
+# worker process holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+# SQLite: how long a writer waits for the database lock before "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# index_posts switches from ORM inserts to COPY on Postgres from this many new posts.
+BULK_INGEST_MIN_ROWS = int(os.environ.get("BULK_INGEST_MIN_ROWS", "50"))
+
+# JSON columns stored as JSONB on Postgres, each with a GIN index for containment queries.
+JSONB_COLUMNS = (("search_result", "result_data"), ("collected_post", "enrichment"))
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URI: a sized pool for servers, defaults for SQLite."""
+    options = {"pool_recycle": DB_POOL_RECYCLE, "pool_pre_ping": True}
+    if make_url(database_uri).get_backend_name() != "sqlite":
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+@event.listens_for(Engine, "connect")
+def _tune_sqlite(dbapi_connection, connection_record):
+    """
+    WAL lets readers (dashboard, API) run while a worker commits, and busy_timeout makes
+    concurrent writers queue for the lock instead of failing. synchronous=NORMAL is
+    durable under WAL except for the last commits on power loss.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA journal_mode = WAL")  # no-op ("memory") for in-memory databases
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+
+
+def ensure_postgres_storage(engine):
+    """
+    On Postgres, convert JSON text columns created before they were JSONB and add
+    their GIN indexes. Nothing to do on other databases.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table, column in JSONB_COLUMNS:
+            data_type = conn.execute(text(
+                "SELECT data_type FROM information_schema.columns WHERE table_name = :table AND column_name = :column"
+            ), {"table": table, "column": column}).scalar()
+            if data_type == "text":
+                logger.info(f"Converting {table}.{column} to jsonb")
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_gin ON {table} USING GIN ({column} jsonb_path_ops)"
+            ))
+
+
+def supports_copy(connection):
+    return connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+
+
+def _csv_value(value):
+    return r"\N" if value is None else value
+
+
+def copy_insert(connection, table, rows, conflict_column=None):
+    """
+    Bulk insert `rows` (dicts keyed by column name) with COPY on a psycopg2 connection.
+    Rows go into a temporary table first and are then inserted in one statement, so
+    rows whose `conflict_column` already exists (e.g. stored by another worker since
+    they were looked up) are skipped instead of aborting the COPY. Runs in the
+    connection's current transaction. Returns the number of rows inserted.
+    """
+    if not rows:
+        return 0
+    columns = [c.name for c in table.columns if c.name in rows[0]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[c]) for c in columns])
+    buffer.seek(0)
+
+    column_list = ", ".join(columns)
+    staging = f"_copy_{table.name}"
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        # Only the copied columns, so the staging rows don't draw ids from the table's sequence.
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {column_list} FROM {table.name} WITH NO DATA")
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        conflict = f" ON CONFLICT ({conflict_column}) DO NOTHING" if conflict_column else ""
+        cursor.execute(f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {staging}{conflict}")
+        return cursor.rowcount
+    finally:
+        cursor.close()
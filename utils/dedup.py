@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import re
+from collections.abc import Mapping
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import inspect, or_
+
+from models import db, CollectedPost, SearchResultPost
+from utils.user_correlation import update_author_index
+from utils.post import analyzable_text
+from utils.db_engine import BULK_INGEST_MIN_ROWS, supports_copy, copy_insert
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track how a link was shared, never which post it is.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "igshid", "mibextid", "rdid", "ref", "refid", "ref_src", "ref_url",
+    "share_url", "sfnsn", "s", "t", "si", "feature", "from", "source", "src", "comment_id",
+    "notif_id", "notif_t", "acontext", "paipv", "eav", "hc_ref", "hc_location", "fref", "__xts__",
+}
+TRACKING_PREFIXES = ("utm_", "__cft__", "__tn__", "__xts__")
+
+# Mobile/alternate hosts that serve the same content as the canonical host.
+HOST_ALIASES = {
+    "m.facebook.com": "www.facebook.com",
+    "mbasic.facebook.com": "www.facebook.com",
+    "web.facebook.com": "www.facebook.com",
+    "facebook.com": "www.facebook.com",
+    "mobile.twitter.com": "twitter.com",
+    "x.com": "twitter.com",
+    "m.youtube.com": "www.youtube.com",
+    "youtube.com": "www.youtube.com",
+    "instagram.com": "www.instagram.com",
+}
+
+# Posts whose SimHashes differ in at most this many bits are treated as reposts.
+NEAR_DUPLICATE_MAX_DISTANCE = 3
+# Below this many tokens a SimHash is too coarse to call two posts near-duplicates.
+NEAR_DUPLICATE_MIN_TOKENS = 8
+
+# Fields the enrichers add to a post; cached on CollectedPost so a post is enriched once.
+ENRICHMENT_FIELDS = (
+    "sentiment", "entities", "topic",
+    "toxicity", "severe_toxicity", "obscene", "threat", "insult", "identity_attack", "identity_hate",
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def canonicalize_url(url):
+    """
+    Normalize a post URL so the same post always maps to the same string:
+    lowercased scheme/host, mobile hosts folded, tracking params and fragments
+    dropped, remaining params sorted and trailing slashes removed.
+    Returns None for empty or placeholder ("N/A") URLs.
+    """
+    if not url or url == "N/A":
+        return None
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return None
+    host = parts.netloc.lower()
+    host = HOST_ALIASES.get(host, host)
+    params = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=False)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(sorted(params)), ""))
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def simhash(text, bits=64):
+    """64-bit SimHash over word unigrams and bigrams of the text."""
+    tokens = _tokens(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    weights = [0] * bits
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if (h >> i) & 1 else -1
+    value = 0
+    for i, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << i
+    return value
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def _to_signed64(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned64(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def simhash_bands(value):
+    """Split a 64-bit SimHash into four 16-bit bands for indexed candidate lookup."""
+    return [(value >> (16 * i)) & 0xFFFF for i in range(4)]
+
+
+def make_post_key(platform, canonical_url, text):
+    basis = canonical_url or "text:" + " ".join(_tokens(text))
+    return hashlib.sha256(f"{platform.lower()}|{basis}".encode("utf-8")).hexdigest()
+
+
+def find_near_duplicate(platform, value):
+    """Return an existing original post whose SimHash is within NEAR_DUPLICATE_MAX_DISTANCE bits."""
+    bands = simhash_bands(value)
+    candidates = CollectedPost.query.filter(
+        CollectedPost.platform == platform,
+        CollectedPost.duplicate_of_id.is_(None),
+        or_(
+            CollectedPost.simhash_band0 == bands[0],
+            CollectedPost.simhash_band1 == bands[1],
+            CollectedPost.simhash_band2 == bands[2],
+            CollectedPost.simhash_band3 == bands[3],
+        ),
+    ).limit(200)
+    for candidate in candidates:
+        if hamming_distance(_to_unsigned64(candidate.simhash), value) <= NEAR_DUPLICATE_MAX_DISTANCE:
+            return candidate
+    return None
+
+
+def _new_post(platform, key, canonical_url, text, item, hash_value):
+    bands = simhash_bands(hash_value)
+    post = CollectedPost(
+        platform=platform,
+        post_key=key,
+        canonical_url=canonical_url,
+        simhash=_to_signed64(hash_value),
+        simhash_band0=bands[0],
+        simhash_band1=bands[1],
+        simhash_band2=bands[2],
+        simhash_band3=bands[3],
+        text=text or None,
+        author_name=item.get("author_name") or item.get("username") or item.get("user"),
+        author_url=item.get("author_url"),
+        posted_at_text=item.get("timestamp") or item.get("time"),
+        media_urls=json.dumps(item.get("media_urls") or []),
+    )
+    if len(_tokens(text)) >= NEAR_DUPLICATE_MIN_TOKENS:
+        original = find_near_duplicate(platform, hash_value)
+        if original is not None:
+            post.duplicate_of = original
+            # Reposts share the original's enrichment instead of being enriched again.
+            post.enrichment = original.enrichment
+            post.enriched_at = original.enriched_at
+            if original.enrichment:
+                _copy_enrichment_columns(post, json.loads(original.enrichment))
+    return post
+
+
+def index_posts(search_result, items, platform, update_authors=True):
+    """
+    Store each scraped item once in CollectedPost and link it to `search_result`.
+    Existing posts (same canonical URL, or same text when there is no URL) are
+    reused; new posts that are near-duplicates of an existing one point at it via
+    duplicate_of. Returns [(CollectedPost, item)] in input order. Does not commit.
+    With update_authors=False the in-memory author index is left to the caller,
+    e.g. to update it only once the posts are committed.
+    """
+    platform = (platform or "unknown").lower()
+    prepared = []
+    for item in items:
+        if not isinstance(item, Mapping) or "error" in item:
+            continue
+        text = analyzable_text(item)
+        canonical_url = canonicalize_url(item.get("post_url") or item.get("url"))
+        prepared.append((make_post_key(platform, canonical_url, text), canonical_url, text, item))
+
+    keys = {key for key, _, _, _ in prepared}
+    known = {}
+    if keys:
+        known = {p.post_key: p for p in CollectedPost.query.filter(CollectedPost.post_key.in_(keys))}
+
+    now = datetime.utcnow()
+    linked_ids = set()
+    indexed = []
+    new_items = []
+    new_posts = []
+    with db.session.no_autoflush:
+        for key, canonical_url, text, item in prepared:
+            post = known.get(key)
+            if post is None:
+                post = _new_post(platform, key, canonical_url, text, item, simhash(text))
+                post.first_seen = now
+                known[key] = post
+                new_items.append(item)
+                new_posts.append(post)
+            indexed.append((post, item))
+        if new_posts and len(new_posts) >= BULK_INGEST_MIN_ROWS and supports_copy(db.session.connection()):
+            stored = _copy_new_posts(new_posts)
+            indexed = [(stored.get(post.post_key, post), item) for post, item in indexed]
+        else:
+            db.session.add_all(new_posts)
+        for post, item in indexed:
+            post.last_seen = now
+            if id(post) not in linked_ids:
+                linked_ids.add(id(post))
+                search_result.post_links.append(SearchResultPost(post=post, position=len(search_result.post_links)))
+    if update_authors:
+        # Keep the identity correlation index current without rebuilding it.
+        update_author_index(platform, new_items)
+    new_count = len(new_items)
+    logger.info(f"Indexed {len(indexed)} {platform} items: {new_count} new posts, {len(indexed) - new_count} already stored.")
+    return indexed
+
+
+def _copy_new_posts(posts):
+    """
+    Insert new posts with COPY (Postgres) instead of one ORM INSERT each, then load
+    them back. Returns {post_key: CollectedPost}.
+    """
+    table = CollectedPost.__table__
+    rows = []
+    for post in posts:
+        row = {c.name: getattr(post, c.key) for c in table.columns if c.name != "id"}
+        row["duplicate_of_id"] = post.duplicate_of.id if post.duplicate_of is not None else None
+        rows.append(row)
+    inserted = copy_insert(db.session.connection(), table, rows, conflict_column="post_key")
+    logger.info(f"Bulk-ingested {inserted} new posts with COPY.")
+    keys = [post.post_key for post in posts]
+    return {p.post_key: p for p in CollectedPost.query.filter(CollectedPost.post_key.in_(keys))}
+
+
+def _is_new(post):
+    return inspect(post).pending or post.first_seen == post.last_seen
+
+def count_new_posts(indexed):
+    """Posts in an index_posts() result that were stored for the first time by that call."""
+    return len({id(post) for post, _ in indexed if _is_new(post)})
+
+def new_post_items(indexed):
+    """The scraped items behind the posts an index_posts() result stored for the first time."""
+    seen = set()
+    items = []
+    for post, item in indexed:
+        if _is_new(post) and id(post) not in seen:
+            seen.add(id(post))
+            items.append(item)
+    return items
+
+
+def needs_enrichment(post):
+    return post.enriched_at is None
+
+
+def apply_cached_enrichment(post, item):
+    """Copy a previously computed enrichment from the stored post onto a fresh item."""
+    if post.enrichment:
+        item.update(json.loads(post.enrichment))
+    return item
+
+
+def record_enrichment(post, item):
+    """Cache the enrichment fields of `item` on the stored post."""
+    fields = {k: item[k] for k in ENRICHMENT_FIELDS if k in item}
+    post.enrichment = json.dumps(fields, default=float)
+    post.enriched_at = datetime.utcnow()
+    _copy_enrichment_columns(post, fields)
+
+
+def _copy_enrichment_columns(post, fields):
+    post.topic = fields.get("topic")
+    post.sentiment = float(fields["sentiment"]) if fields.get("sentiment") is not None else None
+    post.toxicity = float(fields["toxicity"]) if fields.get("toxicity") is not None else None
+    entities = fields.get("entities") or []
+    post.entities_text = " ".join(e["text"] if isinstance(e, dict) else str(e) for e in entities) or None
@@ -0,0 +1,169 @@
+import numpy as np
+
+# Per-post scores, one float32 column each; NaN means "not scored".
+SCORE_FIELDS = (
+    "sentiment", "toxicity", "severe_toxicity", "obscene", "threat", "insult", "identity_attack", "identity_hate",
+)
+
+
+class _Vocabulary:
+    """Interned strings: each distinct value is stored once and referenced by its index."""
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def id(self, value):
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class EnrichmentBatch:
+    """
+    Enrichment for `size` posts, stored as columns rather than as keys on every item.
+    Scores are float32 arrays; entities use an offsets layout (the entities of row i
+    are entity_ids[entity_offsets[i]:entity_offsets[i + 1]]) into a vocabulary shared
+    by the whole batch, and labels/topics are dictionary codes. Exporters hand the
+    columns to Arrow as-is; row(i) gives the dict form cached on the stored post.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.scores = {}
+        self.entity_names = _Vocabulary()
+        self.labels = _Vocabulary()
+        self.topics = _Vocabulary()
+        self.topic_ids = np.full(size, -1, dtype=np.int16)  # -1: no topic
+        self._entities = {}  # row -> [(entity id, label id)], packed into offsets on first read
+        self._packed = None
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """The float32 column for a score field, created (all NaN) on first use."""
+        if name not in self.scores:
+            self.scores[name] = np.full(self.size, np.nan, dtype=np.float32)
+        return self.scores[name]
+
+    def set_scores(self, name, values, rows=None):
+        """Write `values` into column `name` at `rows` (default: the first len(values) rows)."""
+        values = np.asarray(values, dtype=np.float32)
+        column = self.column(name)
+        if rows is None:
+            column[:len(values)] = values
+        else:
+            column[np.asarray(rows, dtype=np.int64)] = values
+
+    def set_entities(self, row, entities):
+        """Entities of one row, as (text, label) pairs or {"text", "label"} dicts."""
+        pairs = []
+        for entity in entities:
+            text, label = (entity.get("text"), entity.get("label")) if isinstance(entity, dict) else entity
+            if text:
+                pairs.append((self.entity_names.id(text), self.labels.id(label or "")))
+        self._entities[row] = pairs
+        self._packed = None
+
+    def set_topic(self, row, topic):
+        self.topic_ids[row] = -1 if topic is None else self.topics.id(topic)
+
+    def set_row(self, row, fields):
+        """Fill one row from an enrichment dict (e.g. the JSON cached on a stored post)."""
+        for name in SCORE_FIELDS:
+            value = fields.get(name)
+            if value is not None:
+                self.column(name)[row] = value
+        if "entities" in fields:
+            self.set_entities(row, fields["entities"] or [])
+        if fields.get("topic") is not None:
+            self.set_topic(row, fields["topic"])
+
+    def _pack(self):
+        if self._packed is None:
+            counts = np.zeros(self.size + 1, dtype=np.int64)
+            for row, pairs in self._entities.items():
+                counts[row + 1] = len(pairs)
+            offsets = np.cumsum(counts)
+            entity_ids = np.empty(offsets[-1], dtype=np.int32)
+            label_ids = np.empty(offsets[-1], dtype=np.int16)
+            for row, pairs in self._entities.items():
+                if pairs:
+                    entity_ids[offsets[row]:offsets[row + 1]], label_ids[offsets[row]:offsets[row + 1]] = zip(*pairs)
+            self._packed = offsets, entity_ids, label_ids
+        return self._packed
+
+    @property
+    def entity_offsets(self):
+        return self._pack()[0]
+
+    @property
+    def entity_ids(self):
+        return self._pack()[1]
+
+    @property
+    def label_ids(self):
+        return self._pack()[2]
+
+    def entities(self, row):
+        """[(text, label)] for one row."""
+        offsets, entity_ids, label_ids = self._pack()
+        start, end = offsets[row], offsets[row + 1]
+        return [(self.entity_names.values[e], self.labels.values[l])
+                for e, l in zip(entity_ids[start:end].tolist(), label_ids[start:end].tolist())]
+
+    def entity_strings(self, row):
+        """Entities of one row formatted as "text (label)", as the CSV export writes them."""
+        return [f"{text} ({label})" for text, label in self.entities(row)]
+
+    def row(self, row):
+        """One row as the enrichment dict the rest of the pipeline stores (floats, entity dicts)."""
+        fields = {}
+        for name, column in self.scores.items():
+            if not np.isnan(column[row]):
+                # Shortest repr of the float32 value, so 0.3 is stored as 0.3 rather than 0.30000001192092896
+                fields[name] = float(str(column[row]))
+        if row in self._entities:
+            fields["entities"] = [{"text": text, "label": label} for text, label in self.entities(row)]
+        if self.topic_ids[row] >= 0:
+            fields["topic"] = self.topics.values[self.topic_ids[row]]
+        return fields
+
+    def apply_to(self, items):
+        """Copy each row onto the matching item, for callers that still want enriched dicts."""
+        for row, item in enumerate(items):
+            item.update(self.row(row))
+        return items
+
+    @property
+    def nbytes(self):
+        offsets, entity_ids, label_ids = self._pack()
+        return (sum(c.nbytes for c in self.scores.values()) + self.topic_ids.nbytes
+                + offsets.nbytes + entity_ids.nbytes + label_ids.nbytes)
+
+    def _arrow_column(self, pa, name):
+        column = self.scores.get(name)
+        if column is None:
+            return pa.nulls(self.size, pa.float32())
+        return pa.array(column, type=pa.float32(), mask=np.isnan(column))
+
+    def to_arrow(self, fields=SCORE_FIELDS):
+        """
+        The batch as a pyarrow Table: float32 score columns (NaN as null), "topic" as a
+        dictionary column and "entities" as list<string> built straight from the offsets.
+        """
+        import pyarrow as pa
+
+        offsets, entity_ids, _ = self._pack()
+        names = pa.array(self.entity_names.values, type=pa.string())
+        entities = pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)),
+                                            pa.DictionaryArray.from_arrays(pa.array(entity_ids), names).dictionary_decode())
+        topics = pa.DictionaryArray.from_arrays(
+            pa.array(self.topic_ids, mask=self.topic_ids < 0), pa.array(self.topics.values, type=pa.string()))
+        columns = {name: self._arrow_column(pa, name) for name in fields}
+        columns["topic"] = topics
+        columns["entities"] = entities
+        return pa.table(columns)
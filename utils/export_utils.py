@@ -2,6 +2,8 @@
 import csv
 import json
 import os
+from utils.archive_catalog import register_archive
+from utils.post import json_default
 
 EXPORT_DIR = "exports"
 os.makedirs(EXPORT_DIR, exist_ok=True)
@@ -9,7 +11,8 @@ os.makedirs(EXPORT_DIR, exist_ok=True)
 def export_to_json(results, filename):
     path = os.path.join(EXPORT_DIR, f"{filename}.json")
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+        json.dump(results, f, indent=2, ensure_ascii=False, default=json_default)
+    register_archive(path, query=filename, result_count=len(results))
     return path
 
 def export_to_csv(results, filename):
@@ -28,4 +31,5 @@ def export_to_csv(results, filename):
                     "html": entry.get("html", ""),
                     "screenshot": entry.get("screenshot", "")
                 })
+    register_archive(path, query=filename, result_count=sum(len(entry.get("results", [])) for entry in results))
     return path
@@ -0,0 +1,370 @@
+import json
+import logging
+import math
+import random
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import or_, tuple_, update
+
+from models import db, CollectedPost, GraphNode, GraphEdge
+from utils.user_correlation import handle_from_url
+from utils import metrics
+
+try:
+    import networkx as nx
+except ImportError:  # layouts fall back to neighbour placement
+    nx = None
+
+logger = logging.getLogger(__name__)
+
+NODE_KINDS = ("user", "entity", "topic")
+PAGERANK_DAMPING = 0.85
+PAGERANK_ITERATIONS = 30
+# Above this many nodes a full spring layout is too slow even for a background job;
+# only nodes without a position are placed.
+FULL_LAYOUT_MAX_NODES = 20000
+INGEST_BATCH_SIZE = 500
+# Ids per IN (...) query, below SQLite's bind-parameter limit.
+ID_CHUNK_SIZE = 900
+
+
+def _user_spec(post):
+    # The account's own id (a group poster's user id, not the group), else its display name
+    handle = handle_from_url(post.author_url) or post.author_name
+    if not handle or handle == "N/A":
+        return None
+    label = post.author_name if post.author_name and post.author_name != "N/A" else handle
+    return ("user", f"{post.platform}:{handle.lower()}"[:255], label[:255], post.platform)
+
+
+def _post_specs(post):
+    """(kind, key, label, platform) of the user, topic and entities a post connects."""
+    user = _user_spec(post)
+    if user is None:
+        return None, []
+    enrichment = json.loads(post.enrichment) if post.enrichment else {}
+    linked = []
+    topic = enrichment.get("topic")
+    if topic:
+        linked.append(("topic", str(topic).strip().lower()[:255], str(topic)[:255], None))
+    for entity in enrichment.get("entities") or []:
+        name = (entity.get("text") if isinstance(entity, dict) else str(entity)).strip()
+        if name:
+            linked.append(("entity", " ".join(name.lower().split())[:255], name[:255], None))
+    return user, list(dict.fromkeys(linked))
+
+
+def _get_or_create_nodes(specs, now):
+    """Map (kind, key) -> GraphNode for every spec, inserting missing nodes in one flush."""
+    nodes = {}
+    by_kind = defaultdict(set)
+    for kind, key, _, _ in specs:
+        by_kind[kind].add(key)
+    for kind, keys in by_kind.items():
+        for chunk in _chunks(list(keys)):
+            for node in GraphNode.query.filter(GraphNode.kind == kind, GraphNode.key.in_(chunk)):
+                nodes[(kind, node.key)] = node
+    for kind, key, label, platform in specs:
+        if (kind, key) not in nodes:
+            node = GraphNode(kind=kind, key=key, label=label, platform=platform, post_count=0,
+                             degree=0, centrality=0.0, first_seen=now)
+            db.session.add(node)
+            nodes[(kind, key)] = node
+    db.session.flush()
+    return nodes
+
+
+def ingest_posts(posts):
+    """
+    Add enriched posts to the graph: user-topic and user-entity edges, weighted by
+    the number of posts. Each post is ingested once (CollectedPost.graphed_at).
+    Degree and centrality are left to refresh_metrics(). Does not commit.
+    """
+    pending = [p for p in posts if p.graphed_at is None and p.enriched_at is not None]
+    if not pending:
+        return 0
+    now = datetime.utcnow()
+    per_post = []
+    specs = set()
+    for post in pending:
+        user, linked = _post_specs(post)
+        post.graphed_at = now
+        if user is None:
+            continue
+        per_post.append((user, linked))
+        specs.add(user)
+        specs.update(linked)
+
+    with metrics.span("graph_ingest"):
+        nodes = _get_or_create_nodes(specs, now)
+        weights = defaultdict(int)
+        for user, linked in per_post:
+            user_node = nodes[user[:2]]
+            user_node.post_count = (user_node.post_count or 0) + 1
+            user_node.last_seen = now
+            for spec in linked:
+                other = nodes[spec[:2]]
+                other.post_count = (other.post_count or 0) + 1
+                other.last_seen = now
+                weights[tuple(sorted((user_node.id, other.id)))] += 1
+
+        if weights:
+            existing = {}
+            # Two bind parameters per pair, so half a chunk of pairs per query
+            for chunk in _chunks(list(weights), ID_CHUNK_SIZE // 2):
+                for e in GraphEdge.query.filter(tuple_(GraphEdge.source_id, GraphEdge.target_id).in_(chunk)):
+                    existing[(e.source_id, e.target_id)] = e
+            for (source_id, target_id), weight in weights.items():
+                edge = existing.get((source_id, target_id))
+                if edge is None:
+                    db.session.add(GraphEdge(source_id=source_id, target_id=target_id, weight=weight, last_seen=now))
+                else:
+                    edge.weight += weight
+                    edge.last_seen = now
+    logger.info(f"Graph ingest: {len(per_post)} posts, {len(weights)} edges touched.")
+    return len(per_post)
+
+
+def ingest_pending(batch_size=INGEST_BATCH_SIZE):
+    """Backfill: ingest every enriched post not yet in the graph, committing per batch."""
+    total = 0
+    while True:
+        batch = (CollectedPost.query
+                 .filter(CollectedPost.graphed_at.is_(None), CollectedPost.enriched_at.isnot(None))
+                 .limit(batch_size).all())
+        if not batch:
+            return total
+        total += ingest_posts(batch)
+        db.session.commit()
+
+
+def _load_adjacency():
+    adjacency = defaultdict(dict)
+    rows = db.session.query(GraphEdge.source_id, GraphEdge.target_id, GraphEdge.weight).yield_per(10000)
+    for source_id, target_id, weight in rows:
+        adjacency[source_id][target_id] = weight
+        adjacency[target_id][source_id] = weight
+    return adjacency
+
+
+def _pagerank(node_ids, adjacency):
+    n = len(node_ids)
+    if not n:
+        return {}
+    rank = dict.fromkeys(node_ids, 1.0 / n)
+    strength = {node: sum(adjacency[node].values()) for node in node_ids}
+    for _ in range(PAGERANK_ITERATIONS):
+        dangling = sum(rank[node] for node in node_ids if not strength[node])
+        base = (1 - PAGERANK_DAMPING) / n + PAGERANK_DAMPING * dangling / n
+        new_rank = dict.fromkeys(node_ids, base)
+        for node in node_ids:
+            if strength[node]:
+                share = PAGERANK_DAMPING * rank[node] / strength[node]
+                for neighbour, weight in adjacency[node].items():
+                    new_rank[neighbour] += share * weight
+        rank = new_rank
+    return rank
+
+
+def refresh_metrics():
+    """Recompute degree and PageRank centrality for every node. Meant for a background job."""
+    with metrics.span("graph_metrics"):
+        node_ids = [node_id for (node_id,) in db.session.query(GraphNode.id)]
+        adjacency = _load_adjacency()
+        rank = _pagerank(node_ids, adjacency)
+        db.session.execute(update(GraphNode), [
+            {"id": node_id, "degree": len(adjacency.get(node_id, ())), "centrality": rank.get(node_id, 0.0)}
+            for node_id in node_ids
+        ])
+        db.session.commit()
+    logger.info(f"Graph metrics refreshed for {len(node_ids)} nodes.")
+    return len(node_ids)
+
+
+def _place_near_neighbours(positions, pending, adjacency):
+    # Put each new node next to its already-placed neighbours, or on the outer ring.
+    radius = max((math.hypot(x, y) for x, y in positions.values()), default=1.0) or 1.0
+    for node_id in pending:
+        placed = [positions[n] for n in adjacency.get(node_id, ()) if n in positions]
+        if placed:
+            x = sum(p[0] for p in placed) / len(placed) + random.uniform(-0.05, 0.05) * radius
+            y = sum(p[1] for p in placed) / len(placed) + random.uniform(-0.05, 0.05) * radius
+        else:
+            angle = random.uniform(0, 2 * math.pi)
+            x, y = radius * 1.1 * math.cos(angle), radius * 1.1 * math.sin(angle)
+        positions[node_id] = (x, y)
+
+
+def refresh_layout(full=False):
+    """
+    Update cached node positions. By default only nodes without a position are
+    placed (existing nodes stay put, so the picture is stable between refreshes);
+    full=True re-runs the spring layout seeded with the cached positions.
+    """
+    with metrics.span("graph_layout"):
+        rows = db.session.query(GraphNode.id, GraphNode.x, GraphNode.y).all()
+        positions = {node_id: (x, y) for node_id, x, y in rows if x is not None and y is not None}
+        pending = [node_id for node_id, x, y in rows if x is None or y is None]
+        if not pending and not full:
+            return 0
+        adjacency = _load_adjacency()
+
+        if nx is not None and len(rows) <= FULL_LAYOUT_MAX_NODES:
+            G = nx.Graph()
+            G.add_nodes_from(node_id for node_id, _, _ in rows)
+            G.add_weighted_edges_from((s, t, w) for s, targets in adjacency.items() for t, w in targets.items() if s < t)
+            placed = list(positions)
+            _place_near_neighbours(positions, pending, adjacency)  # seed for the spring layout
+            fixed = None if full or not placed else placed
+            layout = nx.spring_layout(G, pos=positions, fixed=fixed, iterations=50 if full else 20, seed=42)
+            positions = {node_id: (float(x), float(y)) for node_id, (x, y) in layout.items()}
+            changed = list(positions) if full else pending
+        else:
+            _place_near_neighbours(positions, pending, adjacency)
+            changed = pending
+
+        db.session.execute(update(GraphNode), [
+            {"id": node_id, "x": positions[node_id][0], "y": positions[node_id][1]} for node_id in changed
+        ])
+        db.session.commit()
+    logger.info(f"Graph layout refreshed for {len(changed)} nodes.")
+    return len(changed)
+
+
+def refresh_graph(full_layout=False):
+    """Background maintenance: backfill ingest, then metrics, then cached layout."""
+    ingested = ingest_pending()
+    refresh_metrics()
+    refresh_layout(full=full_layout)
+    return ingested
+
+
+def find_nodes(term, kind=None, limit=20):
+    """Nodes whose label contains `term`, most central first."""
+    query = GraphNode.query.filter(GraphNode.label.ilike(f"%{term}%"))
+    if kind:
+        query = query.filter(GraphNode.kind == kind)
+    return query.order_by(GraphNode.centrality.desc()).limit(limit).all()
+
+
+def top_nodes(limit=500, kinds=None):
+    """The `limit` most central nodes, optionally only of the given `kinds`."""
+    query = GraphNode.query
+    if kinds:
+        query = query.filter(GraphNode.kind.in_(kinds))
+    return query.order_by(GraphNode.centrality.desc()).limit(limit).all()
+
+
+def _chunks(values, size=ID_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def neighbourhood(node_ids, hops=1, max_nodes=500, kinds=None):
+    """
+    Breadth-first k-hop neighbourhood of `node_ids`, expanding along the heaviest
+    edges first until `max_nodes` is reached. `kinds` restricts which node kinds
+    are added (the start nodes are always included).
+    Returns {"nodes": [GraphNode], "edges": [(source_id, target_id, weight)]}.
+    """
+    selected = set(node_ids)
+    frontier = set(node_ids)
+    for _ in range(hops):
+        if not frontier or len(selected) >= max_nodes:
+            break
+        rows = []
+        for chunk in _chunks(list(frontier)):
+            rows.extend(db.session.query(GraphEdge.source_id, GraphEdge.target_id, GraphEdge.weight)
+                        .filter(or_(GraphEdge.source_id.in_(chunk), GraphEdge.target_id.in_(chunk)))
+                        .order_by(GraphEdge.weight.desc())
+                        .limit(max_nodes * 10))
+        rows.sort(key=lambda row: -row[2])
+        candidates = []
+        for source_id, target_id, _ in rows:
+            other = target_id if source_id in frontier else source_id
+            if other not in selected:
+                candidates.append(other)
+        candidates = list(dict.fromkeys(candidates))
+        if kinds and candidates:
+            allowed = set()
+            for chunk in _chunks(candidates):
+                allowed.update(node_id for (node_id,) in db.session.query(GraphNode.id)
+                               .filter(GraphNode.id.in_(chunk), GraphNode.kind.in_(kinds)))
+            candidates = [c for c in candidates if c in allowed]
+        frontier = set(candidates[:max_nodes - len(selected)])
+        selected |= frontier
+    return subgraph(selected)
+
+
+def subgraph(node_ids):
+    """Nodes and the edges among them. Ids are queried in chunks to stay under bind-parameter limits."""
+    node_ids = list(dict.fromkeys(node_ids))
+    if not node_ids:
+        return {"nodes": [], "edges": []}
+    wanted = set(node_ids)
+    nodes, edges = [], []
+    for chunk in _chunks(node_ids):
+        nodes.extend(GraphNode.query.filter(GraphNode.id.in_(chunk)))
+        rows = (db.session.query(GraphEdge.source_id, GraphEdge.target_id, GraphEdge.weight)
+                .filter(GraphEdge.source_id.in_(chunk)))
+        edges.extend((s, t, w) for s, t, w in rows if t in wanted)
+    return {"nodes": nodes, "edges": edges}
+
+
+def graph_view(node_ids=None, hops=1, max_nodes=500, kinds=None, topic=None, entity=None,
+               label_budget=150, candidate_factor=10):
+    """
+    Level-of-detail view for interactive rendering. Gathers up to
+    `max_nodes * candidate_factor` nodes (the neighbourhood of `node_ids` and of the
+    `topic`/`entity` filter nodes, or the most central nodes), keeps the `max_nodes`
+    most central, and collapses each dropped node into a "+N" cluster attached to its
+    heaviest kept neighbour. Only the `label_budget` most central nodes get labels.
+    Returns JSON-ready {"nodes", "edges", "collapsed", "candidates"}.
+    """
+    start = list(node_ids or [])
+    for kind, value in (("topic", topic), ("entity", entity)):
+        if value:
+            key = " ".join(value.lower().split())
+            start.extend(n.id for n in GraphNode.query.filter_by(kind=kind, key=key))
+    budget = max_nodes * candidate_factor
+    if start:
+        data = neighbourhood(start, hops=hops, max_nodes=budget, kinds=kinds)
+    elif node_ids is not None or topic or entity:
+        data = {"nodes": [], "edges": []}  # filter matched nothing
+    else:
+        data = subgraph(n.id for n in top_nodes(limit=budget, kinds=kinds))
+
+    pinned = set(start)
+    ranked = sorted(data["nodes"], key=lambda n: (n.id not in pinned, -(n.centrality or 0.0)))
+    kept = {n.id: n for n in ranked[:max_nodes]}
+    dropped = {n.id: n for n in ranked[max_nodes:]}
+
+    # Each dropped node joins the cluster of its heaviest kept neighbour.
+    best = {}
+    for source_id, target_id, weight in data["edges"]:
+        for inner, outer in ((source_id, target_id), (target_id, source_id)):
+            if inner in dropped and outer in kept and weight > best.get(inner, (None, 0))[1]:
+                best[inner] = (outer, weight)
+    clusters = defaultdict(lambda: {"size": 0, "weight": 0})
+    for inner, (outer, weight) in best.items():
+        clusters[outer]["size"] += 1
+        clusters[outer]["weight"] += weight
+
+    labelled = {n.id for n in sorted(kept.values(), key=lambda n: -(n.centrality or 0.0))[:label_budget]}
+    labelled |= pinned
+    nodes = [
+        {"id": str(n.id), "label": n.label, "kind": n.kind, "platform": n.platform,
+         "x": n.x or 0.0, "y": n.y or 0.0, "degree": n.degree or 0, "centrality": n.centrality or 0.0,
+         "show_label": n.id in labelled}
+        for n in kept.values()
+    ]
+    edges = [{"source": str(s), "target": str(t), "weight": w}
+             for s, t, w in data["edges"] if s in kept and t in kept]
+    for outer, cluster in clusters.items():
+        anchor = kept[outer]
+        nodes.append({"id": f"c{outer}", "label": f"+{cluster['size']}", "kind": "cluster", "platform": None,
+                      "x": (anchor.x or 0.0) + 0.01, "y": (anchor.y or 0.0) + 0.01, "degree": cluster["size"],
+                      "centrality": 0.0, "show_label": False, "size": cluster["size"]})
+        edges.append({"source": str(outer), "target": f"c{outer}", "weight": cluster["weight"]})
+    return {"nodes": nodes, "edges": edges, "collapsed": len(dropped), "candidates": len(data["nodes"])}
@@ -22,11 +22,109 @@ def build_graph(results, max_nodes=50):
 
     return G
 
+KIND_COLORS = {"user": "skyblue", "topic": "lightgreen", "entity": "orange", "cluster": "#bbbbbb"}
+
+def graph_from_store(center=None, hops=2, max_nodes=500, kinds=None):
+    """
+    Load a graph from the persistent store instead of rebuilding it from results.
+    `center` is a label to search for; without it the most central nodes are shown.
+    Nodes carry their cached layout position in the "pos" attribute.
+    """
+    from app import app
+    from utils.graph_store import find_nodes, top_nodes, neighbourhood, subgraph
+
+    with app.app_context():
+        if center:
+            start = [n.id for n in find_nodes(center, limit=5)]
+            data = neighbourhood(start, hops=hops, max_nodes=max_nodes, kinds=kinds)
+        else:
+            data = subgraph(n.id for n in top_nodes(limit=max_nodes, kinds=kinds))
+
+        G = nx.Graph()
+        for node in data["nodes"]:
+            attrs = {"label": node.kind, "color": KIND_COLORS.get(node.kind, "grey"), "name": node.label,
+                     "centrality": node.centrality or 0.0}
+            if node.x is not None and node.y is not None:
+                attrs["pos"] = (node.x, node.y)
+            G.add_node(node.id, **attrs)
+        for source_id, target_id, weight in data["edges"]:
+            G.add_edge(source_id, target_id, weight=weight)
+    return G
+
 def draw_graph(G):
     st.subheader("🕸 OSINT Graph: Users ↔ Entities ↔ Topics")
-    pos = nx.spring_layout(G, k=0.4)
+    # Cached positions from the graph store avoid recomputing a spring layout on every render
+    pos = nx.get_node_attributes(G, "pos")
+    if len(pos) < len(G):
+        pos = nx.spring_layout(G, k=0.4, pos=pos or None)
     colors = [G.nodes[n].get("color", "grey") for n in G.nodes]
 
     plt.figure(figsize=(12, 8))
-    nx.draw_networkx(G, pos, node_color=colors, with_labels=True, font_size=9, edge_color="gray")
+    labels = {n: G.nodes[n].get("name", n) for n in G.nodes}
+    nx.draw_networkx(G, pos, node_color=colors, labels=labels, with_labels=True, font_size=9, edge_color="gray")
     st.pyplot(plt)
+
+# WebGL renderer (sigma.js) for graphs far beyond what matplotlib can draw.
+# Positions come from the graph store's cached layout, so nothing is laid out in the browser.
+SIGMA_TEMPLATE = """
+<div id="osint-graph" style="height:{height}px;width:100%;background:#fff;border:1px solid #ddd"></div>
+<script src="https://cdn.jsdelivr.net/npm/graphology@0.25.4/dist/graphology.umd.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/sigma@2.4.0/build/sigma.min.js"></script>
+<script>
+const data = {payload};
+const graph = new graphology.Graph();
+const maxCentrality = Math.max(1e-9, ...data.nodes.map(n => n.centrality));
+data.nodes.forEach(n => graph.addNode(n.id, {{
+  x: n.x, y: n.y, label: n.label, kind: n.kind, showLabel: n.show_label, color: {colors}[n.kind] || "grey",
+  size: n.kind === "cluster" ? 3 + Math.min(12, Math.log2(1 + n.size)) : 2 + 10 * Math.sqrt(n.centrality / maxCentrality),
+}}));
+data.edges.forEach(e => {{
+  if (!graph.hasEdge(e.source, e.target)) graph.addEdge(e.source, e.target, {{size: Math.min(4, 0.5 + Math.log2(e.weight)), color: "#ccc"}});
+}});
+const renderer = new Sigma(graph, document.getElementById("osint-graph"), {{
+  hideEdgesOnMove: true, labelRenderedSizeThreshold: 6, renderEdgeLabels: false,
+}});
+let hovered = null;
+renderer.on("enterNode", ({{node}}) => {{ hovered = node; renderer.refresh(); }});
+renderer.on("leaveNode", () => {{ hovered = null; renderer.refresh(); }});
+// Label culling: only labelled (central) nodes, the hovered node and its neighbours, or everything when zoomed in.
+renderer.setSetting("nodeReducer", (node, attrs) => {{
+  const res = {{...attrs}};
+  const near = hovered && (node === hovered || graph.areNeighbors(node, hovered));
+  if (!attrs.showLabel && !near && renderer.getCamera().ratio > 0.25) res.label = "";
+  if (hovered && !near) {{ res.color = "#eee"; res.label = ""; }}
+  return res;
+}});
+renderer.setSetting("edgeReducer", (edge, attrs) => {{
+  if (hovered && !graph.hasExtremity(edge, hovered)) return {{...attrs, hidden: true}};
+  return attrs;
+}});
+</script>
+"""
+
+def load_graph_view(node_label=None, hops=1, max_nodes=2000, topic=None, entity=None, kinds=None, label_budget=150):
+    """Level-of-detail graph payload from the store (see utils.graph_store.graph_view)."""
+    from app import app
+    from utils.graph_store import find_nodes, graph_view
+
+    with app.app_context():
+        node_ids = [n.id for n in find_nodes(node_label, limit=5)] if node_label else None
+        return graph_view(node_ids, hops=hops, max_nodes=max_nodes, kinds=kinds, topic=topic, entity=entity,
+                          label_budget=label_budget)
+
+def _script_json(value):
+    """JSON safe to inline in a <script> block: scraped labels can't close the tag ("</script>") or open markup."""
+    import json
+
+    return json.dumps(value).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+def interactive_graph_html(view, height=750):
+    return SIGMA_TEMPLATE.format(height=height, payload=_script_json(view), colors=_script_json(KIND_COLORS))
+
+def render_interactive_graph(view, height=750):
+    """Render a graph_view payload with the WebGL renderer inside the Streamlit page."""
+    import streamlit.components.v1 as components
+
+    components.html(interactive_graph_html(view, height), height=height + 10)
+    if view.get("collapsed"):
+        st.caption(f"{len(view['nodes'])} nodes shown; {view['collapsed']} less central nodes collapsed into “+N” clusters.")
@@ -1,5 +1,10 @@
 
 from detoxify import Detoxify
+from utils.post import analyzable_text
+from utils.enrichment_batch import EnrichmentBatch
+
+# Texts per Detoxify forward pass.
+HATE_SPEECH_BATCH_SIZE = 32
 
 # Load once
 _model = None
@@ -14,12 +19,21 @@ def detect_hate_speech(text):
     results = model.predict(text)
     return results
 
+def score_batch(texts, batch=None, rows=None):
+    """
+    Detoxify scores for `texts`, HATE_SPEECH_BATCH_SIZE texts per model call, written
+    as float32 columns ('toxicity', 'insult', ...) into an EnrichmentBatch.
+    """
+    model = get_hate_speech_model()
+    batch = batch if batch is not None else EnrichmentBatch(len(texts))
+    rows = list(range(len(texts))) if rows is None else rows
+    for start in range(0, len(texts), HATE_SPEECH_BATCH_SIZE):
+        predictions = model.predict(texts[start:start + HATE_SPEECH_BATCH_SIZE])  # {label: [score per text]}
+        for label, scores in predictions.items():
+            batch.set_scores(label, scores, rows[start:start + HATE_SPEECH_BATCH_SIZE])
+    return batch
+
 def enrich_with_hate_speech(results):
-    enriched = []
-    for item in results:
-        text_fields = [v for k, v in item.items() if isinstance(v, str)]
-        combined_text = " ".join(text_fields)
-        prediction = detect_hate_speech(combined_text)
-        item.update(prediction)  # adds fields like 'toxicity', 'insult', etc.
-        enriched.append(item)
-    return enriched
+    """Score each post's text field and add the scores to it."""
+    score_batch([analyzable_text(item) for item in results]).apply_to(results)
+    return results
@@ -0,0 +1,141 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) for stage duration histograms.
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Buckets for count-style histograms such as posts collected per scroll.
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+_counters = {}    # {(name, labels): value}
+_histograms = {}  # {(name, labels): {"buckets": tuple, "counts": list, "sum": float, "count": int}}
+_help = {}        # {name: help text}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def describe(name, help_text):
+    """Register a HELP line for a metric shown on /metrics."""
+    _help[name] = help_text
+
+
+def inc(name, value=1, **labels):
+    """Increment a counter, e.g. inc("osint_login_walls_total", platform="facebook")."""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    """Record a single observation into a histogram."""
+    key = (name, _label_key(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = {"buckets": tuple(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            _histograms[key] = hist
+        for i, upper in enumerate(hist["buckets"]):
+            if value <= upper:
+                hist["counts"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Time a block of work as a pipeline stage.
+    Works around `await` calls too, since the timer only wraps the block.
+    Failures are counted under osint_stage_failures_total and re-raised.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        inc("osint_stage_failures_total", stage=stage, **labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("osint_stage_duration_seconds", elapsed, stage=stage, **labels)
+        logger.debug(f"Stage '{stage}' {labels} took {elapsed:.3f}s")
+
+
+def snapshot():
+    """Return a plain-dict copy of all metrics (useful for tests and benchmarks)."""
+    with _lock:
+        return {
+            "counters": {(n, l): v for (n, l), v in _counters.items()},
+            "histograms": {
+                (n, l): {"sum": h["sum"], "count": h["count"]} for (n, l), h in _histograms.items()
+            },
+        }
+
+
+def reset():
+    """Clear all recorded metrics."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra) if extra else [])
+    if not pairs:
+        return ""
+    escaped = []
+    for k, v in pairs:
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{k}="{v}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus():
+    """Render all metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items(), key=lambda item: item[0])
+        hist_copies = [(key, dict(h, counts=list(h["counts"]))) for key, h in histograms]
+
+    seen = set()
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), hist in hist_copies:
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+        for upper, count in zip(hist["buckets"], hist["counts"]):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', upper)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+describe("osint_stage_duration_seconds", "Wall time spent in each scrape/enrichment stage.")
+describe("osint_stage_failures_total", "Stages that raised an exception.")
+describe("osint_posts_collected_total", "Posts collected by scrapers.")
+describe("osint_posts_per_scroll", "New posts extracted per scroll iteration.")
+describe("osint_login_walls_total", "Login walls or checkpoints encountered.")
+describe("osint_scrape_failures_total", "Scrapes that ended in an error.")
+describe("osint_preflight_total", "Search pages classified by the pre-flight check, labelled by state.")
+describe("osint_circuit_trips_total", "Times a platform circuit breaker opened.")
+describe("osint_circuit_short_circuits_total", "Scrapes skipped because the platform circuit was open.")
+describe("osint_profile_rotations_total", "Browser profiles rotated out of the pool after a login wall.")
+describe("osint_db_commits_total", "Search result writes (write-behind jobs), labelled by outcome.")
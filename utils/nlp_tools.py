@@ -1,6 +1,11 @@
 
 import spacy
 from textblob import TextBlob
+from utils.post import analyzable_text
+from utils.enrichment_batch import EnrichmentBatch
+
+# Texts per spaCy pipe batch.
+NLP_BATCH_SIZE = 64
 
 # Load spaCy model (ensure 'en_core_web_sm' is installed)
 try:
@@ -22,13 +27,23 @@ def analyze_text_nlp(text):
         "entities": entities
     }
 
+def analyze_batch(texts, batch=None, rows=None):
+    """
+    Sentiment and entities for `texts` written into an EnrichmentBatch (a new one
+    sized to `texts` unless given); `rows` are the batch rows the texts belong to.
+    spaCy processes the texts in batches.
+    """
+    batch = batch if batch is not None else EnrichmentBatch(len(texts))
+    rows = list(range(len(texts))) if rows is None else rows
+    batch.set_scores("sentiment", [TextBlob(text).sentiment.polarity for text in texts], rows)
+    for row, doc in zip(rows, nlp.pipe(texts, batch_size=NLP_BATCH_SIZE)):
+        batch.set_entities(row, [(ent.text, ent.label_) for ent in doc.ents])
+    return batch
+
 def enrich_results_with_nlp(results):
-    enriched = []
-    for item in results:
-        text_fields = [v for k, v in item.items() if isinstance(v, str)]
-        combined_text = " ".join(text_fields)
-        analysis = analyze_text_nlp(combined_text)
-        item["sentiment"] = analysis["sentiment"]
-        item["entities"] = analysis["entities"]
-        enriched.append(item)
-    return enriched
+    """
+    Add sentiment and entities to each post (Post or dict), analysing only its text
+    field, never URLs or author names.
+    """
+    analyze_batch([analyzable_text(item) for item in results]).apply_to(results)
+    return results
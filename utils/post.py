@@ -0,0 +1,128 @@
+from collections.abc import Mapping, MutableMapping
+
+# Fields scrapers use for a post's own words, in order of preference. Only this text is
+# enriched and hashed; URLs, author names and counters are never part of it.
+TEXT_FIELDS = ("text", "content", "tweet", "caption", "title")
+MISSING = "N/A"  # placeholder the scrapers use for fields they could not extract
+
+
+class Post(MutableMapping):
+    """
+    One scraped post. The fields every scraper shares live in slots; anything else a
+    scraper or enricher adds (likes, shortcode, sentiment, toxicity, ...) goes into
+    `extra`, allocated only when needed. Posts behave like the dicts the pipeline used
+    before (get, [], update, keys), so dedup, exports and reports accept either.
+    Fields left as None are absent from the mapping.
+    """
+
+    FIELDS = ("platform", "text", "author_name", "author_url", "timestamp", "post_url", "media_urls")
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, platform=None, text=None, author_name=None, author_url=None, timestamp=None,
+                 post_url=None, media_urls=None, **extra):
+        self.platform = platform
+        self.text = text
+        self.author_name = author_name
+        self.author_url = author_url
+        self.timestamp = timestamp
+        self.post_url = post_url
+        self.media_urls = media_urls
+        self.extra = extra or None
+
+    @classmethod
+    def from_item(cls, item, platform=None):
+        """Build a Post from a scraper dict; the first non-empty TEXT_FIELDS value becomes `text`."""
+        if isinstance(item, Post):
+            return item
+        post = cls(platform=platform)
+        text_key = next((f for f in TEXT_FIELDS if item.get(f) and item.get(f) != MISSING), None)
+        for key, value in item.items():
+            if key in TEXT_FIELDS:
+                if key == text_key:
+                    post.text = value
+                elif key != "text":
+                    post[key] = value  # a secondary text field (e.g. a video title next to its caption)
+            else:
+                post[key] = value
+        if post.text is None and "text" in item:
+            post.text = item["text"]
+        return post
+
+    @property
+    def analyzable_text(self):
+        return self.text if self.text and self.text != MISSING else ""
+
+    def __getitem__(self, key):
+        if key in Post.FIELDS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in Post.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in Post.FIELDS:
+            if getattr(self, key) is None:
+                raise KeyError(key)
+            setattr(self, key, None)
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __iter__(self):
+        for key in Post.FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return dict(self)
+
+    copy = to_dict  # dict.copy() callers (e.g. exporters flattening fields) get a plain dict
+
+    def __repr__(self):
+        return f"Post({self.platform}, {self.post_url or self.analyzable_text[:40]!r})"
+
+
+def analyzable_text(item):
+    """The text to enrich and hash for a Post or a plain scraper dict."""
+    if isinstance(item, Post):
+        return item.analyzable_text
+    for field in TEXT_FIELDS:
+        value = item.get(field)
+        if value and value != MISSING:
+            return value
+    return ""
+
+
+def to_posts(items, platform=None):
+    """Scraper dicts as Posts; error entries ({"error": ...}) are passed through unchanged."""
+    return [item if isinstance(item, Post) or not isinstance(item, Mapping) or "error" in item
+            else Post.from_item(item, platform) for item in items]
+
+
+def to_dicts(items):
+    """Posts back as plain dicts, for results that leave the scraper layer (API responses, JSON files, task results)."""
+    return [item.to_dict() if isinstance(item, Post) else item for item in items]
+
+
+def json_default(value):
+    """`default=` hook for json.dump(s): Posts nested in results are written as objects, anything else as str."""
+    if isinstance(value, Post):
+        return value.to_dict()
+    return str(value)
@@ -0,0 +1,165 @@
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import event, inspect, text
+
+from models import db, CollectedPost
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "collected_post_fts"
+
+# Postgres: the same expression must be used in the index and in queries for the GIN index to apply.
+PG_TSVECTOR = (
+    "to_tsvector('simple', coalesce(collected_post.text, '') || ' ' || "
+    "coalesce(collected_post.author_name, '') || ' ' || coalesce(collected_post.entities_text, ''))"
+)
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect(bind):
+    return bind.dialect.name
+
+
+def ensure_search_index():
+    """
+    Create the full-text index over collected posts if it does not exist.
+    SQLite gets an FTS5 table kept in sync by mapper events below; Postgres gets a
+    GIN index on a tsvector expression. Other databases fall back to LIKE queries.
+    """
+    engine = db.engine
+    dialect = _dialect(engine)
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(text, author_name, entities, tokenize='unicode61 remove_diacritics 2')"
+            ))
+        elif dialect == "postgresql":
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_collected_post_fts ON collected_post USING GIN ({PG_TSVECTOR})"
+            ))
+        else:
+            logger.warning(f"No full-text index support for dialect '{dialect}', post search will use LIKE.")
+
+
+def _sync_fts_row(connection, target, delete_first):
+    if _dialect(connection) != "sqlite":
+        return
+    if delete_first:
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, text, author_name, entities) VALUES (:id, :text, :author, :entities)"),
+        {"id": target.id, "text": target.text or "", "author": target.author_name or "", "entities": target.entities_text or ""},
+    )
+
+
+@event.listens_for(CollectedPost, "after_insert")
+def _index_new_post(mapper, connection, target):
+    _sync_fts_row(connection, target, delete_first=False)
+
+
+@event.listens_for(CollectedPost, "after_update")
+def _reindex_post(mapper, connection, target):
+    # Most updates only touch last_seen; skip the FTS rewrite unless indexed text changed.
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("text", "author_name", "entities_text")):
+        _sync_fts_row(connection, target, delete_first=True)
+
+
+@event.listens_for(CollectedPost, "after_delete")
+def _unindex_post(mapper, connection, target):
+    if _dialect(connection) == "sqlite":
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+
+
+def _fts5_query(query):
+    # Quote every token so user input cannot inject FTS5 operators; tokens are ANDed.
+    return " ".join('"' + token.replace('"', '""') + '"' for token in _FTS_TOKEN_RE.findall(query))
+
+
+def _filters(platform=None, topic=None, min_toxicity=None, max_toxicity=None,
+             date_from=None, date_to=None, include_duplicates=False):
+    clauses, params = [], {}
+    if platform:
+        clauses.append("collected_post.platform = :platform")
+        params["platform"] = platform.lower()
+    if topic:
+        clauses.append("collected_post.topic = :topic")
+        params["topic"] = topic
+    if min_toxicity is not None:
+        clauses.append("collected_post.toxicity >= :min_toxicity")
+        params["min_toxicity"] = min_toxicity
+    if max_toxicity is not None:
+        clauses.append("collected_post.toxicity <= :max_toxicity")
+        params["max_toxicity"] = max_toxicity
+    if date_from is not None:
+        clauses.append("collected_post.first_seen >= :date_from")
+        params["date_from"] = date_from
+    if date_to is not None:
+        clauses.append("collected_post.first_seen <= :date_to")
+        params["date_to"] = date_to
+    if not include_duplicates:
+        clauses.append("collected_post.duplicate_of_id IS NULL")
+    return clauses, params
+
+
+def search_posts(query, page=1, per_page=DEFAULT_PER_PAGE, **filters):
+    """
+    Ranked full-text search over collected posts (text, author, entities).
+    Returns {"total", "page", "per_page", "results": [(CollectedPost, rank)]}; lower rank is better on
+    SQLite (bm25), higher is better on Postgres (ts_rank), results are already ordered.
+    """
+    page = max(1, page)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    clauses, params = _filters(**filters)
+    params.update({"limit": per_page, "offset": (page - 1) * per_page})
+    dialect = _dialect(db.session.get_bind())
+
+    if dialect == "sqlite":
+        match = _fts5_query(query)
+        if not match:
+            return {"total": 0, "page": page, "per_page": per_page, "results": []}
+        params["match"] = match
+        where = " AND ".join([f"{FTS_TABLE} MATCH :match"] + clauses)
+        base = f"FROM {FTS_TABLE} JOIN collected_post ON collected_post.id = {FTS_TABLE}.rowid WHERE {where}"
+        rank_sql = f"bm25({FTS_TABLE}, 1.0, 0.5, 0.5)"
+        order = "rank ASC"
+    elif dialect == "postgresql":
+        params["q"] = query
+        where = " AND ".join([f"{PG_TSVECTOR} @@ plainto_tsquery('simple', :q)"] + clauses)
+        base = f"FROM collected_post WHERE {where}"
+        rank_sql = f"ts_rank({PG_TSVECTOR}, plainto_tsquery('simple', :q))"
+        order = "rank DESC"
+    else:
+        params["like"] = f"%{query}%"
+        where = " AND ".join(["(collected_post.text LIKE :like OR collected_post.author_name LIKE :like "
+                              "OR collected_post.entities_text LIKE :like)"] + clauses)
+        base = f"FROM collected_post WHERE {where}"
+        rank_sql = "0"
+        order = "collected_post.first_seen DESC"
+
+    total = db.session.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+    rows = db.session.execute(
+        text(f"SELECT collected_post.id AS id, {rank_sql} AS rank {base} ORDER BY {order} LIMIT :limit OFFSET :offset"),
+        params,
+    ).all()
+    posts = {p.id: p for p in CollectedPost.query.filter(CollectedPost.id.in_([r.id for r in rows]))} if rows else {}
+    return {
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "results": [(posts[r.id], r.rank) for r in rows if r.id in posts],
+    }
+
+
+def parse_date(value):
+    """Parse an ISO date/datetime query parameter; returns None when absent."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
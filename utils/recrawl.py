@@ -0,0 +1,74 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bounds and target for adaptive intervals; a job can override them with
+# "min_interval"/"max_interval" (APScheduler interval args) and "target_new_posts".
+RECRAWL_MIN_INTERVAL_MINUTES = int(os.environ.get("RECRAWL_MIN_INTERVAL_MINUTES", "15"))
+RECRAWL_MAX_INTERVAL_MINUTES = int(os.environ.get("RECRAWL_MAX_INTERVAL_MINUTES", "1440"))
+RECRAWL_TARGET_NEW_POSTS = int(os.environ.get("RECRAWL_TARGET_NEW_POSTS", "10"))
+RECRAWL_HISTORY_RUNS = 8
+# Weight of the newest run in the smoothed rate; lower reacts slower but is steadier.
+RECRAWL_SMOOTHING = 0.5
+# Never change an interval by more than this factor in one step.
+RECRAWL_MAX_STEP = 2.0
+
+_INTERVAL_UNITS = {"weeks": 604800, "days": 86400, "hours": 3600, "minutes": 60, "seconds": 1}
+
+def interval_seconds(interval):
+    """Seconds in an APScheduler-style interval dict, e.g. {"hours": 6}."""
+    return sum(_INTERVAL_UNITS[unit] * value for unit, value in interval.items())
+
+def estimate_new_post_rate(runs):
+    """
+    Smoothed new posts per hour from completed runs (oldest first): each run's new
+    posts divided by the time since the previous run. None with fewer than two runs.
+    """
+    rate = None
+    for previous, run in zip(runs, runs[1:]):
+        hours = (run.started_at - previous.started_at).total_seconds() / 3600
+        if hours <= 0:
+            continue
+        observed = (run.new_post_count or 0) / hours
+        rate = observed if rate is None else RECRAWL_SMOOTHING * observed + (1 - RECRAWL_SMOOTHING) * rate
+    return rate
+
+def recommend_interval(rate, current_seconds, min_seconds, max_seconds, target_new_posts, saturated=False):
+    """
+    Interval that should yield about `target_new_posts` new posts per run, moving at
+    most RECRAWL_MAX_STEP from the current interval and kept within the bounds.
+    A saturated run (every result was new, so posts were probably missed) halves it;
+    a run with no new posts backs off.
+    """
+    if rate is None:
+        return current_seconds
+    if saturated:
+        proposed = current_seconds / RECRAWL_MAX_STEP
+    elif rate <= 0:
+        proposed = current_seconds * RECRAWL_MAX_STEP
+    else:
+        proposed = target_new_posts / rate * 3600
+    proposed = min(max(proposed, current_seconds / RECRAWL_MAX_STEP), current_seconds * RECRAWL_MAX_STEP)
+    return int(min(max(proposed, min_seconds), max_seconds))
+
+def next_interval(job, current_seconds):
+    """Recommended interval in seconds for a batch job, from its JobRun history (needs an app context)."""
+    from models import JobRun
+
+    runs = (JobRun.query
+            .filter(JobRun.job_id == job["id"], JobRun.status.in_(("success", "no_results")))
+            .order_by(JobRun.started_at.desc())
+            .limit(RECRAWL_HISTORY_RUNS).all())[::-1]
+    if not runs:
+        return current_seconds
+    latest = runs[-1]
+    saturated = latest.result_count > 0 and latest.new_post_count >= latest.result_count
+    min_seconds = interval_seconds(job.get("min_interval", {"minutes": RECRAWL_MIN_INTERVAL_MINUTES}))
+    max_seconds = interval_seconds(job.get("max_interval", {"minutes": RECRAWL_MAX_INTERVAL_MINUTES}))
+    rate = estimate_new_post_rate(runs)
+    recommended = recommend_interval(rate, current_seconds, min_seconds, max_seconds,
+                                     job.get("target_new_posts", RECRAWL_TARGET_NEW_POSTS), saturated)
+    logger.info(f"Re-crawl {job['id']}: {rate if rate is None else round(rate, 2)} new posts/h, "
+                f"interval {current_seconds}s -> {recommended}s{' (saturated)' if saturated else ''}")
+    return recommended
@@ -1,18 +1,122 @@
 
 import os
+import uuid
+import itertools
+import threading
 import pdfkit
-import pandas as pd
-from jinja2 import Environment, FileSystemLoader
-
-def generate_html_report(data, out_path="exports/report.html"):
-    env = Environment(loader=FileSystemLoader("utils/templates"))
-    template = env.get_template("report_template.html")
-    html_out = template.render(results=data)
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(html_out)
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Huge result sets are cut off here; the report says how many rows were left out.
+MAX_REPORT_ROWS = int(os.environ.get("REPORT_MAX_ROWS", "5000"))
+# Rows per table page, so wkhtmltopdf lays out many small tables instead of one huge one.
+REPORT_PAGE_SIZE = int(os.environ.get("REPORT_PAGE_SIZE", "200"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", "2"))
+
+@lru_cache(maxsize=None)
+def get_template(name="report_template.html"):
+    """Compiled template, loaded once per process."""
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+    )
+    return env.get_template(name)
+
+def _limit_rows(data, max_rows):
+    total = len(data) if hasattr(data, "__len__") else None
+    rows = list(itertools.islice(data, max_rows)) if max_rows else list(data)
+    if total is None:
+        total = len(rows)
+    return rows, total
+
+def generate_html_report(data, out_path="exports/report.html", max_rows=MAX_REPORT_ROWS, page_size=REPORT_PAGE_SIZE,
+                         total=None):
+    """
+    Render the report straight to disk chunk by chunk, never holding the whole HTML in memory.
+    Only the first `max_rows` rows are rendered; `total` overrides the row count shown when
+    `data` was already truncated by the caller.
+    """
+    rows, counted = _limit_rows(data, max_rows)
+    total = counted if total is None else total
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    stream = get_template().generate(results=rows, total=total, truncated=total > len(rows), page_size=page_size)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(stream)
+    os.replace(tmp_path, out_path)
     return out_path
 
 def generate_pdf_report(html_path, out_path="exports/report.pdf"):
-    pdfkit.from_file(html_path, out_path)
+    pdfkit.from_file(html_path, out_path, options={"quiet": ""})
     return out_path
+
+
+# --- Background report jobs ---
+
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}  # job id -> ReportJob, oldest first
+_jobs_lock = threading.Lock()
+MAX_TRACKED_JOBS = 200
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+        return _executor
+
+class ReportJob:
+    """Handle for a report being rendered in the background."""
+
+    def __init__(self, html_path, pdf_path, future):
+        self.id = uuid.uuid4().hex
+        self.html_path = html_path
+        self.pdf_path = pdf_path
+        self.future = future
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return "running"
+        return "failed" if self.future.exception() else "done"
+
+    @property
+    def error(self):
+        return self.future.exception() if self.future.done() else None
+
+    def result(self, timeout=None):
+        """Block until finished; returns (html_path, pdf_path) or raises the job's error."""
+        return self.future.result(timeout)
+
+def submit_report(data, html_path, pdf_path=None, max_rows=MAX_REPORT_ROWS, page_size=REPORT_PAGE_SIZE, on_done=None):
+    """
+    Queue HTML (and optional PDF) rendering on the report worker pool and return a
+    ReportJob immediately. Rows are truncated and copied up front, so the caller may
+    keep mutating its own results. `on_done(job)` runs in the worker on success.
+    """
+    rows, total = _limit_rows(data, max_rows)
+    job = ReportJob(html_path, pdf_path, None)
+
+    def run():
+        generate_html_report(rows, html_path, max_rows=None, page_size=page_size, total=total)
+        if pdf_path:
+            generate_pdf_report(html_path, pdf_path)
+        if on_done is not None:
+            on_done(job)
+        return html_path, pdf_path
+
+    job.future = _get_executor().submit(run)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        for old_id in [i for i, j in _jobs.items() if j.future.done()][:max(0, len(_jobs) - MAX_TRACKED_JOBS)]:
+            del _jobs[old_id]
+    return job
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
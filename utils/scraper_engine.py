@@ -1,5 +1,5 @@
 
-def parse_instagram_html(html):
+def parse_instagram_html(html, limit=10):
     soup = BeautifulSoup(html, "html.parser")
     posts = []
     scripts = soup.find_all("script", type="text/javascript")
@@ -10,7 +10,7 @@ def parse_instagram_html(html):
                 raw_json = re.search(r'window._sharedData = (.*);', script.text).group(1)
                 data = json.loads(raw_json)
                 edges = data["entry_data"]["ProfilePage"][0]["graphql"]["user"]["edge_owner_to_timeline_media"]["edges"]
-                for edge in edges[:10]:
+                for edge in edges[:limit]:
                     post = edge["node"]
                     posts.append({
                         "caption": post["edge_media_to_caption"]["edges"][0]["node"]["text"] if post["edge_media_to_caption"]["edges"] else "",
@@ -24,10 +24,10 @@ def parse_instagram_html(html):
 
 
 
-def parse_youtube_html(html):
+def parse_youtube_html(html, limit=10):
     soup = BeautifulSoup(html, "html.parser")
     videos = []
-    for video_div in soup.find_all("ytd-video-renderer", limit=10):
+    for video_div in soup.find_all("ytd-video-renderer", limit=limit):
         title_elem = video_div.find("a", id="video-title")
         channel_elem = video_div.find("a", class_="yt-simple-endpoint style-scope yt-formatted-string")
         views_elem = video_div.find("span", class_="inline-metadata-item style-scope ytd-video-meta-block")
@@ -44,7 +44,7 @@ def parse_youtube_html(html):
 
 
 
-def parse_facebook_html(html):
+def parse_facebook_html(html, limit=10):
     soup = BeautifulSoup(html, "html.parser")
     posts = []
     divs = soup.find_all("div")
@@ -52,7 +52,7 @@ def parse_facebook_html(html):
         text = div.get_text(strip=True)
         if text and len(text) > 80 and "like" not in text.lower():  # crude filter for meaningful content
             posts.append({"content": text[:280]})
-            if len(posts) >= 10:
+            if len(posts) >= limit:
                 break
     return posts
 
@@ -82,6 +82,24 @@ from bs4 import BeautifulSoup
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from utils import metrics
+from utils.circuit_breaker import get_breaker
+from utils.screenshots import capture_driver
+from utils.post import to_posts
+from selenium.common.exceptions import TimeoutException
+from scrapers.deadline import Deadline
+
+LOGIN_WALL_URL_MARKERS = ("/login", "/checkpoint", "/accounts/login", "/i/flow/login")
+
+SEARCH_URLS = {
+    "twitter": "https://twitter.com/search?q={query}&src=typed_query",
+    "facebook": "https://www.facebook.com/search/top?q={query}",
+    "youtube": "https://www.youtube.com/results?search_query={query}",
+    "instagram": "https://www.instagram.com/{query}/",
+}
+# Pause after a page loads so client-side rendering can fill it in.
+PAGE_SETTLE_SECONDS = 5
+DEFAULT_MAX_POSTS = 10
 
 def get_chrome_with_debugger():
     chrome_options = Options()
@@ -89,59 +107,83 @@ def get_chrome_with_debugger():
     driver = webdriver.Chrome(options=chrome_options)
     return driver
 
-def run_scraper(query, search_type, platform):
-    driver = get_chrome_with_debugger()
-    results = []
+def is_login_wall(url):
+    return any(marker in (url or "").lower() for marker in LOGIN_WALL_URL_MARKERS)
+
+def run_scraper(query, search_type, platform, max_posts=None, time_budget=None):
+    """
+    Scrape one platform through the debugger-attached Chrome. Guarded by the platform's
+    circuit breaker: while it is open the browser is not touched and the result carries
+    "circuit_open" with the breaker's status instead.
+    Returns up to `max_posts` items (default DEFAULT_MAX_POSTS). With a `time_budget` in
+    seconds, page load and settle time are cut to fit and "truncated" reports a cut.
+    """
+    breaker = get_breaker(platform)
+    if not breaker.allow():
+        return {"results": [], "html": "", "screenshot": None, "circuit_open": True, "truncated": False,
+                "status_detail": breaker.status_detail()}
+    try:
+        scraped = _scrape_with_browser(query, search_type, platform, max_posts, time_budget)
+    except Exception as e:
+        breaker.record_failure(f"{type(e).__name__}: {e}"[:200])
+        raise
+    if scraped["login_wall"]:
+        breaker.record_failure("login wall")
+    else:
+        breaker.record_success()
+    return scraped
+
+def parse_twitter_search_html(html, limit=10):
+    soup = BeautifulSoup(html, "html.parser")
+    tweets = soup.find_all("div", {"data-testid": "cellInnerDiv"})
+    return [{"tweet": tweet.get_text(separator=" ", strip=True)} for tweet in tweets[:limit]]
+
+PAGE_PARSERS = {
+    "twitter": parse_twitter_search_html,
+    "facebook": parse_facebook_html,
+    "youtube": parse_youtube_html,
+    "instagram": parse_instagram_html,
+}
+
+def _scrape_with_browser(query, search_type, platform, max_posts=None, time_budget=None):
+    with metrics.span("browser_launch", platform=platform):
+        driver = get_chrome_with_debugger()
+    deadline = Deadline(time_budget)
+    truncated = False
     html = ""
     screenshot = None
 
-    if platform == "twitter":
-        driver.get(f"https://twitter.com/search?q={query}&src=typed_query")
-        time.sleep(5)
-        html = driver.page_source
-        screenshot = driver.get_screenshot_as_base64()
-        
-        soup = BeautifulSoup(html, "html.parser")
-        tweets = soup.find_all("div", {"data-testid": "cellInnerDiv"})
-        for tweet in tweets[:10]:
-            content = tweet.get_text(separator=" ", strip=True)
-            results.append({"tweet": content})
-        
-
-    elif platform == "facebook":
-        driver.get(f"https://www.facebook.com/search/top?q={query}")
-        time.sleep(5)
-        html = driver.page_source
-        screenshot = driver.get_screenshot_as_base64()
-        results = parse_facebook_html(html)
-
-    
-    elif platform == "youtube":
-        driver.get(f"https://www.youtube.com/results?search_query={query}")
-        time.sleep(5)
-        html = driver.page_source
-        screenshot = driver.get_screenshot_as_base64()
-        results = parse_youtube_html(html)
-
-
-    
-    elif platform == "instagram":
-        driver.get(f"https://www.instagram.com/{query}/")
-        time.sleep(5)
+    if platform in SEARCH_URLS:
+        if time_budget is not None:
+            driver.set_page_load_timeout(max(1, deadline.remaining()))
+        with metrics.span("navigation", platform=platform):
+            try:
+                driver.get(SEARCH_URLS[platform].format(query=query))
+            except TimeoutException:
+                if not deadline.expired():
+                    raise
+            # Parse whatever has rendered when the budget cuts loading or settling short.
+            settle_seconds = deadline.seconds(PAGE_SETTLE_SECONDS)
+            truncated = settle_seconds < PAGE_SETTLE_SECONDS
+            time.sleep(settle_seconds)
         html = driver.page_source
-        screenshot = driver.get_screenshot_as_base64()
-        results = parse_instagram_html(html)
-
-
+        with metrics.span("extraction", platform=platform):
+            results = PAGE_PARSERS[platform](html, limit=max_posts or DEFAULT_MAX_POSTS)
     else:
         results = [{"error": f"Platform '{platform}' is not yet supported."}]
 
+    results = to_posts(results, platform)
+    login_wall = is_login_wall(driver.current_url)
+    # Screenshots only when the policy wants one: by default for login walls and empty pages.
+    screenshot = capture_driver(driver, error=login_wall or not results, platform=platform)
     driver.quit()
 
     return {
         "results": results,
         "html": html,
-        "screenshot": screenshot
+        "screenshot": screenshot,
+        "login_wall": login_wall,
+        "truncated": truncated,
     }
 
 
@@ -168,7 +210,12 @@ def export_results_to_csv(results, query, platform, output_dir="exports"):
 
 
 
-def export_enriched_results(results, query, platform, output_dir="exports"):
+def export_enriched_results(results, query, platform, output_dir="exports", enrichment=None):
+    """
+    Write enriched results to CSV. Given the run's EnrichmentBatch, the enrichment
+    columns come from the batch and a Parquet copy with typed columns (float32 scores,
+    entities as a list) is written next to the CSV for the dashboard.
+    """
     import json
     import os
     os.makedirs(output_dir, exist_ok=True)
@@ -178,9 +225,12 @@ def export_enriched_results(results, query, platform, output_dir="exports"):
 
     # Flatten entity and Detoxify fields into strings
     flat_results = []
-    for r in results:
+    for row, r in enumerate(results):
         flat = r.copy()
-        if "entities" in flat:
+        if enrichment is not None:
+            flat.update(enrichment.row(row))
+            flat["entities"] = ", ".join(enrichment.entity_strings(row))
+        elif "entities" in flat:
             flat["entities"] = ", ".join([f"{e['text']} ({e['label']})" for e in flat["entities"]])
         flat_results.append(flat)
 
@@ -190,4 +240,25 @@ def export_enriched_results(results, query, platform, output_dir="exports"):
         writer = csv.DictWriter(f, fieldnames=keys)
         writer.writeheader()
         writer.writerows(flat_results)
+    from utils.archive_catalog import register_archive
+    register_archive(filename, query=query, platform=platform, result_count=len(flat_results))
+    if enrichment is not None:
+        parquet_file = export_enrichment_parquet(results, enrichment, filename[:-len(".csv")] + ".parquet")
+        register_archive(parquet_file, query=query, platform=platform, result_count=len(results))
+    return filename
+
+def export_enrichment_parquet(results, enrichment, filename):
+    """Scraped fields as strings plus the batch's enrichment columns, written as one Parquet file."""
+    import json
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = enrichment.to_arrow()
+    enriched = set(table.column_names)
+    keys = sorted(set().union(*(r.keys() for r in results)) - enriched)
+    for key in keys:
+        values = [r.get(key) for r in results]
+        values = [v if v is None or isinstance(v, str) else json.dumps(v, default=str) for v in values]
+        table = table.append_column(key, pa.array(values, type=pa.string()))
+    pq.write_table(table, filename, compression="zstd")
     return filename
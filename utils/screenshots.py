@@ -0,0 +1,130 @@
+import base64
+import io
+import os
+import random
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_POLICIES = ("never", "on_error", "always", "sampled")
+# never: no screenshots; on_error: login walls, crashes and unexplained empty pages only;
+# always: every scrape; sampled: errors plus SCREENSHOT_SAMPLE_RATE of successful scrapes.
+SCREENSHOT_POLICY = os.environ.get("SCREENSHOT_POLICY", "on_error").lower()
+SCREENSHOT_SAMPLE_RATE = float(os.environ.get("SCREENSHOT_SAMPLE_RATE", "0.05"))
+# jpeg and png are encoded by the browser; webp is converted from PNG with Pillow (falls back to jpeg).
+SCREENSHOT_FORMAT = os.environ.get("SCREENSHOT_FORMAT", "jpeg").lower()
+SCREENSHOT_QUALITY = int(os.environ.get("SCREENSHOT_QUALITY", "60"))
+# Capture only the visible viewport rather than the whole scrolled page.
+SCREENSHOT_FULL_PAGE = os.environ.get("SCREENSHOT_FULL_PAGE", "False").upper() == "TRUE"
+
+_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp"}
+
+if SCREENSHOT_POLICY not in SCREENSHOT_POLICIES:
+    logger.warning(f"Unknown SCREENSHOT_POLICY '{SCREENSHOT_POLICY}', using 'on_error'.")
+    SCREENSHOT_POLICY = "on_error"
+
+def should_capture(error=False, policy=None, sample_rate=None):
+    policy = policy or SCREENSHOT_POLICY
+    if policy == "never":
+        return False
+    if policy == "always" or error:
+        return True
+    if policy == "sampled":
+        return random.random() < (SCREENSHOT_SAMPLE_RATE if sample_rate is None else sample_rate)
+    return False
+
+def output_format(fmt=None):
+    fmt = (fmt or SCREENSHOT_FORMAT).lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt == "webp" and Image is None:
+        return "jpeg"
+    return fmt if fmt in _EXTENSIONS else "jpeg"
+
+def screenshot_path(path, fmt=None):
+    """`path` with the extension of the configured output format."""
+    return os.path.splitext(path)[0] + _EXTENSIONS[output_format(fmt)]
+
+def _to_webp(png_bytes, quality):
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(png_bytes)).save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+# --- Background writes ---
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot")
+        return _writer
+
+def _write(data, path, fmt, quality):
+    if fmt == "webp":
+        data = _to_webp(data, quality)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+def write_async(data, path, fmt, quality=SCREENSHOT_QUALITY):
+    """Encode (WebP) and write on the screenshot thread; returns the Future."""
+    future = _get_writer().submit(_write, data, path, fmt, quality)
+    future.add_done_callback(lambda f: f.exception() and logger.error(f"Screenshot write failed for {path}: {f.exception()}"))
+    return future
+
+def flush(timeout=None):
+    """Block until every queued screenshot is on disk (the writer runs one job at a time)."""
+    _get_writer().submit(lambda: None).result(timeout)
+
+async def capture_page(page, path, error=False, platform=None, policy=None):
+    """
+    Screenshot a Playwright page if the policy asks for it. Only the browser-side capture
+    is awaited; conversion and disk I/O happen on a background thread. Returns the path
+    the file is written to, or None if no screenshot was taken.
+    """
+    if not should_capture(error, policy):
+        return None
+    fmt = output_format()
+    path = screenshot_path(path, fmt)
+    options = {"type": "png" if fmt in ("png", "webp") else "jpeg", "full_page": SCREENSHOT_FULL_PAGE}
+    if options["type"] == "jpeg":
+        options["quality"] = SCREENSHOT_QUALITY
+    with metrics.span("screenshot", platform=platform or "unknown"):
+        data = await page.screenshot(**options)
+    write_async(data, path, fmt)
+    return path
+
+def capture_driver(driver, error=False, platform=None, policy=None):
+    """
+    Base64 screenshot of a Selenium driver if the policy asks for it, else None.
+    Re-encoded as JPEG/WebP when Pillow is installed (Selenium only captures PNG).
+    """
+    if not should_capture(error, policy):
+        return None
+    with metrics.span("screenshot", platform=platform or "unknown"):
+        png = driver.get_screenshot_as_png()
+        fmt = output_format()
+        if fmt == "png" or Image is None:
+            return base64.b64encode(png).decode("ascii")
+        image = Image.open(io.BytesIO(png))
+        buffer = io.BytesIO()
+        if fmt == "jpeg":
+            image.convert("RGB").save(buffer, format="JPEG", quality=SCREENSHOT_QUALITY, optimize=True)
+        else:
+            image.save(buffer, format="WEBP", quality=SCREENSHOT_QUALITY, method=4)
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
@@ -0,0 +1,135 @@
+import json
+import os
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update, func
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Task
+from utils.post import json_default
+
+logger = logging.getLogger(__name__)
+
+TASK_KINDS = ("search", "batch", "enrich")
+# A running task must be heartbeated within this window, or another worker may claim it.
+TASK_LEASE_SECONDS = int(os.environ.get("TASK_LEASE_SECONDS", "300"))
+TASK_MAX_ATTEMPTS = int(os.environ.get("TASK_MAX_ATTEMPTS", "3"))
+# Retry n waits TASK_RETRY_BACKOFF_SECONDS * 2**(n-1).
+TASK_RETRY_BACKOFF_SECONDS = int(os.environ.get("TASK_RETRY_BACKOFF_SECONDS", "30"))
+TASK_RETENTION_DAYS = int(os.environ.get("TASK_RETENTION_DAYS", "7"))
+# Candidates read per claim attempt; other workers may win some of them.
+CLAIM_CANDIDATES = 10
+
+def _claimable(now):
+    return or_(
+        and_(Task.status == "queued", Task.available_at <= now),
+        and_(Task.status == "running", Task.lease_expires_at < now),
+    )
+
+def enqueue(kind, payload, idempotency_key=None, priority=0, max_attempts=TASK_MAX_ATTEMPTS, delay_seconds=0):
+    """
+    Add a task to the shared queue and commit. With an `idempotency_key`, enqueueing the
+    same work twice (a retried request, a scheduler firing on two hosts) returns the
+    task created first instead of a duplicate.
+    """
+    if kind not in TASK_KINDS:
+        raise ValueError(f"Unknown task kind: {kind}")
+    if idempotency_key:
+        existing = Task.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing
+    task = Task(kind=kind, payload=json.dumps(payload), idempotency_key=idempotency_key, priority=priority,
+                max_attempts=max_attempts, available_at=datetime.utcnow() + timedelta(seconds=delay_seconds))
+    db.session.add(task)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Lost the race with another producer using the same key.
+        db.session.rollback()
+        return Task.query.filter_by(idempotency_key=idempotency_key).one()
+    return task
+
+def claim(worker_id, kinds=None, lease_seconds=TASK_LEASE_SECONDS):
+    """
+    Lease the next task for `worker_id`, highest priority and oldest first, or return None.
+    Claiming is a conditional UPDATE, so concurrent workers on any host never get the
+    same task; a running task whose lease expired (its worker died) is claimable again.
+    """
+    now = datetime.utcnow()
+    query = db.session.query(Task.id, Task.status, Task.attempts, Task.max_attempts).filter(_claimable(now))
+    if kinds:
+        query = query.filter(Task.kind.in_(kinds))
+    candidates = query.order_by(Task.priority.desc(), Task.available_at, Task.id).limit(CLAIM_CANDIDATES).all()
+
+    for task_id, status, attempts, max_attempts in candidates:
+        if status == "running" and attempts >= max_attempts:
+            _finish(task_id, None, "failed", error="Lease expired on the final attempt (worker lost).", now=now)
+            continue
+        claimed = db.session.execute(
+            update(Task)
+            .where(Task.id == task_id, _claimable(now))
+            .values(status="running", lease_owner=worker_id, attempts=Task.attempts + 1,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds))
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Task, task_id)
+    return None
+
+def heartbeat(task_id, worker_id, lease_seconds=TASK_LEASE_SECONDS):
+    """Extend a lease; False means the lease was lost and the task may run elsewhere."""
+    extended = db.session.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.lease_owner == worker_id, Task.status == "running")
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    ).rowcount
+    db.session.commit()
+    return bool(extended)
+
+def _finish(task_id, worker_id, status, result=None, error=None, now=None, available_at=None):
+    conditions = [Task.id == task_id, Task.status == "running"]
+    if worker_id is not None:
+        conditions.append(Task.lease_owner == worker_id)
+    values = {"status": status, "lease_owner": None, "lease_expires_at": None, "error": error}
+    if result is not None:
+        values["result"] = json.dumps(result, default=json_default)
+    if available_at is not None:
+        values["available_at"] = available_at
+    else:
+        values["finished_at"] = now or datetime.utcnow()
+    finished = db.session.execute(update(Task).where(*conditions).values(**values)).rowcount
+    db.session.commit()
+    return bool(finished)
+
+def complete(task, worker_id, result=None):
+    """Record a task's result. Returns False if the lease had already been lost."""
+    return _finish(task.id, worker_id, "done", result=result)
+
+def fail(task, worker_id, error):
+    """Requeue a failed task with exponential backoff, or mark it failed after its last attempt."""
+    if task.attempts < task.max_attempts:
+        retry_at = datetime.utcnow() + timedelta(seconds=TASK_RETRY_BACKOFF_SECONDS * 2 ** (task.attempts - 1))
+        logger.warning(f"Task {task.id} attempt {task.attempts}/{task.max_attempts} failed, retrying at {retry_at}: {error}")
+        return _finish(task.id, worker_id, "queued", error=str(error), available_at=retry_at)
+    logger.error(f"Task {task.id} failed after {task.attempts} attempts: {error}")
+    return _finish(task.id, worker_id, "failed", error=str(error))
+
+def get_task(task_id):
+    return db.session.get(Task, task_id)
+
+def queue_stats():
+    """Task counts as {kind: {status: count}}."""
+    stats = {}
+    for kind, status, count in db.session.query(Task.kind, Task.status, func.count(Task.id)).group_by(Task.kind, Task.status):
+        stats.setdefault(kind, {})[status] = count
+    return stats
+
+def purge_finished(older_than_days=TASK_RETENTION_DAYS):
+    """Delete done/failed tasks older than the cutoff (their results live in the posts tables)."""
+    if not older_than_days:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = Task.query.filter(Task.status.in_(("done", "failed")), Task.finished_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -1,5 +1,14 @@
-
 import re
+import threading
+import unicodedata
+import zlib
+from collections.abc import Mapping
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    from unidecode import unidecode
+except ImportError:  # optional, the built-in tables below cover Cyrillic, Greek and Ethiopic
+    unidecode = None
 
 def normalize_username(username):
     return re.sub(r"[^a-z0-9]", "", username.lower())
@@ -26,3 +35,279 @@ def correlate_usernames(result_sets):
     }
 
     return cross_platform
+
+
+# --- Transliteration -------------------------------------------------------
+
+_CYRILLIC = dict(zip(
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюяіїєґўђјљњћџ",
+    ["a", "b", "v", "g", "d", "e", "e", "zh", "z", "i", "i", "k", "l", "m", "n", "o", "p", "r", "s", "t",
+     "u", "f", "kh", "ts", "ch", "sh", "shch", "", "y", "", "e", "yu", "ya", "i", "i", "ye", "g", "u",
+     "dj", "j", "lj", "nj", "c", "dz"],
+))
+
+_GREEK = dict(zip(
+    "αβγδεζηθικλμνξοπρσςτυφχψω",
+    ["a", "v", "g", "d", "e", "z", "i", "th", "i", "k", "l", "m", "n", "x", "o", "p", "r", "s", "s", "t",
+     "y", "f", "ch", "ps", "o"],
+))
+
+# Ethiopic (Ge'ez script, used for Amharic and Tigrinya) is laid out in rows of
+# eight: one consonant per row, one vowel order per column.
+_ETHIOPIC_CONSONANTS = [
+    "h", "l", "h", "m", "s", "r", "s", "sh", "q", "qw", "q", "qw", "b", "v", "t", "ch",
+    "h", "hw", "n", "ny", "", "k", "kw", "h", "hw", "w", "", "z", "zh", "y", "d", "d",
+    "j", "g", "gw", "ng", "t", "ch", "p", "ts", "ts", "f", "p",
+]
+_ETHIOPIC_VOWELS = ["e", "u", "i", "a", "e", "", "o", "wa"]
+
+def _ethiopic_table():
+    table = {}
+    for row, consonant in enumerate(_ETHIOPIC_CONSONANTS):
+        for order, vowel in enumerate(_ETHIOPIC_VOWELS):
+            table[chr(0x1200 + row * 8 + order)] = consonant + vowel
+    return table
+
+_ETHIOPIC = _ethiopic_table()
+
+_TRANSLIT = {**_CYRILLIC, **_GREEK, **_ETHIOPIC}
+
+def transliterate(name):
+    """Best-effort Latin rendering of a name, so handles in different scripts can be compared."""
+    if not name:
+        return ""
+    if unidecode is not None:
+        return unidecode(name).lower()
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    out = []
+    for ch in decomposed:
+        if unicodedata.combining(ch):
+            continue
+        out.append(_TRANSLIT.get(ch, ch))
+    return "".join(out)
+
+def normalize_identity(name):
+    """Transliterate, then strip everything but ASCII letters and digits."""
+    return normalize_username(transliterate(name))
+
+def handle_from_url(url):
+    """
+    Extract the account handle from a profile URL: …/some.page, profile.php?id=123,
+    …/people/Some-Name/123 or a group poster's …/groups/<group>/user/123.
+    """
+    if not url or url == "N/A":
+        return None
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    ids = parse_qs(parts.query).get("id")
+    if segments[:1] == ["profile.php"] or (ids and not segments):
+        return ids[0] if ids else None
+    if segments[:1] == ["people"]:
+        return segments[2] if len(segments) > 2 else None
+    if segments[:1] == ["groups"]:
+        # Only a poster inside a group is an account; the group itself is not.
+        return segments[3] if len(segments) > 3 and segments[2] == "user" else None
+    if not segments:
+        return None
+    return segments[0].lstrip("@")
+
+
+# --- Fuzzy correlation index ----------------------------------------------
+
+_MINHASH_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+class AuthorIndex:
+    """
+    Incremental index of authors across platforms for fuzzy identity correlation.
+
+    Each author is represented by character n-grams of its transliterated handle and
+    display name. A MinHash signature is split into LSH bands, so adding an author
+    only compares it with authors sharing a band (near-linear overall rather than
+    pairwise). Matches at or above `threshold` Jaccard similarity are merged into
+    clusters with a union-find, and exact normalized handle matches score 1.0.
+    """
+
+    def __init__(self, num_perm=32, bands=8, ngram=3, threshold=0.5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.threshold = threshold
+        # Deterministic hash-function coefficients so signatures are stable across runs
+        self._coeffs = [((i * 0x9E3779B1 + 1) % _MINHASH_PRIME, (i * 0x85EBCA77 + 7) % _MINHASH_PRIME)
+                        for i in range(num_perm)]
+        self.authors = {}   # {author_id: {"platform", "handle", "display_name", "profile_url"}}
+        self._shingles = {}  # {author_id: frozenset}
+        self._buckets = {}   # {(band, band_values): set(author_id)}
+        self._exact = {}     # {normalized handle: first author_id with it}
+        self._parent = {}
+        self._edges = {}     # {(a, b): score}
+        self._lock = threading.Lock()
+
+    def _shingle(self, *names):
+        grams = set()
+        for name in names:
+            norm = normalize_identity(name or "")
+            if not norm:
+                continue
+            if len(norm) <= self.ngram:
+                grams.add(norm)
+                continue
+            grams.update(norm[i:i + self.ngram] for i in range(len(norm) - self.ngram + 1))
+        return frozenset(grams)
+
+    def _signature(self, shingles):
+        hashed = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        return [min(((a * h + b) % _MINHASH_PRIME) & _MAX_HASH for h in hashed) for a, b in self._coeffs]
+
+    def _find(self, x):
+        while self._parent[x] != x:
+            self._parent[x] = self._parent[self._parent[x]]
+            x = self._parent[x]
+        return x
+
+    def _union(self, a, b, score):
+        key = (a, b) if a < b else (b, a)
+        self._edges[key] = max(score, self._edges.get(key, 0.0))
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self._parent[rb] = ra
+
+    def add(self, platform, handle, display_name=None, profile_url=None):
+        """Add (or refresh) an author and link it to similar authors already indexed."""
+        handle = handle or handle_from_url(profile_url) or display_name
+        if not handle:
+            return None
+        author_id = f"{platform.lower()}:{handle}"
+        with self._lock:
+            if author_id in self.authors:
+                return author_id
+            self.authors[author_id] = {
+                "platform": platform.lower(), "handle": handle,
+                "display_name": display_name, "profile_url": profile_url,
+            }
+            self._parent[author_id] = author_id
+
+            shingles = self._shingle(handle, display_name)
+            self._shingles[author_id] = shingles
+
+            exact_key = normalize_identity(handle)
+            if exact_key:
+                # One link to the first author with this handle: k authors give k - 1 edges, not k²
+                representative = self._exact.setdefault(exact_key, author_id)
+                if representative != author_id:
+                    self._union(author_id, representative, 1.0)
+
+            if not shingles:
+                return author_id
+            signature = self._signature(shingles)
+            candidates = set()
+            for band in range(self.bands):
+                key = (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                bucket = self._buckets.setdefault(key, set())
+                candidates.update(bucket)
+                bucket.add(author_id)
+
+            # Link to the best match in each existing cluster only, so edges grow with authors, not pairs
+            best = {}
+            for other in candidates:
+                other_shingles = self._shingles[other]
+                score = len(shingles & other_shingles) / len(shingles | other_shingles)
+                root = self._find(other)
+                if score >= self.threshold and score > best.get(root, (None, 0.0))[1]:
+                    best[root] = (other, score)
+            own_root = self._find(author_id)
+            for root, (other, score) in best.items():
+                if root != own_root:
+                    self._union(author_id, other, round(score, 3))
+        return author_id
+
+    def add_results(self, platform, results):
+        """Index the authors of a list of scraped items."""
+        for item in results:
+            if not isinstance(item, Mapping):
+                continue
+            self.add(
+                platform,
+                item.get("username") or item.get("user") or handle_from_url(item.get("author_url")),
+                display_name=item.get("author_name") if item.get("author_name") != "N/A" else None,
+                profile_url=item.get("author_url"),
+            )
+
+    def candidates(self, author_id):
+        """Authors directly linked to `author_id`, best score first."""
+        with self._lock:
+            matches = []
+            for (a, b), score in self._edges.items():
+                if author_id in (a, b):
+                    matches.append({"author": b if a == author_id else a, "score": score})
+        return sorted(matches, key=lambda m: -m["score"])
+
+    def clusters(self, min_size=2, cross_platform_only=True):
+        """
+        Candidate identity clusters: [{"members": [...], "platforms": [...], "score": float}],
+        where score is the weakest link holding the cluster together.
+        """
+        with self._lock:
+            groups = {}
+            for author_id in self.authors:
+                groups.setdefault(self._find(author_id), []).append(author_id)
+            link_scores = {}
+            for (a, b), score in self._edges.items():
+                root = self._find(a)
+                link_scores[root] = min(score, link_scores.get(root, 1.0))
+
+            clusters = []
+            for root, members in groups.items():
+                platforms = sorted({self.authors[m]["platform"] for m in members})
+                if len(members) < min_size or (cross_platform_only and len(platforms) < 2):
+                    continue
+                clusters.append({
+                    "members": [dict(self.authors[m], id=m) for m in sorted(members)],
+                    "platforms": platforms,
+                    "score": link_scores.get(root, 1.0),
+                })
+        return sorted(clusters, key=lambda c: (-len(c["members"]), -c["score"]))
+
+    @classmethod
+    def from_stored_posts(cls, batch_size=5000, **kwargs):
+        """Build an index over every distinct author in CollectedPost (needs an app context)."""
+        from models import CollectedPost, db
+
+        index = cls(**kwargs)
+        query = (db.session.query(CollectedPost.platform, CollectedPost.author_name, CollectedPost.author_url)
+                 .distinct().yield_per(batch_size))
+        for platform, author_name, author_url in query:
+            index.add(platform, handle_from_url(author_url),
+                      display_name=author_name if author_name != "N/A" else None, profile_url=author_url)
+        return index
+
+
+_author_index = None
+_author_index_lock = threading.Lock()
+
+def get_author_index():
+    """Process-wide AuthorIndex, built from stored posts on first use (needs an app context)."""
+    global _author_index
+    with _author_index_lock:
+        if _author_index is None:
+            _author_index = AuthorIndex.from_stored_posts()
+        return _author_index
+
+def update_author_index(platform, results):
+    """Feed newly ingested results into the index, if it has been built in this process."""
+    if _author_index is not None:
+        _author_index.add_results(platform, results)
+
+def correlate_authors(result_sets, threshold=0.5):
+    """
+    Fuzzy counterpart of correlate_usernames: takes {platform: [results]} and
+    returns scored cross-platform clusters.
+    """
+    index = AuthorIndex(threshold=threshold)
+    for platform, results in result_sets.items():
+        index.add_results(platform, results)
+    return index.clusters()
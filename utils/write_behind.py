@@ -0,0 +1,170 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import logging
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Persist search results on a background writer instead of committing inside the scrape.
+WRITE_BEHIND = os.environ.get("WRITE_BEHIND", "True").upper() == "TRUE"
+# Jobs committed together; a batch is also closed after WRITE_BEHIND_FLUSH_SECONDS.
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "50"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.environ.get("WRITE_BEHIND_FLUSH_SECONDS", "0.5"))
+# Pending jobs before submit() blocks (backpressure when the database falls behind).
+WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", "1000"))
+# How long interpreter exit waits for queued writes.
+WRITE_BEHIND_SHUTDOWN_SECONDS = float(os.environ.get("WRITE_BEHIND_SHUTDOWN_SECONDS", "10"))
+
+
+class _Barrier:
+    """Queue marker released once every job queued before it has been committed or failed."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class WriteBehindWriter:
+    """
+    One background thread that runs queued write jobs inside an app context and
+    commits them in batches. A job is a callable that adds objects to db.session
+    without committing. If a batch commit fails, its jobs are retried one by one so
+    a single bad record only loses itself; failures are logged and counted in
+    osint_db_commits_total{outcome="failure"}, never raised to the submitter.
+    Because a job may run more than once, side effects outside the database (e.g.
+    in-memory index updates) belong in the callable a job may return: it runs once,
+    after the job's writes are committed, and never for a job that was rolled back.
+    """
+
+    def __init__(self, batch_size=WRITE_BEHIND_BATCH_SIZE, flush_seconds=WRITE_BEHIND_FLUSH_SECONDS,
+                 queue_size=WRITE_BEHIND_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, job, name="write"):
+        self._queue.put((name, job))
+
+    def flush(self, timeout=None):
+        """Block until every job submitted so far has been written. Returns False on timeout."""
+        barrier = _Barrier()
+        self._queue.put((None, barrier))
+        return barrier.done.wait(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        batch, barriers = [self._queue.get()], []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            if isinstance(batch[-1][1], _Barrier):
+                break  # commit now so flush() returns promptly
+            try:
+                batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        jobs = []
+        for name, job in batch:
+            if isinstance(job, _Barrier):
+                barriers.append(job)
+            else:
+                jobs.append((name, job))
+        return jobs, barriers
+
+    def _run(self):
+        from app import app
+
+        while True:
+            jobs, barriers = self._next_batch()
+            try:
+                if jobs:
+                    with app.app_context():
+                        self._write(jobs)
+            except Exception as e:
+                logger.error(f"Write-behind batch crashed: {e}", exc_info=True)
+            finally:
+                for barrier in barriers:
+                    barrier.done.set()
+
+    def _write(self, jobs):
+        from models import db
+
+        try:
+            with metrics.span("db_commit"):
+                callbacks = [job() for _, job in jobs]
+                db.session.commit()
+            metrics.inc("osint_db_commits_total", value=len(jobs), outcome="success")
+            for (name, _), callback in zip(jobs, callbacks):
+                _after_commit(name, callback)
+            return
+        except Exception as e:
+            db.session.rollback()
+            if len(jobs) == 1:
+                self._failed(jobs[0][0], e)
+                return
+            logger.warning(f"Write-behind batch of {len(jobs)} failed ({e}); retrying jobs individually.")
+        for name, job in jobs:
+            try:
+                callback = job()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._failed(name, e)
+                continue
+            metrics.inc("osint_db_commits_total", outcome="success")
+            _after_commit(name, callback)
+
+    def _failed(self, name, error):
+        metrics.inc("osint_db_commits_total", outcome="failure")
+        logger.error(f"Write-behind job '{name}' failed and was dropped: {error}", exc_info=True)
+
+
+def _after_commit(name, callback):
+    if callback is None:
+        return
+    try:
+        callback()
+    except Exception as e:
+        logger.error(f"After-commit step of '{name}' failed: {e}", exc_info=True)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter()
+            atexit.register(_writer.flush, WRITE_BEHIND_SHUTDOWN_SECONDS)
+        return _writer
+
+def submit(job, name="write"):
+    """Queue `job` for the background writer, or run and commit it now if WRITE_BEHIND is off."""
+    if WRITE_BEHIND:
+        get_writer().submit(job, name)
+        return
+    from models import db
+    try:
+        with metrics.span("db_commit"):
+            callback = job()
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        metrics.inc("osint_db_commits_total", outcome="failure")
+        logger.error(f"Database write '{name}' failed: {e}", exc_info=True)
+        return
+    metrics.inc("osint_db_commits_total", outcome="success")
+    _after_commit(name, callback)
+
+def flush(timeout=None):
+    """Wait for queued writes (e.g. before enqueueing work that reads them). True if all were written."""
+    if not WRITE_BEHIND or _writer is None:
+        return True
+    return _writer.flush(timeout)
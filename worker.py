@@ -0,0 +1,128 @@
+
+"""
+Queue worker: claims scrape and enrichment tasks from the shared task table
+(utils/task_queue.py) and writes results back to the same database. Start as many
+as needed, on any host whose DATABASE_URL points at the shared database:
+
+    python worker.py --concurrency 2 --kinds search,enrich
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+from app import app
+from utils.task_queue import TASK_KINDS, TASK_LEASE_SECONDS, enqueue, claim, heartbeat, complete, fail
+
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", "1"))
+WORKER_POLL_SECONDS = float(os.environ.get("WORKER_POLL_SECONDS", "2"))
+ENRICH_BATCH_SIZE = int(os.environ.get("ENRICH_BATCH_SIZE", "500"))
+
+def handle_search(task, payload):
+    # run_scraper stores the SearchResult and indexes posts; enrichment follows as its own task.
+    from scraper import run_scraper
+    from utils import write_behind
+
+    results = asyncio.run(run_scraper(payload["query"], payload.get("search_type", "keyword"),
+                                      payload["platforms"], **payload.get("options", {})))
+    if any(r.get("status") == "success" for r in results):
+        write_behind.flush()  # the enrich task reads the posts this search indexed
+        enqueue("enrich", {"limit": ENRICH_BATCH_SIZE}, idempotency_key=f"enrich-after:{task.id}", priority=-1)
+    return {"platforms": [{"platform": r.get("platform"), "status": r.get("status"),
+                           "result_count": len(r.get("results") or [])} for r in results]}
+
+def handle_batch(task, payload):
+    from utils.batch_runner import run_batch_job, run_scheduled_job
+
+    # Scheduled jobs carry an id and are recorded in the run history.
+    return run_scheduled_job(payload) if payload.get("id") else run_batch_job(payload)
+
+def handle_enrich(task, payload):
+    from utils.batch_runner import enrich_pending
+
+    return {"enriched": enrich_pending(payload.get("limit", ENRICH_BATCH_SIZE))}
+
+TASK_HANDLERS = {
+    "search": handle_search,
+    "batch": handle_batch,
+    "enrich": handle_enrich,
+}
+
+def _keep_lease(stop, task_id, worker_id):
+    with app.app_context():
+        while not stop.wait(TASK_LEASE_SECONDS / 3):
+            if not heartbeat(task_id, worker_id):
+                print(f"⚠️ {worker_id} lost the lease on task {task_id}")
+                return
+
+def run_task(task, worker_id):
+    """Run one claimed task, heartbeating its lease, and record the result or failure."""
+    stop = threading.Event()
+    beat = threading.Thread(target=_keep_lease, args=(stop, task.id, worker_id), daemon=True)
+    beat.start()
+    try:
+        handler = TASK_HANDLERS.get(task.kind)
+        if handler is None:
+            raise ValueError(f"No handler for task kind '{task.kind}'")
+        result = handler(task, json.loads(task.payload))
+    except Exception as e:
+        print(f"❌ Task {task.id} ({task.kind}) failed on attempt {task.attempts}: {e}")
+        fail(task, worker_id, e)
+        return False
+    finally:
+        stop.set()
+        beat.join()
+    complete(task, worker_id, result)
+    print(f"✅ Task {task.id} ({task.kind}) done")
+    return True
+
+def work(worker_id, kinds=None, drain=False, stop_event=None, poll_seconds=WORKER_POLL_SECONDS):
+    """
+    Claim and run tasks until stopped. With `drain`, return once no task is claimable.
+    Returns the number of tasks processed.
+    """
+    processed = 0
+    with app.app_context():
+        while not (stop_event and stop_event.is_set()):
+            task = claim(worker_id, kinds)
+            if task is None:
+                if drain:
+                    break
+                time.sleep(poll_seconds)
+                continue
+            print(f"⚙️ {worker_id} claimed task {task.id} ({task.kind}, attempt {task.attempts}/{task.max_attempts})")
+            run_task(task, worker_id)
+            processed += 1
+    return processed
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queue workers against the shared database.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY,
+                        help="worker threads in this process (Facebook scrapes need one browser profile each)")
+    parser.add_argument("--kinds", default=",".join(TASK_KINDS), help="comma-separated task kinds to consume")
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    kinds = [k for k in args.kinds.split(",") if k]
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+    threads = [threading.Thread(target=work, args=(f"{prefix}:{n}", kinds, args.drain, stop), daemon=True)
+               for n in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    print(f"👷 {args.concurrency} worker(s) consuming {kinds}")
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(1)
+    except (KeyboardInterrupt, SystemExit):
+        stop.set()
+        print("🛑 Workers stopping after their current task.")
+        for thread in threads:
+            thread.join()
+
+if __name__ == "__main__":
+    main()